@@ -1,47 +1,88 @@
+import numpy as np
 import pandas as pd
-from typing import List, Dict
+from typing import Any, Callable, List, Dict, Optional, Union
 from datetime import datetime, timedelta
 from collections import defaultdict
-from core.schemas import Transaction, Insight, AnalysisResult
+from core.schemas import Transaction, Insight, InsightMetrics, IncomeProfile, AnalysisResult, AnalyticsState, MerchantAggregate
+from core.frame import TransactionFrame
 from core.utils import setup_logger
 
 logger = setup_logger("analytics_agent")
 
+# Transaction IDs an AnalyticsState keeps per merchant (the latest ones)
+MAX_STATE_IDS = 100
+
+def _month_ordinals(dates: pd.Series) -> np.ndarray:
+    # Months since 1970-01 as plain integers, cheaper to group and range over than Periods
+    dates = pd.to_datetime(dates)
+    return ((dates.dt.year - 1970) * 12 + dates.dt.month - 1).to_numpy()
+
+def _month_key(ordinal: int) -> str:
+    return f"{1970 + ordinal // 12:04d}-{ordinal % 12 + 1:02d}"
+
+def _month_ordinal(key: str) -> int:
+    year, month = key.split('-')
+    return (int(year) - 1970) * 12 + int(month) - 1
+
+class AnalysisContext:
+    """
+    Views shared by every detector, built once per analysis.
+    Holds the expense subset, its parsed dates, weekday and month, and the
+    merchant/category group indexes so detectors never refilter the full frame.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.is_income = (df['type'] == 'income').to_numpy()
+        self.expenses = df[(df['type'] == 'expense').to_numpy()]
+        
+        self.dates = pd.to_datetime(self.expenses['date'])
+        self.weekday = self.dates.dt.dayofweek
+        self.is_weekend = self.weekday.isin([5, 6]).to_numpy()
+        self.month = self.dates.dt.to_period('M')
+        
+        self.by_merchant = self.expenses.groupby('merchant')
+        self.category_stats = self.expenses.groupby('category')['amount'].agg(['sum', 'mean', 'count'])
+
 class AnalyticsAgent:
     """
     Agent 3: Pattern Detection + Analytics
     Responsibility: Analyze transactions to detect patterns, leaks, and trends.
     """
 
-    def analyze(self, transactions: List[Transaction]) -> AnalysisResult:
+    def analyze(self, transactions: Union[TransactionFrame, List[Transaction]]) -> AnalysisResult:
         """
         Performs comprehensive analysis on transactions.
         """
         logger.info(f"Analyzing {len(transactions)} transactions...")
         
         if not transactions:
-            return AnalysisResult(
-                insights=[],
-                spending_by_category={},
-                fixed_expenses_total=0.0,
-                variable_expenses_total=0.0,
-                total_income=0.0,
-                total_expense=0.0
-            )
+            return self._empty_result()
         
-        # Convert to DataFrame for easier analysis
+        # Read the columns directly; lists are converted once
         df = self._to_dataframe(transactions)
+        return self.analyze_frame(df)
+
+    def analyze_frame(self, df: pd.DataFrame) -> AnalysisResult:
+        """
+        Performs comprehensive analysis on a transaction DataFrame (see _to_dataframe for columns).
+        """
+        if df.empty:
+            return self._empty_result()
+        
+        # Shared views, computed once for every detector
+        ctx = AnalysisContext(df)
         
         # Calculate totals
-        totals = self._calculate_totals(df)
+        totals = self._calculate_totals(ctx)
         
         # Identify insights
         insights = []
-        insights.extend(self._detect_spend_leaks(df))
-        insights.extend(self._detect_weekend_overspending(df))
-        insights.extend(self._detect_subscriptions(df))
-        insights.extend(self._detect_category_spikes(df))
-        insights.extend(self._detect_trends(df))
+        insights.extend(self._detect_spend_leaks(ctx))
+        insights.extend(self._detect_weekend_overspending(ctx))
+        insights.extend(self._detect_subscriptions(ctx))
+        insights.extend(self._detect_category_spikes(ctx))
+        insights.extend(self._detect_trends(ctx))
         
         return AnalysisResult(
             insights=insights,
@@ -49,28 +90,29 @@ class AnalyticsAgent:
             fixed_expenses_total=totals['fixed'],
             variable_expenses_total=totals['variable'],
             total_income=totals['income'],
-            total_expense=totals['expense']
+            total_expense=totals['expense'],
+            income_profile=self._calculate_income_profile(ctx)
+        )
+
+    def _empty_result(self) -> AnalysisResult:
+        return AnalysisResult(
+            insights=[],
+            spending_by_category={},
+            fixed_expenses_total=0.0,
+            variable_expenses_total=0.0,
+            total_income=0.0,
+            total_expense=0.0
         )
 
-    def _to_dataframe(self, transactions: List[Transaction]) -> pd.DataFrame:
+    def _to_dataframe(self, transactions: Union[TransactionFrame, List[Transaction]]) -> pd.DataFrame:
         """
-        Converts transactions to a DataFrame.
+        Returns the analysis DataFrame for a frame or a list of transactions.
         """
-        data = []
-        for txn in transactions:
-            data.append({
-                'id': txn.id,
-                'date': txn.txn_date,
-                'amount': txn.amount,
-                'type': txn.txn_type,
-                'merchant': txn.merchant,
-                'description': txn.description,
-                'category': txn.category or 'Uncategorized',
-                'is_fixed': txn.is_fixed or False
-            })
-        return pd.DataFrame(data)
+        if not isinstance(transactions, TransactionFrame):
+            transactions = TransactionFrame.from_transactions(transactions)
+        return transactions.analysis_view()
 
-    def _calculate_totals(self, df: pd.DataFrame) -> Dict:
+    def _calculate_totals(self, ctx: AnalysisContext) -> Dict:
         """
         Calculates spending totals.
         """
@@ -83,14 +125,13 @@ class AnalyticsAgent:
         }
         
         # Total income and expenses
-        result['income'] = df[df['type'] == 'income']['amount'].sum()
-        result['expense'] = df[df['type'] == 'expense']['amount'].sum()
+        result['income'] = ctx.df['amount'][ctx.is_income].sum()
+        result['expense'] = ctx.expenses['amount'].sum()
         
         # By category
-        expenses_df = df[df['type'] == 'expense']
+        expenses_df = ctx.expenses
         if not expenses_df.empty:
-            by_cat = expenses_df.groupby('category')['amount'].sum().to_dict()
-            result['by_category'] = by_cat
+            result['by_category'] = ctx.category_stats['sum'].to_dict()
             
             # Fixed vs Variable
             result['fixed'] = expenses_df[expenses_df['is_fixed'] == True]['amount'].sum()
@@ -98,140 +139,597 @@ class AnalyticsAgent:
         
         return result
 
-    def _detect_spend_leaks(self, df: pd.DataFrame) -> List[Insight]:
+    def _calculate_income_profile(self, ctx: AnalysisContext) -> IncomeProfile:
+        """
+        Derives income regularity from per-month income sums and counts.
+        """
+        income_df = ctx.df[ctx.is_income]
+        if income_df.empty:
+            return IncomeProfile()
+        
+        amounts = income_df['amount']
+        monthly = amounts.groupby(_month_ordinals(income_df['date'])).agg(['sum', 'size'])
+        months = _month_ordinals(ctx.df['date'])
+        
+        return self._income_profile(
+            count=len(amounts),
+            distinct=amounts.nunique(),
+            low=amounts.min(),
+            high=amounts.max(),
+            mean=amounts.mean(),
+            monthly=dict(zip(monthly.index, monthly['sum'])),
+            max_monthly_count=monthly['size'].max(),
+            first_month=months.min(),
+            last_month=months.max()
+        )
+
+    def _income_profile(self, count: int, distinct: int, low: float, high: float, mean: float,
+                        monthly: Dict[int, float], max_monthly_count: int,
+                        first_month: int, last_month: int) -> IncomeProfile:
+        """
+        Builds the IncomeProfile from income aggregates. Months are ordinals from _month_ordinals.
+        """
+        if count == 0:
+            return IncomeProfile()
+        
+        if count < 2:
+            income_type = "unknown"
+        # If all income amounts are same or very similar (within 10% variance)
+        elif distinct <= 2 and mean != 0 and (high - low) / mean < 0.1:
+            income_type = "fixed"
+        # Consistent monthly income (1-2 transactions per month)
+        elif max_monthly_count <= 2:
+            income_type = "fixed"
+        else:
+            income_type = "variable"
+        
+        # Months of the statement without any income count as zero
+        ordinals = range(int(first_month), int(last_month) + 1)
+        values = np.array([monthly.get(o, 0.0) for o in ordinals], dtype=float)
+        average = values.mean()
+        worst = int(values.argmin())
+        
+        return IncomeProfile(
+            income_type=income_type,
+            monthly_income={_month_key(o): float(v) for o, v in zip(ordinals, values)},
+            average_monthly_income=float(average),
+            volatility=float(values.std() / average) if len(values) >= 2 and average > 0 else 0.0,
+            worst_month=_month_key(ordinals[worst]),
+            worst_month_income=float(values[worst])
+        )
+
+    def _detect_spend_leaks(self, ctx: AnalysisContext) -> List[Insight]:
         """
         Detects small recurring expenses that add up (spend leaks).
         """
-        insights = []
-        expenses_df = df[df['type'] == 'expense']
+        expenses_df = ctx.expenses
         
         # Group by merchant and count transactions < 500
-        small_txns = expenses_df[expenses_df['amount'] < 500]
-        merchant_counts = small_txns.groupby('merchant').agg({'amount': ['count', 'sum']})
+        small_txns = expenses_df[(expenses_df['amount'] < 500).to_numpy()]
+        grouped = small_txns.groupby('merchant')
+        merchant_counts = grouped['amount'].agg(['count', 'sum'])
         merchant_counts.columns = ['count', 'total']
         
-        # If a merchant appears 3+ times with small amounts
-        leaks = merchant_counts[merchant_counts['count'] >= 3]
+        # Row positions per merchant, gathered once instead of refiltering per merchant
+        positions = grouped.indices
+        ids = small_txns['id'].to_numpy()
         
-        for merchant, row in leaks.iterrows():
-            if row['total'] > 1000:  # Only flag if total > 1000
-                insights.append(Insight(
-                    insight_type="spend_leak",
-                    description=f"Multiple small transactions at {merchant} totaling Rs.{row['total']:.2f} ({int(row['count'])} transactions)",
-                    severity="medium",
-                    related_transaction_ids=small_txns[small_txns['merchant'] == merchant]['id'].tolist()
-                ))
+        return self._spend_leak_insights(merchant_counts, lambda merchant: ids[positions[merchant]].tolist())
+
+    def _spend_leak_insights(self, merchant_counts: pd.DataFrame, ids_for: Callable[[str], List[str]]) -> List[Insight]:
+        """
+        Builds spend-leak insights from per-merchant small-transaction count/total.
+        """
+        leaks = merchant_counts[self._is_spend_leak(merchant_counts)]
         
-        return insights
+        return [
+            self._spend_leak_insight(merchant, total, count, ids_for(merchant))
+            for merchant, total, count in zip(leaks.index, leaks['total'], leaks['count'])
+        ]
+
+    def _is_spend_leak(self, merchant_counts: pd.DataFrame) -> pd.Series:
+        # If a merchant appears 3+ times with small amounts, only flag if total > 1000
+        return (merchant_counts['count'] >= 3) & (merchant_counts['total'] > 1000)
 
-    def _detect_weekend_overspending(self, df: pd.DataFrame) -> List[Insight]:
+    def _spend_leak_insight(self, merchant: str, total: float, count: int, ids: List[str]) -> Insight:
+        return Insight(
+            insight_type="spend_leak",
+            description=f"Multiple small transactions at {merchant} totaling Rs.{total:.2f} ({int(count)} transactions)",
+            severity="medium",
+            related_transaction_ids=ids,
+            metrics=InsightMetrics(merchant=merchant, amount=total, count=int(count), average=total / count)
+        )
+
+    def _detect_weekend_overspending(self, ctx: AnalysisContext) -> List[Insight]:
         """
         Detects if user spends significantly more on weekends.
         """
-        insights = []
-        expenses_df = df[df['type'] == 'expense'].copy()
-        
-        if expenses_df.empty:
-            return insights
+        if ctx.expenses.empty:
+            return []
         
-        expenses_df['weekday'] = pd.to_datetime(expenses_df['date']).dt.dayofweek
-        expenses_df['is_weekend'] = expenses_df['weekday'].isin([5, 6])
-        
-        weekend_spend = expenses_df[expenses_df['is_weekend']]['amount'].sum()
-        weekday_spend = expenses_df[~expenses_df['is_weekend']]['amount'].sum()
-        
-        weekend_days = expenses_df[expenses_df['is_weekend']]['date'].nunique()
-        weekday_days = expenses_df[~expenses_df['is_weekend']]['date'].nunique()
+        amounts = ctx.expenses['amount']
+        is_weekend = ctx.is_weekend
         
+        return self._weekend_insights(
+            weekend_spend=amounts[is_weekend].sum(),
+            weekday_spend=amounts[~is_weekend].sum(),
+            weekend_days=ctx.dates[is_weekend].nunique(),
+            weekday_days=ctx.dates[~is_weekend].nunique()
+        )
+
+    def _weekend_insights(self, weekend_spend: float, weekday_spend: float,
+                          weekend_days: int, weekday_days: int) -> List[Insight]:
+        """
+        Compares average spend per active weekend day and weekday.
+        """
         if weekend_days > 0 and weekday_days > 0:
             avg_weekend = weekend_spend / weekend_days
             avg_weekday = weekday_spend / weekday_days
             
             if avg_weekend > avg_weekday * 1.5:  # 50% more on weekends
-                insights.append(Insight(
-                    insight_type="weekend_overspending",
-                    description=f"Weekend spending (Rs.{avg_weekend:.2f}/day) is {((avg_weekend/avg_weekday - 1) * 100):.0f}% higher than weekdays (Rs.{avg_weekday:.2f}/day)",
-                    severity="medium"
-                ))
+                return [self._weekend_insight(avg_weekend, avg_weekday)]
         
-        return insights
+        return []
+
+    def _weekend_insight(self, avg_weekend: float, avg_weekday: float) -> Insight:
+        return Insight(
+            insight_type="weekend_overspending",
+            description=f"Weekend spending (Rs.{avg_weekend:.2f}/day) is {((avg_weekend/avg_weekday - 1) * 100):.0f}% higher than weekdays (Rs.{avg_weekday:.2f}/day)",
+            severity="medium",
+            metrics=InsightMetrics(average=avg_weekend, baseline_average=avg_weekday)
+        )
 
-    def _detect_subscriptions(self, df: pd.DataFrame) -> List[Insight]:
+    def _detect_subscriptions(self, ctx: AnalysisContext) -> List[Insight]:
         """
         Detects recurring subscription-like payments.
         """
-        insights = []
-        expenses_df = df[df['type'] == 'expense']
-        
-        # Group by merchant
-        for merchant, group in expenses_df.groupby('merchant'):
-            if len(group) >= 2:
-                amounts = group['amount'].values
-                # Check if amounts are similar (within 10%)
-                if len(set(amounts)) == 1 or (amounts.max() - amounts.min()) / amounts.mean() < 0.1:
-                    total = amounts.sum()
-                    insights.append(Insight(
-                        insight_type="subscription",
-                        description=f"Recurring payment to {merchant}: Rs.{amounts[0]:.2f} x {len(amounts)} = Rs.{total:.2f}",
-                        severity="low",
-                        related_transaction_ids=group['id'].tolist()
-                    ))
-        
-        return insights
-
-    def _detect_category_spikes(self, df: pd.DataFrame) -> List[Insight]:
+        if ctx.expenses.empty:
+            return []
+        
+        # One grouped pass for the amount spread of every merchant
+        amounts = ctx.expenses['amount']
+        stats = ctx.by_merchant['amount'].agg(['count', 'min', 'max', 'mean', 'sum', 'first'])
+        stats['missing'] = amounts.isna().groupby(ctx.expenses['merchant']).sum()
+        
+        positions = ctx.by_merchant.indices
+        ids = ctx.expenses['id'].to_numpy()
+        
+        return self._subscription_insights(stats, lambda merchant: ids[positions[merchant]].tolist())
+
+    def _subscription_insights(self, stats: pd.DataFrame, ids_for: Callable[[str], List[str]]) -> List[Insight]:
         """
-        Detects unusual spikes in category spending.
+        Builds subscription insights from per-merchant count/min/max/mean/sum/first/missing.
         """
-        insights = []
-        expenses_df = df[df['type'] == 'expense']
+        recurring = stats[self._is_subscription(stats)]
         
-        if expenses_df.empty:
-            return insights
+        return [
+            self._subscription_insight(merchant, first, count, total, ids_for(merchant))
+            for merchant, first, count, total in zip(recurring.index, recurring['first'], recurring['count'], recurring['sum'])
+        ]
+
+    def _is_subscription(self, stats: pd.DataFrame) -> pd.Series:
+        # Check if amounts are similar (within 10%)
+        similar = (stats['max'] == stats['min']) | ((stats['max'] - stats['min']) / stats['mean'] < 0.1)
+        return (stats['count'] >= 2) & (stats['missing'] == 0) & similar
+
+    def _subscription_insight(self, merchant: str, first: float, count: int, total: float, ids: List[str]) -> Insight:
+        return Insight(
+            insight_type="subscription",
+            description=f"Recurring payment to {merchant}: Rs.{first:.2f} x {int(count)} = Rs.{total:.2f}",
+            severity="low",
+            related_transaction_ids=ids,
+            metrics=InsightMetrics(merchant=merchant, amount=total, count=int(count), average=first)
+        )
+
+    def _detect_category_spikes(self, ctx: AnalysisContext) -> List[Insight]:
+        """
+        Detects unusual spikes in category spending.
+        """
+        if ctx.expenses.empty:
+            return []
         
-        # Calculate average per category
-        by_cat = expenses_df.groupby('category')['amount'].agg(['sum', 'mean', 'count'])
+        # Sum, average and count per category
+        return self._category_spike_insights(ctx.category_stats)
+
+    def _category_spike_insights(self, by_cat: pd.DataFrame) -> List[Insight]:
+        """
+        Builds category-spike insights from per-category sum/count.
+        """
+        spikes = by_cat[self._is_category_spike(by_cat.index, by_cat['sum'])]
         
+        return [
+            self._category_spike_insight(category, total, count)
+            for category, total, count in zip(spikes.index, spikes['sum'], spikes['count'])
+        ]
+
+    def _is_category_spike(self, categories: pd.Index, totals: pd.Series) -> pd.Series:
         # Flag categories with high total and high average (potential spikes)
-        for category, row in by_cat.iterrows():
-            if row['sum'] > 5000 and category not in ['Rent', 'Salary', 'Utilities']:
-                insights.append(Insight(
-                    insight_type="category_spike",
-                    description=f"High spending in {category}: Rs.{row['sum']:.2f} across {int(row['count'])} transactions",
-                    severity="medium"
-                ))
-        
-        return insights
+        return (totals > 5000) & ~pd.Index(categories).isin(['Rent', 'Salary', 'Utilities'])
+
+    def _category_spike_insight(self, category: str, total: float, count: int) -> Insight:
+        return Insight(
+            insight_type="category_spike",
+            description=f"High spending in {category}: Rs.{total:.2f} across {int(count)} transactions",
+            severity="medium",
+            metrics=InsightMetrics(category=category, amount=total, count=int(count), average=total / count)
+        )
 
-    def _detect_trends(self, df: pd.DataFrame) -> List[Insight]:
+    def _detect_trends(self, ctx: AnalysisContext) -> List[Insight]:
         """
         Detects month-over-month trends.
         """
-        insights = []
-        expenses_df = df[df['type'] == 'expense'].copy()
+        if ctx.expenses.empty:
+            return []
+        
+        return self._trend_insights(ctx.expenses['amount'].groupby(ctx.month).sum())
+
+    def _trend_insights(self, monthly: pd.Series) -> List[Insight]:
+        """
+        Compares the first and last month of a chronologically sorted monthly series.
+        """
+        if len(monthly) >= 2:
+            # Compare first and last month
+            insight = self._trend_insight(monthly.iloc[0], monthly.iloc[-1])
+            if insight:
+                return [insight]
+        
+        return []
+
+    def _trend_insight(self, first_month: float, last_month: float) -> Optional[Insight]:
+        if last_month > first_month * 1.2:
+            return Insight(
+                insight_type="trend_increasing",
+                description=f"Spending increased from Rs.{first_month:.2f} to Rs.{last_month:.2f} over time",
+                severity="high",
+                metrics=InsightMetrics(amount=last_month, previous_amount=first_month)
+            )
+        elif last_month < first_month * 0.8:
+            return Insight(
+                insight_type="trend_decreasing",
+                description=f"Spending decreased from Rs.{first_month:.2f} to Rs.{last_month:.2f} - great progress!",
+                severity="low",
+                metrics=InsightMetrics(amount=last_month, previous_amount=first_month)
+            )
+        return None
+
+    # --- Multi-user batch analytics ---
+
+    def analyze_batch(self, transactions: Union[TransactionFrame, pd.DataFrame],
+                      user_column: str = 'user_id') -> Dict[Any, AnalysisResult]:
+        """
+        Analyzes many users at once from one frame carrying a user ID column.
+        
+        Every detector runs as a single grouped operation keyed on (user, ...), so the
+        pandas overhead is paid once per batch rather than once per user.
+        Returns the same AnalysisResult per user that analyze() gives on that user's rows.
+        """
+        df = transactions.analysis_view() if isinstance(transactions, TransactionFrame) else TransactionFrame(transactions).analysis_view()
+        if user_column not in df.columns:
+            raise ValueError(f"Batch analysis needs a '{user_column}' column")
+        
+        logger.info(f"Analyzing {len(df)} transactions in batch...")
+        
+        amounts = df['amount']
+        is_income = (df['type'] == 'income').to_numpy()
+        is_expense = (df['type'] == 'expense').to_numpy()
+        
+        # Totals per user
+        totals = pd.DataFrame({
+            'income': amounts.where(is_income, 0.0),
+            'expense': amounts.where(is_expense, 0.0),
+            'fixed': amounts.where(is_expense & (df['is_fixed'] == True).to_numpy(), 0.0),
+            'variable': amounts.where(is_expense & (df['is_fixed'] == False).to_numpy(), 0.0)
+        }).groupby(df[user_column]).sum()
+        
+        profiles = self._batch_income_profiles(df, user_column, is_income)
+        insights: Dict[Any, List[Insight]] = {user: [] for user in totals.index}
+        by_category: Dict[Any, Dict[str, float]] = {user: {} for user in totals.index}
+        
+        expenses_df = df[is_expense]
+        if not expenses_df.empty:
+            self._batch_insights(expenses_df, user_column, insights, by_category)
+        
+        return {
+            user: AnalysisResult(
+                insights=insights[user],
+                spending_by_category=by_category[user],
+                fixed_expenses_total=fixed,
+                variable_expenses_total=variable,
+                total_income=income,
+                total_expense=expense,
+                income_profile=profiles.get(user) or IncomeProfile()
+            )
+            for user, income, expense, fixed, variable in zip(
+                totals.index, totals['income'], totals['expense'], totals['fixed'], totals['variable']
+            )
+        }
+
+    def _batch_income_profiles(self, df: pd.DataFrame, user_column: str, is_income: np.ndarray) -> Dict[Any, IncomeProfile]:
+        """
+        Income profiles for every user with income, from grouped (user, month) aggregates.
+        """
+        income_df = df[is_income]
+        if income_df.empty:
+            return {}
+        
+        users = income_df[user_column].to_numpy()
+        amounts = income_df['amount']
+        stats = amounts.groupby(users).agg(['size', 'nunique', 'min', 'max', 'mean'])
+        monthly = amounts.groupby([users, _month_ordinals(income_df['date'])]).agg(['sum', 'size'])
+        max_counts = monthly['size'].groupby(level=0).max()
+        span = pd.Series(_month_ordinals(df['date'])).groupby(df[user_column].to_numpy()).agg(['min', 'max'])
+        
+        monthly_by_user: Dict[Any, Dict[int, float]] = {user: {} for user in stats.index}
+        for (user, month), total in zip(monthly.index, monthly['sum']):
+            monthly_by_user[user][month] = total
+        
+        return {
+            user: self._income_profile(
+                count=count, distinct=distinct, low=low, high=high, mean=mean,
+                monthly=monthly_by_user[user],
+                max_monthly_count=max_counts[user],
+                first_month=span.at[user, 'min'],
+                last_month=span.at[user, 'max']
+            )
+            for user, count, distinct, low, high, mean in zip(
+                stats.index, stats['size'], stats['nunique'], stats['min'], stats['max'], stats['mean']
+            )
+        }
+
+    def _batch_insights(self, expenses_df: pd.DataFrame, user_column: str,
+                        insights: Dict[Any, List[Insight]], by_category: Dict[Any, Dict[str, float]]):
+        """
+        Runs every detector over all users' expenses, appending in the order analyze() uses.
+        """
+        users = expenses_df[user_column]
+        amounts = expenses_df['amount']
+        ids = expenses_df['id'].to_numpy()
+        dates = pd.to_datetime(expenses_df['date'])
+        is_weekend = dates.dt.dayofweek.isin([5, 6]).to_numpy()
+        
+        category_stats = expenses_df.groupby([user_column, 'category'])['amount'].agg(['sum', 'count'])
+        for (user, category), total in category_stats['sum'].items():
+            by_category[user][category] = total
+        
+        # Spend leaks
+        small_txns = expenses_df[(amounts < 500).to_numpy()]
+        grouped = small_txns.groupby([user_column, 'merchant'])
+        merchant_counts = grouped['amount'].agg(['count', 'sum'])
+        merchant_counts.columns = ['count', 'total']
+        leaks = merchant_counts[self._is_spend_leak(merchant_counts)]
+        positions = grouped.indices
+        small_ids = small_txns['id'].to_numpy()
+        for key, total, count in zip(leaks.index, leaks['total'], leaks['count']):
+            user, merchant = key
+            insights[user].append(self._spend_leak_insight(merchant, total, count, small_ids[positions[key]].tolist()))
+        
+        # Weekend vs weekday spend per active day
+        days = pd.DataFrame({'user': users.to_numpy(), 'date': dates.to_numpy(), 'weekend': is_weekend})
+        active_days = days.drop_duplicates(['user', 'date']).groupby(['user', 'weekend']).size().unstack(fill_value=0)
+        spend = amounts.groupby([users.to_numpy(), is_weekend]).sum().unstack(fill_value=0.0)
+        active_days = active_days.reindex(columns=[False, True], fill_value=0)
+        spend = spend.reindex(index=active_days.index, columns=[False, True], fill_value=0.0)
+        has_both = (active_days[True] > 0) & (active_days[False] > 0)
+        avg_weekend = spend[True][has_both] / active_days[True][has_both]
+        avg_weekday = spend[False][has_both] / active_days[False][has_both]
+        flagged = avg_weekend > avg_weekday * 1.5
+        for user, weekend_avg, weekday_avg in zip(avg_weekend.index[flagged], avg_weekend[flagged], avg_weekday[flagged]):
+            insights[user].append(self._weekend_insight(weekend_avg, weekday_avg))
+        
+        # Subscriptions
+        by_merchant = expenses_df.groupby([user_column, 'merchant'])
+        stats = by_merchant['amount'].agg(['count', 'min', 'max', 'mean', 'sum', 'first'])
+        stats['missing'] = amounts.isna().groupby([users, expenses_df['merchant']]).sum()
+        recurring = stats[self._is_subscription(stats)]
+        positions = by_merchant.indices
+        for key, first, count, total in zip(recurring.index, recurring['first'], recurring['count'], recurring['sum']):
+            user, merchant = key
+            insights[user].append(self._subscription_insight(merchant, first, count, total, ids[positions[key]].tolist()))
+        
+        # Category spikes
+        spikes = category_stats[self._is_category_spike(category_stats.index.get_level_values('category'), category_stats['sum'])]
+        for (user, category), total, count in zip(spikes.index, spikes['sum'], spikes['count']):
+            insights[user].append(self._category_spike_insight(category, total, count))
+        
+        # Month-over-month trends: first vs last month per user
+        monthly = amounts.groupby([users, dates.dt.to_period('M')]).sum()
+        ends = monthly.groupby(level=0).agg(['first', 'last', 'size'])
+        ends = ends[ends['size'] >= 2]
+        for user, first_month, last_month in zip(ends.index, ends['first'], ends['last']):
+            insight = self._trend_insight(first_month, last_month)
+            if insight:
+                insights[user].append(insight)
+
+    # --- Incremental analytics ---
+
+    def analyze_incremental(self, state: AnalyticsState,
+                            new_transactions: Union[TransactionFrame, List[Transaction]]) -> AnalysisResult:
+        """
+        Folds new transactions into a running state and re-derives the analysis.
+        Cost is proportional to the new rows, not the full history. The state is updated in place.
+        """
+        self.update_state(state, new_transactions)
+        return self.analyze_state(state)
+
+    def update_state(self, state: AnalyticsState,
+                     new_transactions: Union[TransactionFrame, List[Transaction]]) -> AnalyticsState:
+        """
+        Adds the aggregates of new transactions to the state.
+        """
+        logger.info(f"Updating analytics state with {len(new_transactions)} transactions...")
+        
+        if not new_transactions:
+            return state
+        
+        ctx = AnalysisContext(self._to_dataframe(new_transactions))
+        expenses_df = ctx.expenses
+        totals = self._calculate_totals(ctx)
+        
+        state.transactions_count += len(ctx.df)
+        state.total_income += float(totals['income'])
+        state.total_expense += float(totals['expense'])
+        state.fixed_expenses_total += float(totals['fixed'])
+        state.variable_expenses_total += float(totals['variable'])
+        self._update_income_state(state, ctx)
         
         if expenses_df.empty:
-            return insights
+            return state
         
-        expenses_df['month'] = pd.to_datetime(expenses_df['date']).dt.to_period('M')
-        monthly = expenses_df.groupby('month')['amount'].sum()
+        for category, total, count in zip(ctx.category_stats.index, ctx.category_stats['sum'], ctx.category_stats['count']):
+            state.category_totals[category] = state.category_totals.get(category, 0.0) + float(total)
+            state.category_counts[category] = state.category_counts.get(category, 0) + int(count)
         
-        if len(monthly) >= 2:
-            # Compare first and last month
-            first_month = monthly.iloc[0]
-            last_month = monthly.iloc[-1]
+        # Per-merchant spread and IDs
+        amounts = expenses_df['amount']
+        stats = ctx.by_merchant['amount'].agg(['count', 'min', 'max', 'sum', 'first'])
+        stats['missing'] = amounts.isna().groupby(expenses_df['merchant']).sum()
+        positions = ctx.by_merchant.indices
+        ids = expenses_df['id'].to_numpy()
+        
+        small_txns = expenses_df[(amounts < 500).to_numpy()]
+        small_grouped = small_txns.groupby('merchant')
+        small_stats = small_grouped['amount'].agg(['count', 'sum'])
+        small_positions = small_grouped.indices
+        small_ids = small_txns['id'].to_numpy()
+        
+        for merchant, count, low, high, total, first, missing in zip(
+            stats.index, stats['count'], stats['min'], stats['max'], stats['sum'], stats['first'], stats['missing']
+        ):
+            agg = state.merchants.setdefault(merchant, MerchantAggregate())
+            agg.count += int(count)
+            agg.total += float(total)
+            agg.missing += int(missing)
+            if pd.notna(low):
+                agg.min = float(low) if agg.min is None else min(agg.min, float(low))
+                agg.max = float(high) if agg.max is None else max(agg.max, float(high))
+            if agg.first is None and pd.notna(first):
+                agg.first = float(first)
+            agg.transaction_ids = (agg.transaction_ids + ids[positions[merchant]].tolist())[-MAX_STATE_IDS:]
             
-            if last_month > first_month * 1.2:
-                insights.append(Insight(
-                    insight_type="trend_increasing",
-                    description=f"Spending increased from Rs.{first_month:.2f} to Rs.{last_month:.2f} over time",
-                    severity="high"
-                ))
-            elif last_month < first_month * 0.8:
-                insights.append(Insight(
-                    insight_type="trend_decreasing",
-                    description=f"Spending decreased from Rs.{first_month:.2f} to Rs.{last_month:.2f} - great progress!",
-                    severity="low"
-                ))
-        
-        return insights
+            if merchant in small_positions:
+                agg.small_count += int(small_stats.at[merchant, 'count'])
+                agg.small_total += float(small_stats.at[merchant, 'sum'])
+                agg.small_transaction_ids = (agg.small_transaction_ids + small_ids[small_positions[merchant]].tolist())[-MAX_STATE_IDS:]
+        
+        # Calendar sums
+        for day, total in amounts.groupby(ctx.dates).sum().items():
+            day = day.date()
+            state.daily_totals[day] = state.daily_totals.get(day, 0.0) + float(total)
+        for weekday, total in amounts.groupby(ctx.weekday).sum().items():
+            state.weekday_totals[int(weekday)] = state.weekday_totals.get(int(weekday), 0.0) + float(total)
+        for month, total in amounts.groupby(ctx.month).sum().items():
+            state.monthly_totals[str(month)] = state.monthly_totals.get(str(month), 0.0) + float(total)
+        
+        return state
+
+    def _update_income_state(self, state: AnalyticsState, ctx: AnalysisContext):
+        """
+        Adds income counts, distinct amounts and per-month sums to the state.
+        """
+        months = _month_ordinals(ctx.df['date'])
+        first, last = int(months.min()), int(months.max())
+        if state.first_month is None or first < _month_ordinal(state.first_month):
+            state.first_month = _month_key(first)
+        if state.last_month is None or last > _month_ordinal(state.last_month):
+            state.last_month = _month_key(last)
+        
+        income_df = ctx.df[ctx.is_income]
+        if income_df.empty:
+            return
+        
+        amounts = income_df['amount']
+        state.income_count += len(amounts)
+        # Only "at most two distinct amounts" matters, so three are enough to remember
+        for amount in amounts.dropna().unique():
+            if len(state.income_amounts) >= 3:
+                break
+            if float(amount) not in state.income_amounts:
+                state.income_amounts.append(float(amount))
+        if amounts.notna().any():
+            low, high = float(amounts.min()), float(amounts.max())
+            state.income_min = low if state.income_min is None else min(state.income_min, low)
+            state.income_max = high if state.income_max is None else max(state.income_max, high)
+        
+        monthly = amounts.groupby(_month_ordinals(income_df['date'])).agg(['sum', 'size'])
+        for month, total, count in zip(monthly.index, monthly['sum'], monthly['size']):
+            key = _month_key(int(month))
+            state.income_monthly_totals[key] = state.income_monthly_totals.get(key, 0.0) + float(total)
+            state.income_monthly_counts[key] = state.income_monthly_counts.get(key, 0) + int(count)
+
+    def analyze_state(self, state: AnalyticsState) -> AnalysisResult:
+        """
+        Derives the same AnalysisResult that analyze() gives on the full history,
+        from the aggregates alone. Insights list at most the latest MAX_STATE_IDS
+        transaction IDs per merchant.
+        """
+        if state.transactions_count == 0:
+            return self._empty_result()
+        
+        insights = []
+        
+        merchants = pd.DataFrame.from_dict(
+            {name: agg.model_dump(exclude={'transaction_ids', 'small_transaction_ids'}) for name, agg in state.merchants.items()},
+            orient='index',
+            columns=['count', 'total', 'min', 'max', 'first', 'missing', 'small_count', 'small_total']
+        ).sort_index()
+        
+        leaks = merchants.loc[merchants['small_count'] > 0, ['small_count', 'small_total']]
+        leaks.columns = ['count', 'total']
+        insights.extend(self._spend_leak_insights(leaks, lambda m: list(state.merchants[m].small_transaction_ids)))
+        
+        weekend_days = [day for day in state.daily_totals if day.weekday() >= 5]
+        insights.extend(self._weekend_insights(
+            weekend_spend=state.weekday_totals.get(5, 0.0) + state.weekday_totals.get(6, 0.0),
+            weekday_spend=sum(total for weekday, total in state.weekday_totals.items() if weekday < 5),
+            weekend_days=len(weekend_days),
+            weekday_days=len(state.daily_totals) - len(weekend_days)
+        ))
+        
+        stats = merchants[['count', 'min', 'max', 'first', 'missing']].assign(
+            sum=merchants['total'],
+            mean=merchants['total'] / merchants['count']
+        )
+        insights.extend(self._subscription_insights(stats, lambda m: list(state.merchants[m].transaction_ids)))
+        
+        by_cat = pd.DataFrame({
+            'sum': pd.Series(state.category_totals, dtype=float),
+            'count': pd.Series(state.category_counts, dtype=int)
+        }).sort_index()
+        insights.extend(self._category_spike_insights(by_cat))
+        
+        monthly = pd.Series(state.monthly_totals, dtype=float).sort_index()
+        insights.extend(self._trend_insights(monthly))
+        
+        return AnalysisResult(
+            insights=insights,
+            spending_by_category={category: state.category_totals[category] for category in by_cat.index},
+            fixed_expenses_total=state.fixed_expenses_total,
+            variable_expenses_total=state.variable_expenses_total,
+            total_income=state.total_income,
+            total_expense=state.total_expense,
+            income_profile=self._income_profile(
+                count=state.income_count,
+                distinct=len(state.income_amounts),
+                low=state.income_min,
+                high=state.income_max,
+                mean=state.total_income / state.income_count if state.income_count else 0.0,
+                monthly={_month_ordinal(key): total for key, total in state.income_monthly_totals.items()},
+                max_monthly_count=max(state.income_monthly_counts.values(), default=0),
+                first_month=_month_ordinal(state.first_month) if state.first_month else 0,
+                last_month=_month_ordinal(state.last_month) if state.last_month else 0
+            )
+        )
+
+    def save_state(self, state: AnalyticsState, path: str):
+        """
+        Writes the state to disk as JSON.
+        """
+        with open(path, 'w') as f:
+            f.write(state.model_dump_json())
+
+    def load_state(self, path: str) -> AnalyticsState:
+        """
+        Reads a state previously written by save_state.
+        """
+        with open(path, 'r') as f:
+            return AnalyticsState.model_validate_json(f.read())
@@ -1,18 +1,159 @@
-from typing import List, Dict
+import re
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Any, List, Dict, Optional, Tuple, Union
 from core.schemas import Transaction, Category
+from core.frame import TransactionFrame
+from core.matcher import KeywordMatcher, MatchPriority
 from core.utils import setup_logger
 
 logger = setup_logger("categorization_agent")
 
+class _VersionedDict(dict):
+    """
+    dict that counts its own mutations, so edits are noticed without rehashing the contents.
+    """
+    version = 0
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version += 1
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        super().clear()
+        self.version += 1
+
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        self.version += 1
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self.version += 1
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.version += 1
+
 class CategorizationAgent:
     """
     Agent 2: Categorization + Fixed/Variable Classification
     Responsibility: Assign categories and classify as fixed/variable.
     """
 
-    def __init__(self):
+    def __init__(self, match_priority: MatchPriority = "earliest", cache_size: int = 10_000):
+        self.match_priority = match_priority
+        # Bounded LRU memo: normalized "merchant description" text -> resolved categorization.
+        # Only List[Transaction] input goes through it; frames are matched once per distinct
+        # text in categorize_columns, which needs no memo across calls
+        self.cache_size = cache_size
+        self._memo: "OrderedDict[str, Tuple[str, bool, float, bool]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        # Guards the memo and rule recompilation when one agent serves several threads
+        self._lock = threading.RLock()
+        self._rules = None
         self.categories = self._load_categories()
         self.rules = self._load_rules()
+        self._default_fingerprint = self._rules_fingerprint
+
+    def config(self) -> Dict[str, Any]:
+        """
+        Constructor settings that change results, by parameter name. The rules and
+        categories are not settings; see has_default_rules.
+        """
+        return {"match_priority": self.match_priority}
+
+    @property
+    def rules(self) -> Dict[str, str]:
+        return self._rules
+
+    @rules.setter
+    def rules(self, rules: Dict[str, str]):
+        self._rules = _VersionedDict(rules)
+        self._compile_rules()
+
+    @property
+    def categories(self) -> Dict[str, Category]:
+        return self._categories
+
+    @categories.setter
+    def categories(self, categories: Dict[str, Category]):
+        # Replace a Category to change it: edits inside one are not tracked
+        self._categories = _VersionedDict(categories)
+        if self._rules is not None:
+            self._compile_rules()
+
+    def _rules_version(self) -> Tuple[int, int, int, int]:
+        return id(self._rules), self._rules.version, id(self._categories), self._categories.version
+
+    def _compile_rules(self):
+        """
+        Builds the keyword automaton and drops memoized results from the previous rule set.
+        """
+        self.matcher = KeywordMatcher(self._rules, priority=self.match_priority)
+        # Single alternation for batch mode. At the leftmost match position the regex engine
+        # takes the first alternative that fits, so longest-first gives "earliest" priority.
+        keywords = sorted((k for k in self._rules if k), key=len, reverse=True)
+        self._pattern = re.compile("(" + "|".join(re.escape(k) for k in keywords) + ")") if keywords else None
+        self._rules_fingerprint = self._fingerprint_rules()
+        self._compiled_version = self._rules_version()
+        self.clear_cache()
+
+    def _fingerprint_rules(self) -> int:
+        # Built with hash(), which is salted per process for strings: the value is only ever
+        # compared with _default_fingerprint of the same agent and must not be persisted.
+        # The result cache key hashes the rules themselves (OrchestratorAgent._version_fingerprint).
+        return hash((
+            frozenset(self._rules.items()),
+            frozenset((name, cat.cat_type) for name, cat in self._categories.items())
+        ))
+
+    def _ensure_rules_current(self):
+        # Picks up edits to self.rules or self.categories (dict mutations bump their version)
+        if self._rules_version() != self._compiled_version:
+            with self._lock:
+                if self._rules_version() != self._compiled_version:
+                    logger.info("Categorization rules changed, rebuilding matcher and clearing cache")
+                    self._compile_rules()
+
+    def has_default_rules(self) -> bool:
+        """
+        True while rules, category types and match priority are still the built-in ones.
+        """
+        self._ensure_rules_current()
+        return self.match_priority == "earliest" and self._rules_fingerprint == self._default_fingerprint
+
+    def cache_info(self) -> Dict[str, int]:
+        """
+        Returns statistics of the memo used for List[Transaction] input.
+        """
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "size": len(self._memo),
+            "maxsize": self.cache_size
+        }
+
+    def clear_cache(self):
+        with self._lock:
+            self._memo.clear()
+            self._hits = 0
+            self._misses = 0
 
     def _load_categories(self) -> Dict[str, Category]:
         """
@@ -43,45 +184,125 @@ class CategorizationAgent:
                 rules[keyword.lower()] = cat_name
         return rules
 
-    def categorize(self, transactions: List[Transaction]) -> List[Transaction]:
+    def categorize(self, transactions: Union[TransactionFrame, List[Transaction]]) -> Union[TransactionFrame, List[Transaction]]:
         """
-        Categorizes a list of transactions.
+        Categorizes a TransactionFrame (column-wise) or a list of transactions.
         """
         logger.info(f"Categorizing {len(transactions)} transactions...")
+        self._ensure_rules_current()
+        
+        if isinstance(transactions, TransactionFrame):
+            return self._categorize_frame(transactions)
         
         for txn in transactions:
             self._categorize_single(txn)
             
         return transactions
 
-    def _categorize_single(self, txn: Transaction):
+    def _categorize_frame(self, frame: TransactionFrame) -> TransactionFrame:
         """
-        Categorizes a single transaction.
+        Categorizes every row of a frame and writes the results back as columns.
         """
-        text = (txn.merchant + " " + txn.description).lower()
+        df = frame.df
+        result = self.categorize_columns(df['merchant'], df['description'])
         
-        # Rule-based matching
-        best_match = None
+        df['category'] = result['category']
+        df['is_fixed'] = result['is_fixed']
+        df['confidence_score'] = result['confidence_score']
+        # Income override applied as a mask
+        if result['is_income'].any():
+            df.loc[result['is_income'], 'type'] = "income"
+        
+        return frame
+
+    def categorize_columns(self, merchants: pd.Series, descriptions: pd.Series) -> Dict[str, np.ndarray]:
+        """
+        Batch mode: categorizes whole merchant/description columns at once.
+        
+        Returns arrays keyed by 'category', 'is_fixed', 'confidence_score' and 'is_income'.
+        Work is done once per distinct text; no per-row Python objects are touched.
+        """
+        self._ensure_rules_current()
+        merchants = pd.Series(merchants, dtype=object).reset_index(drop=True)
+        descriptions = pd.Series(descriptions, dtype=object).reset_index(drop=True)
+        texts = (merchants + " " + descriptions).str.lower()
+        codes, uniques = pd.factorize(texts)
+        uniques = pd.Series(uniques, dtype=object)
+        
+        if self._pattern is None:
+            keywords = pd.Series([np.nan] * len(uniques), dtype=object)
+        elif self.match_priority == "earliest":
+            keywords = uniques.str.extract(self._pattern, expand=False)
+        else:
+            # Longest-match priority cannot be expressed as one regex; use the automaton per distinct text
+            keywords = uniques.map(lambda text: (self.matcher.find_match(text) or (None, None))[1])
+        
+        unique_categories = keywords.map(self._rules)
+        cat_types = unique_categories.map({name: cat.cat_type for name, cat in self.categories.items()})
+        matched = unique_categories.notna().to_numpy()
         
-        # Simple keyword matching
-        for keyword, cat_name in self.rules.items():
-            if keyword in text:
-                best_match = cat_name
-                break # First match wins for now (can be improved)
+        categories = unique_categories.where(unique_categories.notna(), "Uncategorized").to_numpy(dtype=object)
+        is_fixed = (cat_types == "fixed").to_numpy()
+        is_income = (cat_types == "income").to_numpy()
+        confidence = np.where(matched, 0.9, 0.0)
+        
+        return {
+            'category': categories[codes],
+            'is_fixed': is_fixed[codes],
+            'confidence_score': confidence[codes],
+            'is_income': is_income[codes]
+        }
+
+    def _match_category(self, text: str) -> Optional[str]:
+        """
+        Returns the category name of the winning keyword match, if any.
+        One linear scan of the text, whatever the number of rules.
+        """
+        return self.matcher.find(text)
+
+    def _resolve(self, text: str) -> Tuple[str, bool, float, bool]:
+        """
+        Returns (category, is_fixed, confidence, is_income) for a normalized text, memoized.
+        """
+        memo = self._memo
+        with self._lock:
+            result = memo.get(text)
+            if result is not None:
+                self._hits += 1
+                memo.move_to_end(text)
+                return result
+            self._misses += 1
+        
+        # Rule-based matching
+        best_match = self._match_category(text)
         
         if best_match:
             cat = self.categories[best_match]
-            txn.category = cat.name
-            txn.is_fixed = (cat.cat_type == "fixed")
-            txn.confidence_score = 0.9 # High confidence for keyword match
-            
-            # Special case for income
-            if cat.cat_type == "income":
-                txn.txn_type = "income"
-                txn.is_fixed = False # Income isn't usually "fixed expense"
+            # High confidence for keyword match; income isn't usually "fixed expense"
+            result = (cat.name, cat.cat_type == "fixed", 0.9, cat.cat_type == "income")
         else:
-            txn.category = "Uncategorized"
-            txn.is_fixed = False
-            txn.confidence_score = 0.0
+            result = ("Uncategorized", False, 0.0, False)
+        
+        if self.cache_size > 0:
+            with self._lock:
+                memo[text] = result
+                if len(memo) > self.cache_size:
+                    memo.popitem(last=False)
+        return result
+
+    def _categorize_single(self, txn: Transaction):
+        """
+        Categorizes a single transaction.
+        """
+        text = (txn.merchant + " " + txn.description).lower()
+        
+        category, is_fixed, confidence, is_income = self._resolve(text)
+        txn.category = category
+        txn.is_fixed = is_fixed
+        txn.confidence_score = confidence
+        
+        # Special case for income
+        if is_income:
+            txn.txn_type = "income"
             
         # Fallback: If amount is exactly same as previous month's same merchant? (Not implemented yet)
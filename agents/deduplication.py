@@ -0,0 +1,271 @@
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+from typing import Any, Dict, List, Tuple
+from core.schemas import DedupReport, SeenKeys
+from core.frame import TransactionFrame, day_numbers
+from core.utils import setup_logger
+
+logger = setup_logger("deduplication_agent")
+
+CONTENT_COLUMNS = ['date', 'amount', 'type', 'merchant', 'description']
+
+def _day_number(day: date) -> int:
+    return (day - date(1970, 1, 1)).days
+
+def _from_day_number(number: int) -> date:
+    return date(1970, 1, 1) + timedelta(days=int(number))
+
+class DeduplicationAgent:
+    """
+    Agent 1b: Deduplication
+    Responsibility: Drop transactions repeated across overlapping statements before categorization.
+    """
+
+    def __init__(self, near_window_days: int = 1, seen_window_days: int = 92):
+        # Near duplicates may be dated up to this many days apart (posting vs transaction date)
+        self.near_window_days = near_window_days
+        # Days of history whose keys an incremental state keeps, i.e. the largest overlap
+        # between a new statement and the ones before it that is still recognized
+        self.seen_window_days = seen_window_days
+
+    def config(self) -> Dict[str, Any]:
+        """
+        Constructor settings that change results, by parameter name.
+        """
+        return {"near_window_days": self.near_window_days, "seen_window_days": self.seen_window_days}
+
+    def deduplicate(self, statements: List[TransactionFrame]) -> Tuple[TransactionFrame, DedupReport]:
+        """
+        Merges the statements and drops repeated transactions:
+
+        - exact duplicates: same id and same content, found with a hash join;
+          the first occurrence is kept
+        - near duplicates: same type, amount and merchant (case-insensitive) in different
+          statements, dated within near_window_days, matched one-to-one with a sort by
+          key and a sliding window over the sorted rows
+
+        Near matching never pairs rows of the same statement, where repeated identical
+        purchases are real. Runs in O(n log n) without pairwise comparison.
+        """
+        frames = [s for s in statements if len(s)]
+        if not frames:
+            return TransactionFrame.empty(), DedupReport()
+        df = frames[0].df if len(frames) == 1 else pd.concat([f.df for f in frames], ignore_index=True)
+        source = np.repeat(np.arange(len(frames)), [len(f) for f in frames])
+        n = len(df)
+
+        exact_of = self._exact_matches(df)
+        exact = exact_of != np.arange(n)
+        near_of = self._near_matches(df, source, ~exact) if len(frames) > 1 else np.full(n, -1)
+        near = near_of >= 0
+
+        # An exact duplicate of a row that was itself dropped as a near duplicate
+        # points at the row that row repeats
+        duplicate_of = np.where(near, near_of, exact_of)
+        chained = exact & near[exact_of]
+        duplicate_of[chained] = near_of[exact_of[chained]]
+
+        dropped = exact | near
+        ids = df['id'].to_numpy(dtype=object)
+        report = DedupReport(
+            input_rows=n,
+            exact_duplicates=int(exact.sum()),
+            near_duplicates=int(near.sum()),
+            dropped_ids=ids[dropped].tolist(),
+            duplicate_of=ids[duplicate_of[dropped]].tolist(),
+            reasons=np.where(exact[dropped], "exact", "near").tolist()
+        )
+        logger.info(f"Dropped {report.exact_duplicates} exact and {report.near_duplicates} near duplicates of {n} transactions")
+
+        if not dropped.any():
+            return (frames[0] if len(frames) == 1 else TransactionFrame(df)), report
+        return TransactionFrame(df[~dropped].reset_index(drop=True)), report
+
+    def deduplicate_batch(self, transactions: TransactionFrame,
+                          seen: SeenKeys) -> Tuple[TransactionFrame, DedupReport]:
+        """
+        Drops exact duplicates from one batch of a streamed statement: repeats within the
+        batch and rows whose key is in seen, the keys of earlier batches, and records the
+        keys of the kept rows in seen. A single statement has no near duplicates, so none
+        are looked for.
+
+        seen keeps keys per day for the last seen_window_days before the latest date
+        streamed so far, never the rows, so it is bounded by the rows of that window rather
+        than by the file. Files in date order are checked in full; rows of a later batch
+        dated before the window are kept unchecked, counted as unchecked_rows and logged.
+        """
+        n = len(transactions)
+        if not n:
+            return transactions, DedupReport()
+        df = transactions.df
+        repeated, in_history, unchecked, kept = self._check_seen(df, seen)
+        dropped = ~kept
+
+        ids = df['id'].to_numpy(dtype=object)
+        report = DedupReport(
+            input_rows=n,
+            exact_duplicates=int(dropped.sum()),
+            unchecked_rows=int(unchecked.sum()),
+            dropped_ids=ids[dropped].tolist(),
+            # An exact duplicate shares its id with the row it repeats
+            duplicate_of=ids[dropped].tolist(),
+            reasons=["exact"] * int(dropped.sum())
+        )
+        self._warn_unchecked(report, seen)
+        if not dropped.any():
+            return transactions, report
+        return TransactionFrame(df[kept].reset_index(drop=True)), report
+
+    def deduplicate_history(self, transactions: TransactionFrame,
+                            seen: SeenKeys) -> Tuple[TransactionFrame, DedupReport]:
+        """
+        Drops the rows of a new statement that repeat each other or whose exact key is in
+        seen, the history counted already, and records the keys of the kept rows in seen.
+
+        Keys are kept per day for the last seen_window_days of the history only, so seen
+        stays bounded. Rows dated before seen.since cannot be checked against the history:
+        they are kept (a backfilled or late-posted statement is usually new data), counted
+        as unchecked_rows and logged as a warning.
+        """
+        n = len(transactions)
+        if not n:
+            return transactions, DedupReport()
+        df = transactions.df
+        repeated, in_history, unchecked, kept = self._check_seen(df, seen)
+        dropped = ~kept
+
+        ids = df['id'].to_numpy(dtype=object)
+        report = DedupReport(
+            input_rows=n,
+            exact_duplicates=int(repeated.sum()),
+            seen_duplicates=int(in_history.sum()),
+            unchecked_rows=int(unchecked.sum()),
+            dropped_ids=ids[dropped].tolist(),
+            # An exact duplicate shares its id with the row it repeats
+            duplicate_of=ids[dropped].tolist(),
+            reasons=np.where(in_history[dropped], "seen", "exact").tolist()
+        )
+        logger.info(f"Dropped {report.exact_duplicates} repeated and {report.seen_duplicates} already counted of {n} transactions")
+        self._warn_unchecked(report, seen)
+        if not dropped.any():
+            return transactions, report
+        return TransactionFrame(df[kept].reset_index(drop=True)), report
+
+    def _check_seen(self, df: pd.DataFrame,
+                    seen: SeenKeys) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Rows repeating an earlier row of df, rows whose key is in seen, rows too old to be
+        checked against seen and the rows kept; the keys of the kept rows are added to seen.
+        """
+        n = len(df)
+        days = day_numbers(df['date'])
+        keys = self._exact_keys(df)
+        repeated = self._first_positions(keys) != np.arange(n)
+        history = np.sort(np.array([key for day_keys in seen.keys.values() for key in day_keys], dtype=np.int64).view(np.uint64))
+        # The history only holds days from seen.since on, so older rows never match here
+        in_history = self._in_sorted(keys, history) & ~repeated
+        kept = ~(repeated | in_history)
+        if seen.since is not None:
+            unchecked = (days < _day_number(seen.since)) & kept
+        else:
+            unchecked = np.zeros(n, dtype=bool)
+        if kept.any():
+            self._remember(seen, days[kept], keys[kept])
+        return repeated, in_history, unchecked, kept
+
+    def _warn_unchecked(self, report: DedupReport, seen: SeenKeys):
+        if report.unchecked_rows:
+            logger.warning(f"Kept {report.unchecked_rows} transactions dated before the duplicate check window without a check: "
+                           f"keys are kept for the last {self.seen_window_days} days only (now from {seen.since})")
+
+    def _remember(self, seen: SeenKeys, days: np.ndarray, keys: np.ndarray):
+        """
+        Adds keys to the per-day keys, then forgets the days that fell out of the window.
+        """
+        for day, day_keys in pd.Series(keys.view(np.int64)).groupby(days):
+            day = _from_day_number(day)
+            seen.keys[day] = seen.keys.get(day, []) + day_keys.unique().tolist()
+        since = max(seen.keys) - timedelta(days=self.seen_window_days - 1)
+        if seen.since is None or since > seen.since:
+            seen.since = since
+        seen.keys = {day: day_keys for day, day_keys in seen.keys.items() if day >= seen.since}
+
+    def _in_sorted(self, keys: np.ndarray, sorted_keys: np.ndarray) -> np.ndarray:
+        if not len(sorted_keys):
+            return np.zeros(len(keys), dtype=bool)
+        pos = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+        return sorted_keys[pos] == keys
+
+    def _exact_keys(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Hash of id and content for every row; equal keys are exact duplicates.
+        """
+        return pd.util.hash_pandas_object(df[['id'] + CONTENT_COLUMNS], index=False).to_numpy()
+
+    def _exact_matches(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Position of the first row with the same id and content, for every row (itself if first).
+        """
+        return self._first_positions(self._exact_keys(df))
+
+    def _first_positions(self, keys: np.ndarray) -> np.ndarray:
+        codes, _ = pd.factorize(keys)
+        # factorize numbers keys by first appearance, so return_index gives each key's first row
+        _, first = np.unique(codes, return_index=True)
+        return first[codes]
+
+    def _near_matches(self, df: pd.DataFrame, source: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        """
+        For each candidate row, the earlier-sorted row from another statement it repeats, or -1.
+        """
+        n = len(df)
+        result = np.full(n, -1)
+        rows = np.flatnonzero(candidates)
+        if len(rows) < 2:
+            return result
+
+        sub = df.iloc[rows]
+        group_keys = pd.DataFrame({
+            'type': sub['type'].to_numpy(dtype=object),
+            'merchant': sub['merchant'].str.lower().to_numpy(dtype=object),
+            'amount': np.round(sub['amount'].to_numpy(dtype=float), 2) + 0.0,
+        })
+        group, _ = pd.factorize(pd.util.hash_pandas_object(group_keys, index=False).to_numpy())
+        day = day_numbers(sub['date'])
+        src = source[rows]
+
+        # Sort by (group, day, statement); a row's window is every earlier row of its
+        # group dated at most near_window_days before it
+        order = np.lexsort((src, day, group))
+        g, d, s = group[order], day[order], src[order]
+        span = int(d.max() - d.min()) + self.near_window_days + 1
+        key = g.astype(np.int64) * span + (d - d.min())
+        start = np.searchsorted(key, key - self.near_window_days, side='left')
+
+        # Only rows whose window holds a row of another statement need the matching loop:
+        # the nearest such row is the one before the current same-statement run
+        positions = np.arange(len(order))
+        run_break = np.r_[True, (s[1:] != s[:-1]) | (g[1:] != g[:-1])]
+        run_start = np.maximum.accumulate(np.where(run_break, positions, 0))
+        candidate = run_start - 1 >= start
+
+        # One-to-one matching: each kept row absorbs at most one row per other statement,
+        # so two real purchases on consecutive days are not both matched to one row
+        s_list = s.tolist()
+        start_list = start.tolist()
+        matched = np.full(len(order), -1)
+        dropped = [False] * len(order)
+        absorbed = set()
+        for i in np.flatnonzero(candidate).tolist():
+            si = s_list[i]
+            for j in range(i - 1, start_list[i] - 1, -1):
+                if s_list[j] != si and not dropped[j] and (j, si) not in absorbed:
+                    dropped[i] = True
+                    matched[i] = j
+                    absorbed.add((j, si))
+                    break
+
+        hit = matched >= 0
+        result[rows[order[hit]]] = rows[order[matched[hit]]]
+        return result
@@ -1,38 +1,203 @@
+import io
+import os
 import pandas as pd
+import numpy as np
 import json
 import uuid
-from typing import List, Union
-from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+from datetime import date, datetime
 from core.schemas import Transaction
+from core.frame import ACCOUNT_COLUMN, TransactionFrame, content_ids
+from core.columnar import COLUMNAR_FORMATS, columnar_format, iter_columnar, read_columnar
 from core.utils import setup_logger
 
 logger = setup_logger("ingestion_agent")
 
+# Marks an absent id field, as opposed to an explicit null
+_ABSENT = object()
+
+def _is_blank(value) -> bool:
+    return value is None or value is pd.NA or (isinstance(value, float) and value != value) or (
+        isinstance(value, str) and not value.strip()
+    )
+
+def _is_date_value(value) -> bool:
+    # Already-typed dates from DataFrame or record sources; files only ever carry strings
+    return isinstance(value, (date, np.datetime64)) and not pd.isna(value)
+
 class IngestionAgent:
     """
     Agent 1: Ingestion & Normalization
     Responsibility: Parse raw transaction data and convert it into a standard format.
     """
 
-    def ingest(self, file_path: str) -> List[Transaction]:
+    def __init__(self, vectorized: bool = True, deterministic_ids: bool = True):
+        # When True, CSV frames are normalized a column at a time instead of row by row
+        self.vectorized = vectorized
+        # When True, records without an id get a content hash (see core.frame.content_ids)
+        # instead of a random UUID, so re-ingesting a statement reproduces its IDs
+        self.deterministic_ids = deterministic_ids
+
+    def config(self) -> Dict[str, Any]:
         """
-        Ingests data from a file (CSV or JSON) and returns a list of normalized Transactions.
+        Constructor settings that change results, by parameter name.
+        """
+        return {"vectorized": self.vectorized, "deterministic_ids": self.deterministic_ids}
+
+    def ingest(self, file_path: str, trusted: bool = False) -> TransactionFrame:
+        """
+        Ingests data from a file (CSV, JSON, Parquet or Arrow IPC, or a directory holding
+        a Parquet dataset) and returns the normalized transactions as a TransactionFrame.
+        Transaction objects are built only when the frame is indexed or iterated.
+        
+        trusted=True is for data written by our own pipeline (see _trusted_frame). Directories
+        are datasets written by export_parquet and always read that way, which keeps their
+        categories.
         """
         logger.info(f"Ingesting file: {file_path}")
         
         try:
             if file_path.endswith('.csv'):
-                return self._ingest_csv(file_path)
+                return self._assign_content_ids(self._ingest_csv(file_path, trusted))
             elif file_path.endswith('.json'):
-                return self._ingest_json(file_path)
+                return self._assign_content_ids(self._ingest_json(file_path, trusted))
+            elif columnar_format(file_path):
+                return self._assign_content_ids(self._normalize_csv_frame(
+                    read_columnar(file_path, columnar_format(file_path)), trusted or os.path.isdir(file_path)
+                ))
             else:
-                raise ValueError("Unsupported file format. Please use CSV or JSON.")
+                raise ValueError("Unsupported file format. Please use CSV, JSON, Parquet or Arrow.")
         except Exception as e:
             logger.error(f"Error ingesting file: {e}")
             raise
 
-    def _ingest_csv(self, file_path: str) -> List[Transaction]:
+    def ingest_columnar(self, source: Any, file_format: Optional[str] = None, start=None, end=None,
+                        trusted: bool = False) -> TransactionFrame:
+        """
+        Ingests a Parquet or Arrow IPC source (path, partitioned dataset directory, bytes or
+        file object) restricted to an inclusive [start, end] date range. Only the transaction
+        columns are read, and on typed date columns the range is applied during the scan
+        (see core.columnar.read_columnar), so months outside it are never decoded.
+        Directories are read trusted, as in ingest().
+        """
+        if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+            trusted = True
+        if file_format is None:
+            file_format = columnar_format(os.fspath(source)) if isinstance(source, (str, os.PathLike)) else None
+        if file_format is None:
+            raise ValueError("Columnar ingestion needs a Parquet or Arrow source, or file_format")
+        logger.info(f"Ingesting {file_format} source (dates {start or '-'} to {end or '-'})")
+        
+        try:
+            df = read_columnar(source, file_format, start=start, end=end)
+            return self._assign_content_ids(self._normalize_csv_frame(df, trusted))
+        except Exception as e:
+            logger.error(f"Error ingesting source: {e}")
+            raise
+
+    def ingest_bytes(self, data: bytes, file_format: str) -> TransactionFrame:
+        """
+        Ingests an in-memory file (e.g. an upload) without writing it to disk.
+        file_format is "csv" or "json", as the file extension would be.
+        """
+        return self.ingest_source(data, file_format)
+
+    def ingest_source(self, source: Any, file_format: Optional[str] = None, trusted: bool = False) -> TransactionFrame:
+        """
+        Ingests transactions from any supported source without a disk round trip:
+        
+        - a file path (format taken from the extension unless file_format is given)
+        - bytes, bytearray, memoryview or a readable file object, with file_format "csv", "json",
+          "parquet" or "arrow"
+        - a pandas DataFrame with the CSV columns (date, amount, type, merchant, description)
+        - a TransactionFrame, returned unchanged
+        - an iterable of dict records (or a {"transactions": [...]} envelope), normalized like JSON
+        
+        Buffers are handed to the parser directly and DataFrames are not copied.
+        trusted=True skips the per-record normalization, see _trusted_frame.
+        """
+        if isinstance(source, TransactionFrame):
+            return source
+        if isinstance(source, (str, os.PathLike)) and file_format is None:
+            return self.ingest(os.fspath(source), trusted)
+        
+        logger.info(f"Ingesting {type(source).__name__} source")
+        
+        try:
+            if isinstance(source, pd.DataFrame):
+                frame = self._normalize_csv_frame(source, trusted)
+            elif isinstance(source, (str, os.PathLike)):
+                with open(source, 'rb') as f:
+                    frame = self._ingest_buffer(f, file_format, trusted)
+            elif isinstance(source, (bytes, bytearray, memoryview)):
+                frame = self._ingest_buffer(io.BytesIO(source), file_format, trusted)
+            elif hasattr(source, 'read'):
+                frame = self._ingest_buffer(source, file_format, trusted)
+            elif isinstance(source, dict):
+                frame = self._normalize_json_records(self._unwrap_json(source), trusted)
+            elif isinstance(source, Iterable):
+                frame = self._normalize_json_records(source, trusted)
+            else:
+                raise TypeError(f"Unsupported transaction source: {type(source).__name__}")
+            return self._assign_content_ids(frame)
+        except Exception as e:
+            logger.error(f"Error ingesting source: {e}")
+            raise
+
+    def _ingest_buffer(self, buffer, file_format: Optional[str], trusted: bool = False) -> TransactionFrame:
+        file_format = (file_format or "").lower().lstrip('.')
+        if file_format == 'csv':
+            return self._normalize_csv_frame(pd.read_csv(buffer), trusted)
+        elif file_format == 'json':
+            return self._normalize_json_records(self._unwrap_json(json.load(buffer)), trusted)
+        elif file_format in COLUMNAR_FORMATS:
+            return self._normalize_csv_frame(read_columnar(buffer, file_format), trusted)
+        else:
+            raise ValueError("Unsupported file format. Please use CSV, JSON, Parquet or Arrow.")
+
+    def ingest_iter(self, file_path: str, chunk_size: int = 50_000) -> Iterator[TransactionFrame]:
+        """
+        Streams normalized transactions as TransactionFrames of at most chunk_size rows.
+        Peak memory is bounded by the chunk size rather than the file size.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be a positive integer")
+
+        logger.info(f"Streaming file: {file_path} (chunk_size={chunk_size})")
+
+        # Occurrence counts of identical rows carry over between chunks, so content IDs
+        # match those of a whole-file ingest
+        occurrences = {}
+        if file_path.endswith('.csv'):
+            with pd.read_csv(file_path, chunksize=chunk_size) as reader:
+                for chunk in reader:
+                    batch = self._normalize_csv_frame(chunk)
+                    if batch:
+                        yield self._assign_content_ids(batch, occurrences)
+        elif file_path.endswith('.json'):
+            batch = []
+            for item in self._iter_json_records(file_path):
+                txn = self._normalize_transaction(item)
+                if txn:
+                    batch.append(txn)
+                if len(batch) >= chunk_size:
+                    yield self._assign_content_ids(TransactionFrame.from_transactions(batch), occurrences)
+                    batch = []
+            if batch:
+                yield self._assign_content_ids(TransactionFrame.from_transactions(batch), occurrences)
+        elif columnar_format(file_path):
+            for chunk in iter_columnar(file_path, columnar_format(file_path), batch_size=chunk_size):
+                batch = self._normalize_csv_frame(chunk)
+                if batch:
+                    yield self._assign_content_ids(batch, occurrences)
+        else:
+            raise ValueError("Unsupported file format. Please use CSV, JSON, Parquet or Arrow.")
+
+    def _ingest_csv(self, file_path: str, trusted: bool = False) -> TransactionFrame:
         df = pd.read_csv(file_path)
+        return self._normalize_csv_frame(df, trusted)
+
+    def _normalize_csv_frame(self, df: pd.DataFrame, trusted: bool = False) -> TransactionFrame:
         transactions = []
         
         # Basic column mapping (can be enhanced with fuzzy matching or config)
@@ -42,29 +207,320 @@ class IngestionAgent:
         required_cols = ['date', 'amount', 'type', 'merchant', 'description']
         
         # Check if columns exist, if not try to map common variations
-        df.columns = [c.lower().strip() for c in df.columns]
+        # set_axis instead of assigning columns, so a caller's DataFrame is left untouched
+        df = df.set_axis([str(c).lower().strip() for c in df.columns], axis=1)
+
+        if trusted:
+            return self._trusted_frame(df)
+
+        if self.vectorized:
+            try:
+                return self._normalize_frame(df)
+            except Exception as e:
+                logger.warning(f"Vectorized normalization failed, falling back to row-by-row: {e}")
         
         for _, row in df.iterrows():
             txn = self._normalize_transaction(row)
             if txn:
                 transactions.append(txn)
                 
-        return transactions
+        return TransactionFrame.from_transactions(transactions)
 
-    def _ingest_json(self, file_path: str) -> List[Transaction]:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-            
-        if isinstance(data, dict) and 'transactions' in data:
-            data = data['transactions']
-            
+    def _ingest_json(self, file_path: str, trusted: bool = False) -> TransactionFrame:
+        return self._normalize_json_records(self._load_json_records(file_path), trusted)
+
+    def _normalize_json_records(self, data: Iterable[dict], trusted: bool = False) -> TransactionFrame:
+        if trusted:
+            records = list(data)
+            return self._trusted_frame(pd.DataFrame(records)) if records else TransactionFrame.empty()
+        
         transactions = []
         for item in data:
             # Convert dict to something _normalize_transaction can handle (like a dict or series)
             txn = self._normalize_transaction(item)
             if txn:
                 transactions.append(txn)
-        return transactions
+        return TransactionFrame.from_transactions(transactions)
+
+    def _iter_json_records(self, file_path: str, read_size: int = 1 << 16) -> Iterator:
+        """
+        Incrementally yields records from a JSON array or a {"transactions": [...]} envelope
+        without loading the whole document.
+        """
+        decoder = json.JSONDecoder()
+        with open(file_path, 'r') as f:
+            buf = ''
+            pos = 0
+            eof = False
+
+            def fill():
+                # Drops consumed text and appends the next block; returns False at end of file
+                nonlocal buf, pos, eof
+                chunk = f.read(read_size)
+                buf = buf[pos:] + chunk
+                pos = 0
+                eof = not chunk
+                return bool(chunk)
+
+            def peek():
+                # Returns the next non-whitespace character without consuming it
+                nonlocal pos
+                while True:
+                    while pos < len(buf) and buf[pos].isspace():
+                        pos += 1
+                    if pos < len(buf):
+                        return buf[pos]
+                    if not fill():
+                        return ''
+
+            def decode():
+                # Decodes one complete value; values must be followed by more text or EOF
+                nonlocal pos
+                peek()
+                while True:
+                    try:
+                        value, end = decoder.raw_decode(buf, pos)
+                        if end < len(buf) or eof:
+                            pos = end
+                            return value
+                    except json.JSONDecodeError:
+                        if eof:
+                            raise
+                    fill()
+
+            def expect(char):
+                nonlocal pos
+                if peek() != char:
+                    raise ValueError(f"Malformed JSON: expected '{char}' at offset {pos}")
+                pos += 1
+
+            first = peek()
+            if first == '{':
+                # Walk the top-level object until the transactions array is found
+                pos += 1
+                while True:
+                    if peek() == '}':
+                        return
+                    key = decode()
+                    expect(':')
+                    if key == 'transactions' and peek() == '[':
+                        break
+                    decode()
+                    if peek() == ',':
+                        pos += 1
+            elif first != '[':
+                # Not an array of records, fall back to the in-memory parser
+                yield from self._load_json_records(file_path)
+                return
+
+            expect('[')
+            while peek() not in (']', ''):
+                yield decode()
+                if peek() == ',':
+                    pos += 1
+
+    def _load_json_records(self, file_path: str) -> list:
+        with open(file_path, 'r') as f:
+            return self._unwrap_json(json.load(f))
+
+    @staticmethod
+    def _unwrap_json(data):
+        # Accepts a bare list of records or a {"transactions": [...]} envelope
+        if isinstance(data, dict) and 'transactions' in data:
+            data = data['transactions']
+        return data
+
+    def _normalize_frame(self, df: pd.DataFrame) -> TransactionFrame:
+        """
+        Normalizes a whole DataFrame column by column.
+        Mirrors _normalize_transaction exactly, including its fallbacks.
+        """
+        n = len(df)
+        if n == 0:
+            return TransactionFrame.empty()
+
+        # IDs
+        if 'id' in df.columns:
+            ids = np.array([self._format_id(v) for v in df['id'].tolist()], dtype=object)
+        else:
+            ids = np.array([self._format_id(_ABSENT) for _ in range(n)], dtype=object)
+
+        # Dates: parse the whole column once, unparseable or non-string values fall back to today
+        if 'date' in df.columns:
+            dates, rejected = self._parse_date_column(df['date'])
+        else:
+            dates, rejected = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]'), np.zeros(n, dtype=bool)
+        dates = dates.fillna(pd.Timestamp(datetime.now().date()))
+
+        # Amounts
+        amounts = self._parse_amount_column(df['amount']) if 'amount' in df.columns else np.zeros(n)
+
+        # Types: anything other than income/expense becomes an expense, negative amounts flipped
+        types = self._text_column(df, 'type', 'expense').str.lower()
+        invalid = ~types.isin(['income', 'expense']).to_numpy()
+        flip = invalid & (amounts < 0)
+        amounts[flip] = np.abs(amounts[flip])
+        types = types.where(~invalid, 'expense')
+
+        # Merchant and description cleaning
+        merchants = self._text_column(df, 'merchant', 'Unknown').str.strip()
+        descriptions = self._text_column(df, 'description', '').str.strip()
+        descriptions = descriptions.where(descriptions != '', merchants)
+
+        if rejected.any():
+            for _, row in df[rejected].iterrows():
+                logger.warning(f"Skipping malformed transaction: {row} - Error: unparseable date")
+            keep = ~rejected
+            ids, dates, amounts, types = ids[keep], dates[keep], amounts[keep], types[keep]
+            merchants, descriptions = merchants[keep], descriptions[keep]
+
+        return TransactionFrame.from_columns(
+            ids=ids,
+            dates=dates,
+            amounts=amounts,
+            types=types,
+            merchants=merchants,
+            descriptions=descriptions
+        )
+
+    def _trusted_frame(self, df: pd.DataFrame) -> TransactionFrame:
+        """
+        Builds a frame from records that already follow the Transaction schema, such as
+        backend syncs or re-loaded results. No per-record cleaning or fallbacks: the
+        columns are converted once and checked in a single batch by validate_columns,
+        which raises ValueError on any bad value instead of skipping the row.
+        Accepts Transaction field names (txn_date, txn_type) as well as the CSV ones,
+        and keeps category, is_fixed, confidence_score and the account column when present.
+        """
+        df = df.rename(columns={'txn_date': 'date', 'txn_type': 'type'})
+        missing = [c for c in ('id', 'date', 'amount', 'type', 'merchant', 'description') if c not in df.columns]
+        if missing:
+            raise ValueError(f"Trusted input is missing columns: {missing}")
+
+        def optional(name):
+            return df[name] if name in df.columns else None
+
+        frame = TransactionFrame.from_columns(
+            ids=df['id'].astype(str),
+            dates=pd.to_datetime(df['date'], errors='coerce'),
+            amounts=pd.to_numeric(df['amount'], errors='coerce'),
+            types=df['type'],
+            merchants=df['merchant'],
+            descriptions=df['description'],
+            categories=optional('category'),
+            is_fixed=optional('is_fixed'),
+            confidence_scores=optional('confidence_score'),
+            validate=True
+        )
+        if ACCOUNT_COLUMN in df.columns:
+            # Multi-account exports keep the statement each row came from
+            frame.df[ACCOUNT_COLUMN] = df[ACCOUNT_COLUMN].astype(object).to_numpy()
+        return frame
+
+    def _text_column(self, df: pd.DataFrame, name: str, default: str) -> pd.Series:
+        """
+        Returns a column as strings, matching str(row.get(name, default)).
+        """
+        if name not in df.columns:
+            return pd.Series([default] * len(df), index=df.index, dtype=object)
+        col = df[name]
+        if pd.api.types.is_string_dtype(col) and col.dtype != object:
+            return col.astype(object).where(col.notna(), 'nan')
+        return col.astype(object).map(str)
+
+    def _parse_date_column(self, col: pd.Series):
+        """
+        Parses a date column, each distinct string once.
+        Returns normalized timestamps (NaT where the value falls back to today) and a
+        mask of values that parsed to NaT, which the row-by-row path rejects as malformed.
+        """
+        rejected = np.zeros(len(col), dtype=bool)
+        if pd.api.types.is_datetime64_any_dtype(col):
+            # Typed column from a DataFrame source: keep the calendar day
+            if col.dt.tz is not None:
+                col = col.dt.tz_localize(None)
+            return col.dt.normalize().astype('datetime64[ns]'), rejected
+        
+        parsed = pd.Series(pd.NaT, index=col.index, dtype='datetime64[ns]')
+        if pd.api.types.is_string_dtype(col) and col.dtype != object:
+            is_str = col.notna().to_numpy()
+        else:
+            is_str = col.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+            is_date = col.map(_is_date_value).to_numpy(dtype=bool)
+            if is_date.any():
+                parsed[is_date] = pd.to_datetime(col[is_date].map(lambda v: pd.Timestamp(v).date()))
+        if not is_str.any():
+            return parsed, rejected
+
+        # Each distinct string is parsed on its own, exactly like the row-by-row path.
+        # A column-wide pd.to_datetime infers one format from the first value, so
+        # "13/02/2023" would make it read "01/02/2023" as 1 February rather than 2 January.
+        # Statements repeat few distinct dates, so this costs one parse per calendar day.
+        codes, uniques = pd.factorize(col[is_str])
+        values = [self._parse_date_value(v) for v in uniques.tolist()]
+        unique_rejected = np.array([v is pd.NaT for v in values], dtype=bool)
+        unique_stamps = pd.to_datetime(pd.Series(
+            [v if isinstance(v, date) else None for v in values], dtype=object
+        )).astype('datetime64[ns]')
+        rejected[is_str] = unique_rejected[codes]
+        parsed[is_str] = unique_stamps.to_numpy()[codes]
+        return parsed, rejected
+
+    @staticmethod
+    def _parse_date_value(raw_date: str):
+        try:
+            return pd.to_datetime(raw_date).date()
+        except:
+            return None
+
+    def _parse_amount_column(self, col: pd.Series) -> np.ndarray:
+        """
+        Cleans and converts an amount column in one pass.
+        """
+        if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+            return col.to_numpy(dtype=float, copy=True)
+
+        if not (pd.api.types.is_string_dtype(col) and col.dtype != object):
+            return np.array([self._parse_amount_value(v) for v in col.tolist()], dtype=float)
+
+        cleaned = col.str.replace(',', '', regex=False).str.replace('$', '', regex=False)
+        amounts = pd.to_numeric(cleaned, errors='coerce').to_numpy(dtype=float, copy=True)
+
+        # Values the vectorized parser rejected go through float() so fallbacks stay identical
+        residue = np.isnan(amounts) & col.notna().to_numpy()
+        if residue.any():
+            amounts[residue] = [self._parse_amount_value(v) for v in col[residue].tolist()]
+        return amounts
+
+    @staticmethod
+    def _parse_amount_value(raw_amount) -> float:
+        try:
+            return float(str(raw_amount).replace(',', '').replace('$', ''))
+        except:
+            return 0.0
+
+    def _format_id(self, raw_id) -> str:
+        """
+        Source id as a string. A missing id becomes a random UUID, or with deterministic_ids
+        an empty placeholder (blank and null ids included) that _assign_content_ids fills in.
+        """
+        if self.deterministic_ids:
+            return "" if raw_id is _ABSENT or _is_blank(raw_id) else str(raw_id)
+        return str(uuid.uuid4()) if raw_id is _ABSENT else str(raw_id)
+
+    def _assign_content_ids(self, frame: TransactionFrame, occurrences: Optional[dict] = None) -> TransactionFrame:
+        """
+        Replaces placeholder ids with content hashes, computed for the whole frame at once.
+        """
+        if not self.deterministic_ids or not frame:
+            return frame
+        df = frame.df
+        ids = df['id'].to_numpy(dtype=object)
+        missing = ids == ""
+        if missing.any() or occurrences is not None:
+            generated = content_ids(df, occurrences)
+            df['id'] = np.where(missing, generated, ids)
+        return frame
 
     def _normalize_transaction(self, row: Union[pd.Series, dict]) -> Transaction:
         """
@@ -72,7 +528,7 @@ class IngestionAgent:
         """
         try:
             # Generate ID if not present
-            txn_id = str(row.get('id', uuid.uuid4()))
+            txn_id = self._format_id(row.get('id', _ABSENT))
             
             # Date parsing
             raw_date = row.get('date')
@@ -82,6 +538,8 @@ class IngestionAgent:
                     date_obj = pd.to_datetime(raw_date).date()
                 except:
                     date_obj = datetime.now().date() # Fallback or error?
+            elif _is_date_value(raw_date):
+                date_obj = pd.Timestamp(raw_date).date()
             else:
                 date_obj = datetime.now().date()
 
@@ -1,79 +1,578 @@
-from typing import List, Dict, Any
-from datetime import datetime
-from agents.ingestion import IngestionAgent
-from agents.categorization import CategorizationAgent
-from agents.analytics import AnalyticsAgent
-from agents.recommendation import RecommendationAgent
-from core.schemas import Transaction, AgentLog, AnalysisResult, Recommendation
+from __future__ import annotations
+
+import os
+import glob
+import hashlib
+import importlib
+import inspect
+import json
+import threading
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, Deque, Iterator, List, Dict, Any, Optional, Union
+from core.schemas import Transaction, AgentLog, AnalysisResult, AnalyticsState, DedupReport, Recommendation, SeenKeys, TransferReport
+from core.cache import ResultCache, DEFAULT_CACHE_DIR, hash_bytes, hash_file
+from core.tracing import StageSpan, export_chrome_trace
 from core.utils import setup_logger
 
+if TYPE_CHECKING:
+    import pandas as pd
+    from core.frame import TransactionFrame
+
 logger = setup_logger("orchestrator_agent")
 
+# Dropped duplicates or matched transfers listed in a response; the counts always cover all of them
+MAX_REPORTED_ROWS = 100
+
+# Agents are imported and built on first use, so a cache hit or a CLI --help never loads pandas
+_LAZY_AGENTS = {
+    "ingestion_agent": ("agents.ingestion", "IngestionAgent"),
+    "deduplication_agent": ("agents.deduplication", "DeduplicationAgent"),
+    "transfer_agent": ("agents.transfers", "TransferAgent"),
+    "categorization_agent": ("agents.categorization", "CategorizationAgent"),
+    "analytics_agent": ("agents.analytics", "AnalyticsAgent"),
+    "recommendation_agent": ("agents.recommendation", "RecommendationAgent"),
+}
+
+@lru_cache(maxsize=1)
+def _code_fingerprint() -> str:
+    """
+    Hash of the agent and core sources, so cached results are dropped when the code changes.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(root, "agents", "*.py")) + glob.glob(os.path.join(root, "core", "*.py"))):
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+@lru_cache(maxsize=None)
+def _default_config(cls: type) -> Dict[str, Any]:
+    """
+    Constructor parameter defaults of an agent class, which is what config() returns
+    for an agent built without arguments (config() keys are parameter names).
+    """
+    parameters = inspect.signature(cls).parameters
+    return {name: p.default for name, p in parameters.items() if p.default is not inspect.Parameter.empty}
+
 class OrchestratorAgent:
     """
     Agent 5: Conversation & Orchestration Agent
     Responsibility: Coordinates all other agents and provides the final output.
     """
 
-    def __init__(self):
-        self.ingestion_agent = IngestionAgent()
-        self.categorization_agent = CategorizationAgent()
-        self.analytics_agent = AnalyticsAgent()
-        self.recommendation_agent = RecommendationAgent()
-        self.logs: List[AgentLog] = []
+    def __init__(self, use_cache: bool = True, cache_dir: Optional[str] = None,
+                 cache_max_bytes: int = 256 * 1024 * 1024, cache_ttl_seconds: Optional[float] = 7 * 24 * 3600,
+                 trace_memory: bool = False, log_history: int = 1000):
+        self._agents_lock = threading.Lock()
+        # Process-wide history, newest last; only the last log_history entries are kept.
+        # Each run also collects its own entries, which are what its response carries.
+        self.logs: Deque[AgentLog] = deque(maxlen=log_history)
+        self._logs_lock = threading.Lock()
+        self._local = threading.local()
+        # Exact per-stage allocation peaks via tracemalloc; slows the pipeline several times over
+        self.trace_memory = trace_memory
+        # Results of process() keyed by file content + rules/code version; use_cache=False opts out
+        self.cache: Optional[ResultCache] = None
+        if use_cache:
+            try:
+                self.cache = ResultCache(cache_dir or DEFAULT_CACHE_DIR, max_bytes=cache_max_bytes, ttl_seconds=cache_ttl_seconds)
+            except OSError as e:
+                logger.warning(f"Result cache disabled: {e}")
+
+    def __getattr__(self, name: str):
+        # Only called for attributes not yet set: builds the agent once and stores it on the instance
+        if name not in _LAZY_AGENTS:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        with self._agents_lock:
+            agent = self.__dict__.get(name)
+            if agent is None:
+                module_name, class_name = _LAZY_AGENTS[name]
+                agent = getattr(importlib.import_module(module_name), class_name)()
+                setattr(self, name, agent)
+        return agent
 
     def process(self, file_path: str) -> Dict[str, Any]:
         """
         Main orchestration method that coordinates all agents.
+        Safe to call from several threads at once on one instance.
+        
+        Args:
+            file_path: Path to transaction data file (CSV or JSON)
+            
+        Returns:
+            Complete analysis result with insights and recommendations
+        """
+        return self.process_source(file_path)
+
+    def process_bytes(self, data: bytes, file_format: str) -> Dict[str, Any]:
+        """
+        Same as process() for an in-memory file such as an upload, without a temp file.
+        
+        Args:
+            data: Raw file contents
+            file_format: "csv" or "json"
+            
+        Returns:
+            Complete analysis result with insights and recommendations
+        """
+        return self.process_source(data, file_format)
+
+    def process_source(self, source: Any, file_format: Optional[str] = None, trusted: bool = False,
+                       export_dir: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Runs the pipeline on any source IngestionAgent.ingest_source accepts: a path, bytes or a
+        file object with a declared format, a DataFrame, or an iterable of dict records.
+        
+        Paths and bytes are cached by content; other in-memory sources are always recomputed.
+        
+        Args:
+            source: Transaction data
+            file_format: "csv", "json", "parquet" or "arrow"; required for bytes and file objects
+            trusted: Source already follows the Transaction schema; skip per-record
+                normalization and validate the columns in one batch instead
+            export_dir: Also write the categorized transactions to this month-partitioned
+                Parquet dataset (see core.columnar.export_parquet); needs pyarrow
+            
+        Returns:
+            Complete analysis result with insights and recommendations
+        """
+        if isinstance(source, (str, os.PathLike)):
+            logger.info(f"Starting orchestration for file: {os.fspath(source)}")
+        else:
+            logger.info(f"Starting orchestration for {type(source).__name__} source")
+        
+        with self._run():
+            return self._process_source(source, file_format, trusted, export_dir)
+
+    def _process_source(self, source: Any, file_format: Optional[str] = None, trusted: bool = False,
+                        export_dir: Optional[str] = None) -> Dict[str, Any]:
+        try:
+            cache_key = self._cache_key(source, file_format, trusted)
+            # An export needs the categorized transactions, which the cache does not hold
+            cached = self._cached_result(cache_key) if export_dir is None else None
+            if cached is not None:
+                return cached
+            
+            # Step 1: Ingestion
+            with self._stage("IngestionAgent", "Parsing and normalizing transaction data") as stage:
+                transactions = self.ingestion_agent.ingest_source(source, file_format, trusted)
+                stage.complete(f"Processed {len(transactions)} transactions", rows_out=len(transactions))
+            
+            result = self._run_pipeline([transactions], cache_key, export_dir)
+            logger.info("Orchestration completed successfully")
+            return result
+            
+        except Exception as e:
+            logger.error(f"Orchestration failed: {e}")
+            raise
+
+    def process_sources(self, sources: List[Any], file_format: Optional[str] = None, trusted: bool = False,
+                        accounts: Optional[List[str]] = None, export_dir: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Analyzes several statements together, e.g. overlapping monthly statements or exports
+        of multiple accounts. Transactions repeated across statements are counted once, and
+        money moved between the accounts is paired up and left out of income and spending.
+        
+        Args:
+            sources: Statements, each anything process_source accepts
+            file_format: "csv" or "json" for sources without a file extension
+            trusted: See process_source
+            accounts: Account of each source; by default every source is its own account.
+                Statements of the same account never pair up as transfers
+            export_dir: See process_source
+            
+        Returns:
+            Complete analysis result over the merged statements
+        """
+        logger.info(f"Starting orchestration for {len(sources)} sources")
+        
+        if accounts is None:
+            accounts = [str(i) for i in range(len(sources))]
+        elif len(accounts) != len(sources):
+            raise ValueError(f"Got {len(accounts)} accounts for {len(sources)} sources")
+        
+        with self._run():
+            try:
+                keys = [self._cache_key(source, file_format, trusted) for source in sources]
+                cache_key = None
+                if keys and all(key is not None for key in keys):
+                    cache_key = hashlib.sha256(
+                        ("sources:" + ",".join(keys) + "|accounts:" + ",".join(map(str, accounts))).encode()
+                    ).hexdigest()
+                cached = self._cached_result(cache_key) if export_dir is None else None
+                if cached is not None:
+                    return cached
+                
+                from core.frame import ACCOUNT_COLUMN
+                
+                # Step 1: Ingestion, one frame per statement
+                with self._stage("IngestionAgent", f"Parsing and normalizing {len(sources)} statements") as stage:
+                    statements = [self.ingestion_agent.ingest_source(source, file_format, trusted) for source in sources]
+                    for statement, account in zip(statements, accounts):
+                        statement.df[ACCOUNT_COLUMN] = str(account)
+                    total = sum(len(statement) for statement in statements)
+                    stage.complete(f"Processed {total} transactions from {len(statements)} statements", rows_out=total)
+                
+                result = self._run_pipeline(statements, cache_key, export_dir)
+                logger.info("Orchestration completed successfully")
+                return result
+                
+            except Exception as e:
+                logger.error(f"Orchestration failed: {e}")
+                raise
+
+    def _run_pipeline(self, statements: List[TransactionFrame], cache_key: Optional[str] = None,
+                      export_dir: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Steps 2-8 on ingested statements; stores the response under cache_key if given
+        and writes the categorized transactions to export_dir if given.
+        """
+        if not any(statements):
+            logger.warning("No transactions found in file")
+            return self._empty_result()
+        
+        # Step 2: Deduplication
+        transactions, dedup = self._deduplicate(statements)
+        
+        # Step 3: Categorization (skipped for re-loaded results, e.g. a Parquet export)
+        with self._stage("CategorizationAgent", "Categorizing transactions", rows_in=len(transactions)) as stage:
+            if transactions.df['category'].notna().all():
+                categorized_transactions = transactions
+                stage.complete(f"Kept the categories of {len(transactions)} categorized transactions", rows_out=len(transactions))
+            else:
+                categorized_transactions = self.categorization_agent.categorize(transactions)
+                stage.complete(f"Categorized {len(categorized_transactions)} transactions", rows_out=len(categorized_transactions))
+        
+        # Step 4: Transfer matching (after categorization, which may turn expenses into income)
+        with self._stage("TransferAgent", "Matching transfers between accounts", rows_in=len(categorized_transactions)) as stage:
+            categorized_transactions, transfers = self.transfer_agent.match(categorized_transactions)
+            stage.complete(f"Matched {transfers.matched_pairs} transfers", rows_out=2 * transfers.matched_pairs)
+        
+        # Step 5: Parquet export
+        if export_dir is not None:
+            from core.columnar import export_parquet
+            with self._stage("ParquetExport", f"Writing transactions to {export_dir}", rows_in=len(categorized_transactions)) as stage:
+                months = export_parquet(categorized_transactions.df, export_dir)
+                stage.complete(f"Wrote {len(months)} monthly partitions", rows_out=len(categorized_transactions))
+        
+        # Step 6: Analytics
+        with self._stage("AnalyticsAgent", "Analyzing patterns and behaviors", rows_in=len(categorized_transactions)) as stage:
+            analysis = self.analytics_agent.analyze(categorized_transactions)
+            stage.complete(f"Generated {len(analysis.insights)} insights", rows_out=len(analysis.insights))
+        
+        # Step 7: Recommendations
+        with self._stage("RecommendationAgent", "Generating personalized recommendations", rows_in=len(categorized_transactions)) as stage:
+            recommendations = self.recommendation_agent.generate_recommendations(analysis, categorized_transactions)
+            stage.complete(f"Generated {len(recommendations)} recommendations", rows_out=len(recommendations))
+        
+        # Step 8: Assemble final result
+        result = self._build_response(
+            transactions=categorized_transactions,
+            analysis=analysis,
+            recommendations=recommendations,
+            dedup=dedup,
+            transfers=transfers
+        )
+        
+        if cache_key is not None:
+            self.cache.put(cache_key, result)
+        
+        return result
+
+    def process_stream(self, file_path: str, chunk_size: int = 50_000) -> Dict[str, Any]:
+        """
+        Streaming variant of process() for very large statements.
+        
+        Each batch is ingested, deduplicated, categorized and folded into a running
+        AnalyticsState, then dropped. What outlives a batch is the state, the exact-duplicate
+        keys of the last seen_window_days streamed (see DeduplicationAgent.deduplicate_batch)
+        and the rows of the last few days, which the immediate-action recommendation looks
+        at; memory does not grow with the length of the file.
         
         Args:
             file_path: Path to transaction data file (CSV or JSON)
+            chunk_size: Maximum number of rows parsed at once
             
         Returns:
             Complete analysis result with insights and recommendations
         """
-        logger.info(f"Starting orchestration for file: {file_path}")
+        logger.info(f"Starting streaming orchestration for file: {file_path}")
+        
+        with self._run():
+            return self._process_stream(file_path, chunk_size)
+
+    def _process_stream(self, file_path: str, chunk_size: int) -> Dict[str, Any]:
+        from core.frame import TransactionFrame
+        from agents.recommendation import RECENT_DAYS
+        try:
+            state = AnalyticsState()
+            dedup = DedupReport()
+            seen = SeenKeys()
+            recent = TransactionFrame.empty()
+            confidence_total = 0.0
+            batches = 0
+            
+            # Steps 1-4: Ingestion, deduplication, categorization and analytics, one batch at a time
+            with self._stage("IngestionAgent", f"Streaming transaction data in chunks of {chunk_size}") as stage:
+                for batch in self.ingestion_agent.ingest_iter(file_path, chunk_size=chunk_size):
+                    batch, batch_dedup = self.deduplication_agent.deduplicate_batch(batch, seen)
+                    self._merge_dedup(dedup, batch_dedup)
+                    batch = self.categorization_agent.categorize(batch)
+                    self.analytics_agent.update_state(state, batch)
+                    if len(batch):
+                        confidence_total += self._frame_confidence_total(batch.df)
+                        recent = self._recent_rows(TransactionFrame.concat([recent, batch]), RECENT_DAYS)
+                    batches += 1
+                stage.complete(f"Processed {dedup.input_rows} transactions in {batches} batches", rows_out=dedup.input_rows)
+            self._log("DeduplicationAgent", "Completed",
+                      f"Dropped {dedup.exact_duplicates} exact and {dedup.near_duplicates} near duplicates")
+            self._log("CategorizationAgent", "Completed", f"Categorized {dedup.output_rows} transactions")
+            
+            if not dedup.input_rows:
+                logger.warning("No transactions found in file")
+                return self._empty_result()
+            
+            # Analytics from the folded state
+            with self._stage("AnalyticsAgent", "Analyzing patterns and behaviors", rows_in=dedup.output_rows) as stage:
+                analysis = self.analytics_agent.analyze_state(state)
+                stage.complete(f"Generated {len(analysis.insights)} insights", rows_out=len(analysis.insights))
+            
+            # Step 5: Recommendations
+            with self._stage("RecommendationAgent", "Generating personalized recommendations", rows_in=len(recent)) as stage:
+                recommendations = self.recommendation_agent.generate_recommendations(analysis, recent)
+                stage.complete(f"Generated {len(recommendations)} recommendations", rows_out=len(recommendations))
+            
+            # Step 6: Assemble final result
+            result = self._build_response(
+                transactions=recent,
+                analysis=analysis,
+                recommendations=recommendations,
+                dedup=dedup,
+                confidence=round(confidence_total / dedup.output_rows, 2)
+            )
+            result["data"]["transactions_count"] = dedup.output_rows
+            
+            logger.info("Streaming orchestration completed successfully")
+            return result
+            
+        except Exception as e:
+            logger.error(f"Streaming orchestration failed: {e}")
+            raise
+
+    def _merge_dedup(self, total: DedupReport, batch: DedupReport):
+        """
+        Adds a batch's dedup counts to total; dropped rows are kept only up to what the response lists.
+        """
+        total.input_rows += batch.input_rows
+        total.exact_duplicates += batch.exact_duplicates
+        total.near_duplicates += batch.near_duplicates
+        total.seen_duplicates += batch.seen_duplicates
+        total.unchecked_rows += batch.unchecked_rows
+        room = MAX_REPORTED_ROWS - len(total.dropped_ids)
+        total.dropped_ids.extend(batch.dropped_ids[:room])
+        total.duplicate_of.extend(batch.duplicate_of[:room])
+        total.reasons.extend(batch.reasons[:room])
+
+    def _recent_rows(self, transactions: TransactionFrame, days: int) -> TransactionFrame:
+        """
+        The rows dated within the last `days` days of the latest transaction.
+        """
+        import pandas as pd
+        from core.frame import TransactionFrame
+        dates = transactions.df['date']
+        keep = (dates >= dates.max() - pd.Timedelta(days=days - 1)).to_numpy()
+        if keep.all():
+            return transactions
+        return TransactionFrame(transactions.df[keep].reset_index(drop=True))
+
+    def process_incremental(self, file_path: str, state_path: str) -> Dict[str, Any]:
+        """
+        Adds a new statement to a saved analytics state and analyzes the combined history.
+        
+        Only the new file is ingested and categorized; totals and patterns for earlier
+        statements come from the state file, which is created on first use and rewritten
+        after every call. Transactions the state has already counted, e.g. from an
+        overlapping or re-uploaded statement, are dropped (see DeduplicationAgent.deduplicate_history).
         
+        Args:
+            file_path: Path to the new transaction data file (CSV or JSON)
+            state_path: Path to the analytics state JSON
+            
+        Returns:
+            Analysis result over all statements seen so far
+        """
+        logger.info(f"Starting incremental orchestration for file: {file_path}")
+        
+        with self._run():
+            return self._process_incremental(file_path, state_path)
+
+    def _process_incremental(self, file_path: str, state_path: str) -> Dict[str, Any]:
         try:
+            state = self.analytics_agent.load_state(state_path) if os.path.exists(state_path) else AnalyticsState()
+            
             # Step 1: Ingestion
-            self._log("IngestionAgent", "Starting", "Parsing and normalizing transaction data")
-            transactions = self.ingestion_agent.ingest(file_path)
-            self._log("IngestionAgent", "Completed", f"Processed {len(transactions)} transactions")
+            with self._stage("IngestionAgent", "Parsing and normalizing transaction data") as stage:
+                transactions = self.ingestion_agent.ingest(file_path)
+                stage.complete(f"Processed {len(transactions)} transactions", rows_out=len(transactions))
             
-            if not transactions:
+            if not transactions and state.transactions_count == 0:
                 logger.warning("No transactions found in file")
                 return self._empty_result()
             
+            # Duplicates within the new statement and of transactions the state already counted
+            with self._stage("DeduplicationAgent", "Removing transactions already in the history",
+                             rows_in=len(transactions)) as stage:
+                transactions, dedup = self.deduplication_agent.deduplicate_history(transactions, state.seen)
+                stage.complete(f"Dropped {dedup.exact_duplicates} repeated and {dedup.seen_duplicates} already counted",
+                               rows_out=len(transactions))
+            
             # Step 2: Categorization
-            self._log("CategorizationAgent", "Starting", "Categorizing transactions")
-            categorized_transactions = self.categorization_agent.categorize(transactions)
-            self._log("CategorizationAgent", "Completed", f"Categorized {len(categorized_transactions)} transactions")
+            with self._stage("CategorizationAgent", "Categorizing transactions", rows_in=len(transactions)) as stage:
+                categorized_transactions = self.categorization_agent.categorize(transactions)
+                stage.complete(f"Categorized {len(categorized_transactions)} transactions", rows_out=len(categorized_transactions))
             
-            # Step 3: Analytics
-            self._log("AnalyticsAgent", "Starting", "Analyzing patterns and behaviors")
-            analysis = self.analytics_agent.analyze(categorized_transactions)
-            self._log("AnalyticsAgent", "Completed", f"Generated {len(analysis.insights)} insights")
+            # Step 3: Analytics over the running state
+            with self._stage("AnalyticsAgent", f"Updating state of {state.transactions_count} transactions",
+                             rows_in=len(categorized_transactions)) as stage:
+                analysis = self.analytics_agent.analyze_incremental(state, categorized_transactions)
+                self.analytics_agent.save_state(state, state_path)
+                stage.complete(f"Generated {len(analysis.insights)} insights", rows_out=len(analysis.insights))
             
-            # Step 4: Recommendations
-            self._log("RecommendationAgent", "Starting", "Generating personalized recommendations")
-            recommendations = self.recommendation_agent.generate_recommendations(analysis, categorized_transactions)
-            self._log("RecommendationAgent", "Completed", f"Generated {len(recommendations)} recommendations")
+            # Step 4: Recommendations (income profile covers the whole history)
+            with self._stage("RecommendationAgent", "Generating personalized recommendations", rows_in=len(categorized_transactions)) as stage:
+                recommendations = self.recommendation_agent.generate_recommendations(analysis, categorized_transactions)
+                stage.complete(f"Generated {len(recommendations)} recommendations", rows_out=len(recommendations))
             
             # Step 5: Assemble final result
             result = self._build_response(
                 transactions=categorized_transactions,
                 analysis=analysis,
-                recommendations=recommendations
+                recommendations=recommendations,
+                dedup=dedup
             )
+            result["data"]["transactions_count"] = state.transactions_count
             
-            logger.info("Orchestration completed successfully")
+            logger.info("Incremental orchestration completed successfully")
             return result
             
         except Exception as e:
-            logger.error(f"Orchestration failed: {e}")
+            logger.error(f"Incremental orchestration failed: {e}")
+            raise
+
+    def _deduplicate(self, statements: List[TransactionFrame]):
+        rows_in = sum(len(statement) for statement in statements)
+        with self._stage("DeduplicationAgent", "Removing duplicate transactions", rows_in=rows_in) as stage:
+            transactions, dedup = self.deduplication_agent.deduplicate(statements)
+            stage.complete(
+                f"Dropped {dedup.exact_duplicates} exact and {dedup.near_duplicates} near duplicates",
+                rows_out=len(transactions)
+            )
+        return transactions, dedup
+
+    def _version_fingerprint(self) -> str:
+        """
+        Identifies everything besides the input that determines a result: agent code,
+        any agent that is not the default one (another class or other settings) and the
+        live categorization rules.
+        """
+        settings = {}
+        for name, (module_name, class_name) in _LAZY_AGENTS.items():
+            agent = self.__dict__.get(name)
+            if agent is None:
+                # Built on first use with the defaults, which the code fingerprint covers
+                continue
+            cls = type(agent)
+            config = agent.config() if hasattr(agent, "config") else {}
+            defaults = _default_config(cls)
+            if (cls.__module__, cls.__name__) != (module_name, class_name) or any(
+                    key not in defaults or defaults[key] != value for key, value in config.items()):
+                settings[name] = [f"{cls.__module__}.{cls.__qualname__}", config]
+        agent = self.__dict__.get("categorization_agent")
+        if agent is not None and not agent.has_default_rules():
+            settings["rules"] = sorted(agent.rules.items())
+            settings["categories"] = sorted((name, cat.cat_type) for name, cat in agent.categories.items())
+        if not settings:
+            return _code_fingerprint() + "defaults"
+        settings = json.dumps(settings, sort_keys=True, default=repr)
+        return _code_fingerprint() + hashlib.sha256(settings.encode()).hexdigest()
+
+    def _cache_key(self, source: Any, file_format: Optional[str] = None, trusted: bool = False) -> Optional[str]:
+        """
+        Content hash for paths and raw bytes; None for sources that are not cached.
+        A file and bytes with the same content and format share a key.
+        """
+        if self.cache is None:
+            return None
+        suffix = "." + file_format.lower().lstrip('.') if file_format else None
+        # Trusted ingestion can differ from normal ingestion on the same bytes
+        version = self._version_fingerprint() + ("trusted" if trusted else "")
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return hash_bytes(source, suffix or "", version)
+        if isinstance(source, (str, os.PathLike)):
+            try:
+                return hash_file(os.fspath(source), version, suffix)
+            except OSError:
+                # Missing/unreadable files surface through ingestion as before
+                return None
+        return None
+
+    def _cached_result(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if cache_key is None:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            self._log("OrchestratorAgent", "Cache hit", f"Reusing stored result {cache_key[:12]}")
+            cached["logs"] = self._format_logs()
+        return cached
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss statistics of the result cache (empty when caching is disabled).
+        """
+        return self.cache.stats() if self.cache is not None else {}
+
+    @contextmanager
+    def _run(self) -> Iterator[List[AgentLog]]:
+        """
+        Opens a log context for one pipeline run on the calling thread.
+        """
+        entries: List[AgentLog] = []
+        self._local.run = entries
+        try:
+            yield entries
+        finally:
+            self._local.run = None
+            self._local.last_run = entries
+
+    def run_logs(self) -> List[AgentLog]:
+        """
+        Log entries of the run in progress on the calling thread, or of its most recent run.
+        """
+        run = getattr(self._local, "run", None)
+        if run is None:
+            run = getattr(self._local, "last_run", None)
+        return run if run is not None else []
+
+    @contextmanager
+    def _stage(self, agent_name: str, description: str, rows_in: Optional[int] = None) -> Iterator[StageSpan]:
+        """
+        Times one pipeline stage. Logs "Starting", then "Completed" with the span's
+        details and metrics, or "Failed" with the error before re-raising.
+        """
+        self._log(agent_name, "Starting", description)
+        span = StageSpan(rows_in=rows_in, trace_memory=self.trace_memory)
+        try:
+            with span:
+                yield span
+        except Exception as e:
+            self._log(agent_name, "Failed", str(e), span)
             raise
+        self._log(agent_name, "Completed", span.details, span)
 
-    def _log(self, agent_name: str, action: str, details: str):
+    def _log(self, agent_name: str, action: str, details: str, span: Optional[StageSpan] = None):
         """
         Logs agent actions for traceability.
         """
@@ -82,17 +581,48 @@ class OrchestratorAgent:
             action=action,
             details=details
         )
-        self.logs.append(log_entry)
-        logger.info(f"[{agent_name}] {action}: {details}")
+        if span is not None:
+            log_entry.duration_ms = span.wall_ms
+            log_entry.cpu_ms = span.cpu_ms
+            log_entry.rows_in = span.rows_in
+            log_entry.rows_out = span.rows_out
+            log_entry.memory_peak_delta_kb = span.memory_peak_delta_kb
+            logger.info(f"[{agent_name}] {action}: {details} ({span.wall_ms:.1f} ms wall, {span.cpu_ms:.1f} ms CPU)")
+        else:
+            logger.info(f"[{agent_name}] {action}: {details}")
+        run = getattr(self._local, "run", None)
+        if run is not None:
+            run.append(log_entry)
+        with self._logs_lock:
+            self.logs.append(log_entry)
+
+    def log_history(self) -> List[AgentLog]:
+        """
+        Snapshot of the process-wide log ring buffer, oldest first.
+        """
+        with self._logs_lock:
+            return list(self.logs)
+
+    def export_trace(self, path: str, logs: Optional[List[AgentLog]] = None):
+        """
+        Writes the timed stages of the calling thread's latest run as a Chrome
+        trace-event JSON file, viewable in chrome://tracing or Perfetto.
+        Pass logs (e.g. log_history()) to export something else.
+        """
+        export_chrome_trace(self.run_logs() if logs is None else logs, path)
 
-    def _build_response(self, transactions: List[Transaction], 
+    def _build_response(self, transactions: Union[TransactionFrame, List[Transaction]], 
                        analysis: AnalysisResult, 
-                       recommendations: List[Recommendation]) -> Dict[str, Any]:
+                       recommendations: List[Recommendation],
+                       dedup: Optional[DedupReport] = None,
+                       transfers: Optional[TransferReport] = None,
+                       confidence: Optional[float] = None) -> Dict[str, Any]:
         """
         Builds the final structured response.
         """
-        # Calculate confidence score
-        confidence = self._calculate_confidence(transactions, analysis)
+        # Calculate confidence score, unless the caller accumulated it already
+        if confidence is None:
+            confidence = self._calculate_confidence(transactions, analysis)
         
         # Build natural language summary
         summary = self._generate_summary(analysis, recommendations)
@@ -109,7 +639,10 @@ class OrchestratorAgent:
                 "savings_rate": (analysis.total_income - analysis.total_expense) / analysis.total_income if analysis.total_income > 0 else 0,
                 "fixed_expenses": analysis.fixed_expenses_total,
                 "variable_expenses": analysis.variable_expenses_total,
-                "spending_by_category": analysis.spending_by_category
+                "spending_by_category": analysis.spending_by_category,
+                "income_profile": analysis.income_profile.model_dump(),
+                "deduplication": self._format_dedup(dedup or DedupReport()),
+                "transfers": self._format_transfers(transfers or TransferReport())
             },
             "insights": [
                 {
@@ -129,25 +662,70 @@ class OrchestratorAgent:
                 }
                 for rec in recommendations
             ],
-            "logs": [
-                {
-                    "agent": log.agent_name,
-                    "action": log.action,
-                    "details": log.details,
-                    "timestamp": log.timestamp.isoformat()
-                }
-                for log in self.logs
+            "logs": self._format_logs()
+        }
+
+    def _format_dedup(self, dedup: DedupReport) -> Dict[str, Any]:
+        return {
+            "input_rows": dedup.input_rows,
+            "exact_duplicates": dedup.exact_duplicates,
+            "near_duplicates": dedup.near_duplicates,
+            "seen_duplicates": dedup.seen_duplicates,
+            "unchecked_rows": dedup.unchecked_rows,
+            "dropped": [
+                {"id": txn_id, "duplicate_of": kept_id, "reason": reason}
+                for txn_id, kept_id, reason in zip(
+                    dedup.dropped_ids[:MAX_REPORTED_ROWS],
+                    dedup.duplicate_of[:MAX_REPORTED_ROWS],
+                    dedup.reasons[:MAX_REPORTED_ROWS]
+                )
+            ]
+        }
+
+    def _format_transfers(self, transfers: TransferReport) -> Dict[str, Any]:
+        return {
+            "matched_pairs": transfers.matched_pairs,
+            "total_amount": transfers.total_amount,
+            "pairs": [
+                {"outgoing_id": outgoing_id, "incoming_id": incoming_id, "amount": amount}
+                for outgoing_id, incoming_id, amount in zip(
+                    transfers.outgoing_ids[:MAX_REPORTED_ROWS],
+                    transfers.incoming_ids[:MAX_REPORTED_ROWS],
+                    transfers.amounts[:MAX_REPORTED_ROWS]
+                )
             ]
         }
 
-    def _calculate_confidence(self, transactions: List[Transaction], 
+    def _format_logs(self) -> List[Dict[str, Any]]:
+        formatted = []
+        for log in self.run_logs():
+            entry = {
+                "agent": log.agent_name,
+                "action": log.action,
+                "details": log.details,
+                "timestamp": log.timestamp.isoformat(),
+                "thread_id": log.thread_id
+            }
+            # Stage metrics only on timed entries
+            for key in ("duration_ms", "cpu_ms", "rows_in", "rows_out", "memory_peak_delta_kb"):
+                value = getattr(log, key)
+                if value is not None:
+                    entry[key] = round(value, 3) if isinstance(value, float) else value
+            formatted.append(entry)
+        return formatted
+
+    def _calculate_confidence(self, transactions: Union[TransactionFrame, List[Transaction]], 
                              analysis: AnalysisResult) -> float:
         """
         Calculates overall confidence score based on data quality.
         """
-        if not transactions:
+        if len(transactions) == 0:
             return 0.0
         
+        from core.frame import TransactionFrame
+        if isinstance(transactions, TransactionFrame):
+            return self._calculate_frame_confidence(transactions.df)
+        
         # Factors affecting confidence:
         # 1. How many transactions are categorized?
         categorized_count = sum(1 for t in transactions if t.category and t.category != "Uncategorized")
@@ -165,6 +743,22 @@ class OrchestratorAgent:
         
         return round(confidence, 2)
 
+    def _calculate_frame_confidence(self, df: pd.DataFrame) -> float:
+        """
+        Same weighting as _calculate_confidence, computed on frame columns.
+        """
+        return round(self._frame_confidence_total(df) / len(df), 2)
+
+    def _frame_confidence_total(self, df: pd.DataFrame) -> float:
+        """
+        Sum of the per-row confidence, so batches can be added up before dividing.
+        """
+        categorized = (df['category'].notna() & (df['category'] != "Uncategorized")).sum()
+        confidence_sum = df['confidence_score'].sum()
+        complete = ((df['merchant'] != "") & (df['description'] != "")).sum()
+        
+        return float(categorized * 0.4 + confidence_sum * 0.4 + complete * 0.2)
+
     def _generate_summary(self, analysis: AnalysisResult, 
                          recommendations: List[Recommendation]) -> str:
         """
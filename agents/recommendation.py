@@ -1,9 +1,15 @@
+import pandas as pd
 from typing import List
 from core.schemas import Recommendation, AnalysisResult, Insight
+from core.frame import TransactionFrame
+from core.timeindex import DateIndex
 from core.utils import setup_logger
 
 logger = setup_logger("recommendation_agent")
 
+# Days looked at by the immediate-action check, ending on the last transaction date
+RECENT_DAYS = 3
+
 class RecommendationAgent:
     """
     Agent 4: Financial Recommendation + Coaching
@@ -13,13 +19,17 @@ class RecommendationAgent:
     def generate_recommendations(self, analysis: AnalysisResult, transactions: List = None) -> List[Recommendation]:
         """
         Generates personalized recommendations based on analytics.
+        Of the transactions, only the last RECENT_DAYS days are read.
         """
         logger.info("Generating recommendations...")
         
         recommendations = []
         
-        # Detect income type (fixed vs variable)
-        income_type = self._detect_income_type(transactions) if transactions else "unknown"
+        # Day index is built once and shared by every windowed rule
+        date_index = DateIndex(self._as_frame(transactions))
+        
+        # Income type (fixed vs variable) comes from the profile computed during analytics
+        income_type = analysis.income_profile.income_type
         logger.info(f"Detected income type: {income_type}")
         
         # Analyze insights and create recommendations
@@ -55,7 +65,7 @@ class RecommendationAgent:
                     recommendations.append(rec)
         
         # Check for immediate recent spending issues (Last 3 days)
-        rec = self._recommend_immediate_action(transactions, analysis, income_type)
+        rec = self._recommend_immediate_action(date_index, analysis, income_type)
         if rec:
             recommendations.append(rec)
 
@@ -72,29 +82,21 @@ class RecommendationAgent:
         # Return all, but Orchestrator/UI will decide how many to show
         return recommendations
 
-    def _recommend_immediate_action(self, transactions: List, analysis: AnalysisResult, income_type: str) -> Recommendation:
+    def _recommend_immediate_action(self, date_index: DateIndex, analysis: AnalysisResult, income_type: str) -> Recommendation:
         """
         Analyzes the last 3 days of transactions to provide immediate, urgent advice.
         """
-        if not transactions:
+        if not len(date_index):
             return None
             
-        # Find the "current" date (simulated as last transaction date)
-        import pandas as pd
-        from datetime import timedelta
-        
-        dates = [pd.to_datetime(t.txn_date) for t in transactions]
-        last_date = max(dates)
-        three_days_ago = last_date - timedelta(days=3)
+        # The "current" date is simulated as the last transaction date
+        recent_df = date_index.trailing(RECENT_DAYS, txn_type="expense")
         
-        # Filter recent transactions
-        recent_txns = [t for t in transactions if pd.to_datetime(t.txn_date) > three_days_ago and t.txn_type == "expense"]
-        
-        if not recent_txns:
+        if recent_df.empty:
             return None
             
         # Calculate recent spending
-        recent_total = sum(t.amount for t in recent_txns)
+        recent_total = recent_df['amount'].sum()
         
         # Calculate daily average allowance (Income - Fixed Expenses) / 30
         disposable_income = analysis.total_income - analysis.fixed_expenses_total
@@ -105,11 +107,8 @@ class RecommendationAgent:
         
         if recent_total > threshold and daily_budget > 0:
             # Identify top category in recent spending
-            cat_totals = {}
-            for t in recent_txns:
-                cat_totals[t.category] = cat_totals.get(t.category, 0) + t.amount
-            
-            top_cat, top_amt = max(cat_totals.items(), key=lambda x: x[1])
+            cat_totals = date_index.spend_by_category(RECENT_DAYS)
+            top_cat, top_amt = cat_totals.idxmax(), cat_totals.max()
             
             # Generate urgent recommendation
             excess = recent_total - (daily_budget * 3)
@@ -148,232 +147,15 @@ Based on your income, your 'safe' daily spending limit is around Rs.{daily_budge
         return None
 
 
-    def _detect_income_type(self, transactions) -> str:
-        """
-        Detects if user has fixed (salaried) or variable (freelance/business) income.
-        
-        Returns:
-            "fixed" - Regular salaried income
-            "variable" - Irregular/freelance income
-            "unknown" - Cannot determine
-        """
-        if not transactions:
-            return "unknown"
-        
-        # Filter income transactions
-        income_txns = [t for t in transactions if t.txn_type == "income"]
-        
-        if len(income_txns) < 2:
-            return "unknown"
-        
-        # Check for regularity in amounts
-        amounts = [t.amount for t in income_txns]
-        unique_amounts = set(amounts)
-        
-        # If all income amounts are same or very similar (within 10% variance)
-        if len(unique_amounts) <= 2:
-            amount_variance = (max(amounts) - min(amounts)) / (sum(amounts) / len(amounts)) if amounts else 0
-            
-            if amount_variance < 0.1:  # Less than 10% variance
-                return "fixed"
-        
-        # Check for regular monthly income pattern
-        from collections import Counter
-        import pandas as pd
-        
-        dates = [pd.to_datetime(t.txn_date) for t in income_txns]
-        monthly_counts = Counter([d.to_period('M') for d in dates])
-        
-        # If consistent monthly income (1-2 transactions per month)
-        if all(1 <= count <= 2 for count in monthly_counts.values()):
-            return "fixed"
-        
-        # Otherwise assume variable income
-        return "variable"
-
-    def _recommend_savings_improvement(self, savings_rate: float, analysis: AnalysisResult, income_type: str) -> Recommendation:
-        """
-        Generate highly personalized savings improvement recommendation based on income type.
-        Uses conversational tone and specific examples from user's spending.
-        """
-        # Get actual spending breakdown
-        spending_breakdown = self._create_spending_breakdown(analysis)
-        
-        # Calculate 50/30/20 amounts
-        income = analysis.total_income
-        needs_budget = income * 0.5
-        wants_budget = income * 0.3
-        savings_budget = income * 0.2
-        
-        if income_type == "fixed":
-            # Salaried employee - detailed, conversational advice
-            title = "Let's Build Your Savings Together (You Have a Steady Salary!)"
-            
-            description = f"""I see you're saving {savings_rate*100:.1f}% right now. Here's the thing - with your regular monthly income of Rs.{income:,.0f}, you have a huge advantage: predictability! Let's use that to automatically grow your wealth.
-
-Here's what I noticed about your spending:
-{spending_breakdown}
-
-The goal? Get to at least 20% savings (that's Rs.{savings_budget:,.0f}/month). But let's be realistic - we'll do this step by step."""
-            
-            actionable_steps = [
-                f"DAY 1: Set up auto-transfer of Rs.{income * 0.05:,.0f} (just 5%!) to savings on salary day. You won't even miss it.",
-                
-                f"THE 50/30/20 CHECK: Here is what your budget SHOULD look like:",
-                f"   - NEEDS (50% = Rs.{needs_budget:,.0f}): Rent, Groceries, Utilities, EMI. (You spent Rs.{analysis.fixed_expenses_total:,.0f})",
-                f"   - WANTS (30% = Rs.{wants_budget:,.0f}): Dining, Shopping, Netflix. (You spent Rs.{analysis.variable_expenses_total:,.0f})",
-                f"   - SAVINGS (20% = Rs.{savings_budget:,.0f}): SIPs, Emergency Fund.",
-                
-                f"WEEK 1: Review your 'Wants'. Can you cut Rs.{analysis.variable_expenses_total * 0.1:,.0f} from {self._get_top_variable_categories(analysis)}?",
-                
-                "MONTH 2: Increase auto-transfer by 2%. Keep doing this until you hit 20%.",
-                
-                f"START A SIP: Even Rs. 1,000/month in a mutual fund SIP compounds to lakhs over 10 years."
-            ]
-            
-            rationale = """Listen, I know it's tempting to spend when you get that salary. But here's what successful savers do: they pay themselves FIRST (that auto-transfer), then spend what's left. Your future self will thank you - whether it's for emergencies, a house down payment, or just peace of mind."""
-            
-            estimated_savings = (0.2 - savings_rate) * income if income > 0 else 0
-            
-        elif income_type == "variable":
-            # Freelancer/gig worker - practical, buffer-focused advice
-            title = "Building Your Safety Net (Freelancer Edition!)"
-            
-            # Calculate average and volatility
-            income_avg = analysis.total_income
-            
-            description = f"""Okay, fellow freelancer! I see your income isn't fixed, which means you need a different game plan. Right now you're saving {savings_rate*100:.1f}%, but here's the scary truth: one slow month could wipe that out.
-
-Your current situation:
-- Income this period: Rs.{income:,.0f}
-- Expenses: Rs.{analysis.total_expense:,.0f}
-{spending_breakdown}
-
-Here's what you NEED: a 6-month emergency fund. Why? Because your income varies. Some months you'll earn double, some months maybe nothing. The fund smooths out the bumps."""
-            
-            actionable_steps = [
-                f"IMMEDIATELY: Put 40% of EVERY payment into a separate 'safety account'. That's Rs.{income_avg * 0.4:,.0f} from your current income. Treat it like it doesn't exist.",
-                
-                f"CALCULATE YOUR 'SURVIVAL NUMBER': Your fixed costs (rent, utilities, etc.) are Rs.{analysis.fixed_expenses_total:,.0f}/month. You need 6x that = Rs.{analysis.fixed_expenses_total * 6:,.0f} in emergency fund. This is your goal.",
-                
-                "LIVE ON YOUR WORST MONTH: Look at your lowest-earning month ever. Budget as if that's your income EVERY month. Everything above that? Straight to savings.",
-                
-                f"VARIABLE EXPENSES ({self._get_top_variable_categories(analysis)}): These are your 'flex' categories - Rs.{analysis.variable_expenses_total:,.0f}/month. Cut these FIRST in slow months.",
-                
-                "GOOD MONTH? Bank it. Don't increase lifestyle. Your bad months will come - be ready."
-            ]
-            
-            rationale = """Look, I've seen too many freelancers live like they earn their best month every month. Then one dry spell and they're scrambling. You're smarter than that. Build that buffer NOW while money is coming in. Think of it as paying your future self a salary during lean times."""
-            
-            estimated_savings = (0.35 - savings_rate) * income if income > 0 else 0
-            
-        else:
-            # Unknown income type - still make it friendly
-            title = "Let's Get Your Money Working For You"
-            
-            description = f"""Currently saving {savings_rate*100:.1f}% of income. Financial experts recommend 20% minimum, but let me break down what that actually means for YOU:
-
-{spending_breakdown}"""
-            
-            actionable_steps = [
-                "Automate it: Set up auto-transfer of 10% to savings right after income comes in",
-                f"Your variable expenses (Rs.{analysis.variable_expenses_total:,.0f}): Find Rs.{analysis.variable_expenses_total * 0.1:,.0f} to cut", 
-                f"THE 50/30/20 RULE: Aim for Needs Rs.{needs_budget:,.0f}, Wants Rs.{wants_budget:,.0f}, Savings Rs.{savings_budget:,.0f}."
-            ]
-            
-            rationale = "Small changes now = big results later. Start with 10%, increase gradually."
-            estimated_savings = (0.2 - savings_rate) * income if income > 0 else 0
-            
-        return Recommendation(
-            title=title,
-            description=description,
-            actionable_steps=actionable_steps,
-            estimated_savings=estimated_savings,
-            rationale=rationale
-        )
-    
-    def _create_spending_breakdown(self, analysis: AnalysisResult) -> str:
-        """Creates a personalized spending breakdown in plain language."""
-        breakdown = []
-        
-        # Fixed expenses
-        if analysis.fixed_expenses_total > 0:
-            fixed_pct = (analysis.fixed_expenses_total / analysis.total_expense * 100) if analysis.total_expense > 0 else 0
-            breakdown.append(f"- Fixed costs (rent, utilities, etc.): Rs.{analysis.fixed_expenses_total:,.0f} ({fixed_pct:.0f}% of spending)")
-        
-        # Variable expenses with top categories
-        if analysis.variable_expenses_total > 0:
-            var_pct = (analysis.variable_expenses_total / analysis.total_expense * 100) if analysis.total_expense > 0 else 0
-            breakdown.append(f"- Variable spending (food, shopping, etc.): Rs.{analysis.variable_expenses_total:,.0f} ({var_pct:.0f}% of spending)")
-        
-        # Top spending category
-        if analysis.spending_by_category:
-            top_cat, top_amt = max(analysis.spending_by_category.items(), key=lambda x: x[1])
-            if top_cat not in ['Rent', 'Salary']:
-                breakdown.append(f"- Your biggest expense? {top_cat} at Rs.{top_amt:,.0f}")
-        
-        return "\n".join(breakdown) if breakdown else "- Analyzing your spending patterns..."
-    
-    def _get_top_variable_categories(self, analysis: AnalysisResult) -> str:
-        """Returns top 3 variable spending categories as comma-separated string."""
-        if not analysis.spending_by_category:
-            return "dining, shopping, entertainment"
-        
-        # Exclude fixed categories
-        fixed_cats = ['Rent', 'Utilities', 'Insurance', 'Education']
-        variable = {k: v for k, v in analysis.spending_by_category.items() if k not in fixed_cats}
-        
-        if not variable:
-            return "dining, shopping, entertainment"
-        
-        top_3 = sorted(variable.items(), key=lambda x: x[1], reverse=True)[:3]
-        return ", ".join([cat.lower() for cat, _ in top_3])
-        
-        # Limit to top 3 recommendations
-        return recommendations[:3]
-
-    def _detect_income_type(self, transactions) -> str:
+    def _as_frame(self, transactions) -> pd.DataFrame:
         """
-        Detects if user has fixed (salaried) or variable (freelance/business) income.
-        
-        Returns:
-            "fixed" - Regular salaried income
-            "variable" - Irregular/freelance income
-            "unknown" - Cannot determine
+        Accepts a TransactionFrame, an analytics-style DataFrame or a list of Transactions.
         """
-        if not transactions:
-            return "unknown"
-        
-        # Filter income transactions
-        income_txns = [t for t in transactions if t.txn_type == "income"]
-        
-        if len(income_txns) < 2:
-            return "unknown"
-        
-        # Check for regularity in amounts
-        amounts = [t.amount for t in income_txns]
-        unique_amounts = set(amounts)
-        
-        # If all income amounts are same or very similar (within 10% variance)
-        if len(unique_amounts) <= 2:
-            amount_variance = (max(amounts) - min(amounts)) / (sum(amounts) / len(amounts)) if amounts else 0
-            
-            if amount_variance < 0.1:  # Less than 10% variance
-                return "fixed"
-        
-        # Check for regular monthly income pattern
-        from collections import Counter
-        import pandas as pd
-        
-        dates = [pd.to_datetime(t.txn_date) for t in income_txns]
-        monthly_counts = Counter([d.to_period('M') for d in dates])
-        
-        # If consistent monthly income (1-2 transactions per month)
-        if all(1 <= count <= 2 for count in monthly_counts.values()):
-            return "fixed"
-        
-        # Otherwise assume variable income
-        return "variable"
+        if isinstance(transactions, TransactionFrame):
+            return transactions.analysis_view()
+        if isinstance(transactions, pd.DataFrame):
+            return transactions
+        return TransactionFrame.from_transactions(transactions or []).analysis_view()
 
     def _recommend_savings_improvement(self, savings_rate: float, analysis: AnalysisResult, income_type: str) -> Recommendation:
         """
@@ -399,7 +181,7 @@ The goal? Get to at least 20% savings (that's Rs.{analysis.total_income * 0.2:,.
                 
                 f"WEEK 1: Review your variable expenses (Rs.{analysis.variable_expenses_total:,.0f}). That's categories like {self._get_top_variable_categories(analysis)}. Can you cut 10% here? That's Rs.{analysis.variable_expenses_total * 0.1:,.0f}.",
                 
-                f"MONTH 2: Increase auto-transfer by 2% (Rs.{income * 0.02:,.0f}). Keep doing this until you hit 20%.",
+                f"MONTH 2: Increase auto-transfer by 2% (Rs.{analysis.total_income * 0.02:,.0f}). Keep doing this until you hit 20%.",
                 
                 "START A SIP: Even Rs. 1,000/month in a mutual fund SIP compounds to lakhs over 10 years. With your steady income, this is your wealth-building superpower.",
                 
@@ -431,7 +213,7 @@ Here's what you NEED: a 6-month emergency fund. Why? Because your income varies.
                 
                 f"CALCULATE YOUR 'SURVIVAL NUMBER': Your fixed costs (rent, utilities, etc.) are Rs.{analysis.fixed_expenses_total:,.0f}/month. You need 6x that = Rs.{analysis.fixed_expenses_total * 6:,.0f} in emergency fund. This is your goal.",
                 
-                "LIVE ON YOUR WORST MONTH: Look at your lowest-earning month ever. Budget as if that's your income EVERY month. Everything above that? Straight to savings.",
+                self._worst_month_step(analysis),
                 
                 f"VARIABLE EXPENSES ({self._get_top_variable_categories(analysis)}): These are your 'flex' categories - Rs.{analysis.variable_expenses_total:,.0f}/month. Cut these FIRST in slow months.",
                 
@@ -467,6 +249,16 @@ Here's what you NEED: a 6-month emergency fund. Why? Because your income varies.
             rationale=rationale
         )
     
+    def _worst_month_step(self, analysis: AnalysisResult) -> str:
+        """Budgeting step anchored on the lowest-earning month from the income profile."""
+        profile = analysis.income_profile
+        if profile.worst_month is None or len(profile.monthly_income) < 2:
+            return "LIVE ON YOUR WORST MONTH: Look at your lowest-earning month ever. Budget as if that's your income EVERY month. Everything above that? Straight to savings."
+        return (
+            f"LIVE ON YOUR WORST MONTH: Your lowest-earning month was {profile.worst_month} at Rs.{profile.worst_month_income:,.0f} "
+            f"(average Rs.{profile.average_monthly_income:,.0f}). Budget as if that's your income EVERY month. Everything above that? Straight to savings."
+        )
+
     def _create_spending_breakdown(self, analysis: AnalysisResult) -> str:
         """Creates a personalized spending breakdown in plain language."""
         breakdown = []
@@ -509,13 +301,8 @@ Here's what you NEED: a 6-month emergency fund. Why? Because your income varies.
         """
         Create highly personalized recommendation for spend leaks.
         """
-        # Extract merchant and amount from description
-        import re
-        match_amt = re.search(r'Rs\.([\ d,]+\.?\d*)', insight.description)
-        match_merchant = re.search(r'at (.+?) total', insight.description)
-        
-        amount = float(match_amt.group(1).replace(',', '')) if match_amt else 0
-        merchant = match_merchant.group(1) if match_merchant else "this merchant"
+        amount = insight.metrics.amount or 0
+        merchant = insight.metrics.merchant or "this merchant"
         
         # Make it super practical and conversational
         title = f"Hey, Let's Talk About Those {merchant} Visits..."
@@ -566,11 +353,8 @@ Think about what you could do with that money instead."""
         """
         Create practical recommendation for weekend overspending.
         """
-        # Extract amounts from insight
-        import re
-        amounts = re.findall(r'Rs\.(\d+\.?\d*)', insight.description)
-        weekend_avg = float(amounts[0]) if amounts else 0
-        weekday_avg = float(amounts[1]) if len(amounts) > 1 else 0
+        weekend_avg = insight.metrics.average or 0
+        weekday_avg = insight.metrics.baseline_average or 0
         
         diff = weekend_avg - weekday_avg
         monthly_overspend = diff * 8  # Roughly 8 weekend days per month
@@ -624,15 +408,10 @@ Here's what's probably happening: Friday comes, you're tired, you say "I deserve
         """
         Create practical recommendation for subscriptions.
         """
-        import re
-        match = re.search(r'to (.+?): Rs\.([\ d,]+\.?\d*)', insight.description)
-        merchant = match.group(1) if match else "this service"
-        amount_str = match.group(2) if match else "0"
-        amount = float(amount_str.replace(',', ''))
-        
-        # Count transactions from insight to get frequency
-        match_count = re.search(r'× (\d+)', insight.description)
-        count = int(match_count.group(1)) if match_count else 2
+        merchant = insight.metrics.merchant or "this service"
+        # Recurring charge, not the total paid so far
+        amount = insight.metrics.average or 0
+        count = insight.metrics.count or 2
         
         title = f"Quick Question: Still Using {merchant}?"
         
@@ -668,11 +447,9 @@ I'm not judging - I've had Netflix subscriptions I forgot about for months! But
         """
         Create practical recommendation for category spikes.
         """
-        import re
-        match = re.search(r'High spending in (\w+): Rs\.([\ d,]+\.?\d*) across (\d+)', insight.description)
-        category = match.group(1) if match else "this category"
-        amount = float(match.group(2).replace(',', '')) if match else 0
-        txn_count = int(match.group(3)) if match and match.group(3) else 0
+        category = insight.metrics.category or "this category"
+        amount = insight.metrics.amount or 0
+        txn_count = insight.metrics.count or 0
         
         avg_per_txn = amount / txn_count if txn_count > 0 else amount
        
@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Tuple
+from core.schemas import TransferReport
+from core.frame import TransactionFrame, ACCOUNT_COLUMN, TRANSFER_CATEGORY, day_numbers
+from core.utils import setup_logger
+
+logger = setup_logger("transfer_agent")
+
+# Words banks put in the narration of a move between accounts. UPI is left out: it is
+# how most ordinary payments are made too
+TRANSFER_PATTERN = r'\b(?:transfer|trf|xfer|neft|imps|rtgs|sweep|own account|self)\b'
+
+class TransferAgent:
+    """
+    Agent 2b: Transfer Matching
+    Responsibility: Pair money moved between the user's own accounts so analytics does not count it as income and spending.
+    """
+
+    def __init__(self, date_tolerance_days: int = 2):
+        # Both legs may post on different days (weekends, inter-bank settlement)
+        self.date_tolerance_days = date_tolerance_days
+
+    def config(self) -> Dict[str, Any]:
+        """
+        Constructor settings that change results, by parameter name.
+        """
+        return {"date_tolerance_days": self.date_tolerance_days}
+
+    def match(self, transactions: TransactionFrame) -> Tuple[TransactionFrame, TransferReport]:
+        """
+        Pairs each expense with an income of exactly the same amount in another account,
+        dated within date_tolerance_days, and tags both rows with TRANSFER_CATEGORY.
+
+        Accounts come from the ACCOUNT_COLUMN of a merged multi-account frame; without it
+        there is only one account and nothing to pair. Each row joins at most one pair,
+        and among the candidates the closest date wins.
+
+        An equal amount alone is not enough: a salary credit and a rent payment of the same
+        size are not a transfer. At least one leg must look like one (uncategorized, or a
+        transfer word such as NEFT or "own account" in its merchant or description), or
+        both legs must name the same counter-party.
+
+        Sort-merge join: both sides are sorted by (amount, date) and each expense finds its
+        candidate range with a binary search, so the cost is O(n log n) plus the candidates
+        actually visited, never a scan over all pairs. Incomes already paired are skipped
+        in constant amortized time, which keeps runs of round amounts cheap.
+        """
+        df = transactions.df
+        if ACCOUNT_COLUMN not in df.columns or len(df) < 2:
+            return transactions, TransferReport()
+        accounts, labels = pd.factorize(df[ACCOUNT_COLUMN])
+        if len(labels) < 2:
+            return transactions, TransferReport()
+
+        amounts = df['amount'].to_numpy(dtype=float)
+        eligible = np.isfinite(amounts) & (df['category'] != TRANSFER_CATEGORY).to_numpy() & (accounts >= 0)
+        txn_type = df['type'].to_numpy(dtype=object)
+        outgoing = np.flatnonzero(eligible & (txn_type == 'expense'))
+        incoming = np.flatnonzero(eligible & (txn_type == 'income'))
+        if not len(outgoing) or not len(incoming):
+            return transactions, TransferReport()
+
+        merchant = df['merchant'].fillna('').str.strip().str.lower()
+        text = merchant + ' ' + df['description'].fillna('').str.lower()
+        category = df['category']
+        open_leg = (category.isna() | (category == 'Uncategorized') | text.str.contains(TRANSFER_PATTERN)).to_numpy()
+        counterparty, _ = pd.factorize(merchant)
+
+        out_pos, in_pos = self._merge(amounts, day_numbers(df['date']), accounts, open_leg, counterparty,
+                                      outgoing, incoming)
+        out_rows, in_rows = outgoing[out_pos], incoming[in_pos]
+        if len(out_rows):
+            tagged = np.concatenate([out_rows, in_rows])
+            category = df['category'].to_numpy(dtype=object).copy()
+            is_fixed = df['is_fixed'].to_numpy(dtype=object).copy()
+            confidence = df['confidence_score'].to_numpy(dtype=float).copy()
+            category[tagged] = TRANSFER_CATEGORY
+            is_fixed[tagged] = False
+            confidence[tagged] = 1.0
+            df['category'] = category
+            df['is_fixed'] = is_fixed
+            df['confidence_score'] = confidence
+
+        ids = df['id'].to_numpy(dtype=object)
+        pair_amounts = amounts[out_rows]
+        report = TransferReport(
+            matched_pairs=len(out_rows),
+            total_amount=float(pair_amounts.sum()),
+            outgoing_ids=ids[out_rows].tolist(),
+            incoming_ids=ids[in_rows].tolist(),
+            amounts=pair_amounts.tolist()
+        )
+        logger.info(f"Matched {report.matched_pairs} transfers between {len(labels)} accounts")
+        return transactions, report
+
+    def _merge(self, amounts: np.ndarray, days: np.ndarray, accounts: np.ndarray,
+               open_leg: np.ndarray, counterparty: np.ndarray,
+               outgoing: np.ndarray, incoming: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Positions into outgoing and incoming of the matched pairs. Two legs may pair when
+        their accounts differ and either leg is open_leg or their counterparty codes match.
+        """
+        tolerance = self.date_tolerance_days
+        # Cents, renumbered densely in sorted order so (amount, day) packs into one int64 key
+        cents = np.round(amounts * 100)
+        _, amount_code = np.unique(np.concatenate([cents[outgoing], cents[incoming]]), return_inverse=True)
+        first_day = days.min()
+        # Wide enough that a tolerance window never reaches into the next amount
+        span = int(days.max() - first_day) + 2 * tolerance + 1
+        keys = amount_code.astype(np.int64) * span + (days[np.concatenate([outgoing, incoming])] - first_day)
+        out_key, in_key = keys[:len(outgoing)], keys[len(outgoing):]
+
+        out_order = np.argsort(out_key, kind='stable')
+        in_order = np.argsort(in_key, kind='stable')
+        in_sorted = in_key[in_order]
+        lo = np.searchsorted(in_sorted, out_key[out_order] - tolerance, side='left')
+        hi = np.searchsorted(in_sorted, out_key[out_order] + tolerance, side='right')
+        nearest = np.searchsorted(in_sorted, out_key[out_order], side='left')
+
+        # Only expenses with a non-empty candidate range reach the Python loop. Each one
+        # walks outward from the nearest date, so candidates are met in order of date gap
+        # and the first one that may pair is the closest
+        out_key_list = out_key[out_order].tolist()
+        in_key_list = in_sorted.tolist()
+        out_account = accounts[outgoing[out_order]].tolist()
+        in_account = accounts[incoming[in_order]].tolist()
+        out_open = open_leg[outgoing[out_order]].tolist()
+        in_open = open_leg[incoming[in_order]].tolist()
+        out_party = counterparty[outgoing[out_order]].tolist()
+        in_party = counterparty[incoming[in_order]].tolist()
+        lo_list, hi_list, nearest_list = lo.tolist(), hi.tolist(), nearest.tolist()
+        # Skip pointers over matched incomes (path-compressed), so runs of equal
+        # amounts on the same days are not rescanned by every later expense
+        right = list(range(len(in_order) + 1))
+        left = list(range(-1, len(in_order)))
+
+        def find(links, j, shift):
+            root = j
+            while links[root + shift] != root:
+                root = links[root + shift]
+            while links[j + shift] != root:
+                links[j + shift], j = root, links[j + shift]
+            return root
+
+        out_matched, in_matched = [], []
+        for i in np.flatnonzero(hi > lo).tolist():
+            key, account, is_open, party = out_key_list[i], out_account[i], out_open[i], out_party[i]
+            r = find(right, nearest_list[i], 0)
+            l = find(left, nearest_list[i] - 1, 1)
+            while True:
+                take_right = r < hi_list[i]
+                take_left = l >= lo_list[i]
+                if take_right and take_left:
+                    # Equal gaps go to the earlier income
+                    take_right = in_key_list[r] - key < key - in_key_list[l]
+                if take_right:
+                    if in_account[r] != account and (is_open or in_open[r] or in_party[r] == party):
+                        best = r
+                        break
+                    r = find(right, r + 1, 0)
+                elif take_left:
+                    if in_account[l] != account and (is_open or in_open[l] or in_party[l] == party):
+                        best = l
+                        break
+                    l = find(left, l - 1, 1)
+                else:
+                    best = -1
+                    break
+            if best >= 0:
+                right[best] = best + 1
+                left[best + 1] = best - 1
+                out_matched.append(i)
+                in_matched.append(best)
+
+        return out_order[out_matched].astype(np.intp), in_order[in_matched].astype(np.intp)
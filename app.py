@@ -1,9 +1,8 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import os
-import tempfile
+import hashlib
+import importlib.util
 from agents.orchestrator import OrchestratorAgent
+from agents.education import EducationAgent
 
 # Page Config
 st.set_page_config(
@@ -13,6 +12,35 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Agents are built once per server process and shared across reruns and sessions
+@st.cache_resource
+def get_orchestrator() -> OrchestratorAgent:
+    return OrchestratorAgent()
+
+@st.cache_resource
+def get_education_agent() -> EducationAgent:
+    return EducationAgent()
+
+def upload_digest(uploaded_file) -> str:
+    """
+    SHA-256 of an upload, computed once per uploaded file in this session.
+    """
+    file_id = getattr(uploaded_file, "file_id", None)
+    if file_id is None:
+        return hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    digests = st.session_state.setdefault("upload_digests", {})
+    if file_id not in digests:
+        digests[file_id] = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    return digests[file_id]
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def analyze_upload(digest: str, file_format: str, _uploaded_file) -> dict:
+    """
+    Runs the pipeline once per distinct upload. Widget reruns and chat messages hit this
+    cache, keyed by content digest; the underscored upload is excluded from hashing.
+    """
+    return get_orchestrator().process_bytes(_uploaded_file.getvalue(), file_format)
+
 # Custom CSS for "Premium" feel
 st.markdown("""
 <style>
@@ -40,7 +68,11 @@ st.markdown("""
 # Sidebar
 st.sidebar.title("💰 AI Finance Coach")
 st.sidebar.markdown("---")
-uploaded_file = st.sidebar.file_uploader("Upload Transaction Data (CSV/JSON)", type=['csv', 'json'])
+# Parquet needs the optional pyarrow dependency; find_spec checks for it without importing it
+if importlib.util.find_spec("pyarrow") is not None:
+    uploaded_file = st.sidebar.file_uploader("Upload Transaction Data (CSV/JSON/Parquet)", type=['csv', 'json', 'parquet'])
+else:
+    uploaded_file = st.sidebar.file_uploader("Upload Transaction Data (CSV/JSON)", type=['csv', 'json'])
 
 st.sidebar.markdown("### 🛠️ Settings")
 income_mode = st.sidebar.radio("Income Mode", ["Auto-Detect", "Fixed", "Variable"])
@@ -50,16 +82,12 @@ st.title("Your Personal Financial Dashboard")
 st.markdown("Welcome back! Let's optimize your wealth.")
 
 if uploaded_file is not None:
-    # Save uploaded file temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-        tmp_file.write(uploaded_file.getvalue())
-        tmp_path = tmp_file.name
+    file_format = uploaded_file.name.rsplit('.', 1)[-1].lower()
 
     try:
-        # Initialize Agents
+        # Processed straight from the upload bytes, once per distinct file
         with st.spinner('🤖 AI Agents are analyzing your finances...'):
-            orchestrator = OrchestratorAgent()
-            result = orchestrator.process(tmp_path)
+            result = analyze_upload(upload_digest(uploaded_file), file_format, uploaded_file)
             
         # --- TABS ---
         tab1, tab2 = st.tabs(["📊 Dashboard", "🎓 Learn Finance"])
@@ -92,6 +120,9 @@ if uploaded_file is not None:
             with c1:
                 st.subheader("💸 Spending by Category")
                 if data['spending_by_category']:
+                    # Chart libraries load on the first rendered result, not at app start-up
+                    import pandas as pd
+                    import plotly.express as px
                     df_cat = pd.DataFrame(list(data['spending_by_category'].items()), columns=['Category', 'Amount'])
                     fig = px.pie(df_cat, values='Amount', names='Category', hole=0.4, color_discrete_sequence=px.colors.qualitative.Pastel)
                     st.plotly_chart(fig, use_container_width=True)
@@ -126,7 +157,7 @@ if uploaded_file is not None:
                 st.chat_message("user").write(prompt)
                 
                 # Get response from Education Agent
-                edu_agent = EducationAgent()
+                edu_agent = get_education_agent()
                 response = edu_agent.get_response(prompt, level=level, language=lang_code)
                 
                 st.session_state.messages.append({"role": "assistant", "content": response})
@@ -134,10 +165,6 @@ if uploaded_file is not None:
 
     except Exception as e:
         st.error(f"An error occurred: {e}")
-    
-    finally:
-        # Cleanup
-        os.unlink(tmp_path)
 
 else:
     st.info("👈 Please upload a transaction file (CSV) to begin.")
@@ -0,0 +1,71 @@
+"""
+Benchmark: trusted vs validated ingestion of records that already follow the
+Transaction schema (backend syncs, re-loaded results).
+
+    FINANCE_COACH_BENCHMARKS=1 python -m benchmarks.bench_ingestion [rows]
+
+Run from the repository root. It takes several seconds at the default size, so like
+the start-up timing tests it only runs when FINANCE_COACH_BENCHMARKS is set.
+
+Materializing Transaction objects is not part of trusted mode: with pydantic 2,
+Transaction.model_construct runs in Python and measured about 1.5x slower than
+the validating constructor, which runs in pydantic-core.
+"""
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from agents.ingestion import IngestionAgent
+
+def make_records(n: int) -> list:
+    rng = np.random.default_rng(0)
+    merchants = ["Uber", "Starbucks", "Amazon", "Landlord", "Netflix", "Employer", "Swiggy", "BigBasket"]
+    dates = np.datetime64('2023-01-01') + rng.integers(0, 365, n)
+    return [
+        {
+            "id": f"t{i}",
+            "date": str(dates[i]),
+            "amount": round(float(rng.uniform(10, 5000)), 2),
+            "type": "income" if i % 50 == 0 else "expense",
+            "merchant": merchants[i % len(merchants)],
+            "description": f"Payment {i}",
+            "category": None,
+            "is_fixed": None,
+            "confidence_score": 0.0
+        }
+        for i in range(n)
+    ]
+
+def best_of(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def main():
+    if not os.environ.get("FINANCE_COACH_BENCHMARKS"):
+        sys.exit("set FINANCE_COACH_BENCHMARKS=1 to run the ingestion benchmark")
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    records = make_records(n)
+    agent = IngestionAgent()
+
+    untrusted = agent.ingest_source(records)
+    trusted = agent.ingest_source(records, trusted=True)
+    pd.testing.assert_frame_equal(untrusted.df, trusted.df, check_dtype=False)
+
+    results = {
+        "per-row normalization + pydantic validation": best_of(lambda: agent.ingest_source(records)),
+        "trusted: column conversion + batch validation": best_of(lambda: agent.ingest_source(records, trusted=True)),
+    }
+
+    print(f"{n:,} transactions, best of 3")
+    for name, ms in results.items():
+        print(f"  {name:<48} {ms:9.1f} ms  {n / ms * 1000:12,.0f} rows/s")
+    slow, fast = results.values()
+    print(f"  speed-up: {slow / fast:.1f}x")
+
+if __name__ == "__main__":
+    main()
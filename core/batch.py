@@ -0,0 +1,142 @@
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+STATEMENT_SUFFIXES = (".csv", ".json", ".parquet", ".pq", ".arrow", ".feather")
+
+# One warm orchestrator per worker process, built by _init_worker
+_orchestrator = None
+
+def collect_inputs(specs: Iterable[str], manifest: Optional[str] = None) -> List[str]:
+    """
+    Expands directories (their CSV/JSON/Parquet/Arrow files), glob patterns and plain paths,
+    plus an optional manifest with one path per line ('#' starts a comment;
+    relative paths are resolved against the manifest's directory).
+    Duplicates are dropped, first occurrence wins.
+    """
+    paths: List[str] = []
+    for spec in specs:
+        if os.path.isdir(spec):
+            paths.extend(sorted(
+                os.path.join(spec, name) for name in os.listdir(spec)
+                if name.lower().endswith(STATEMENT_SUFFIXES)
+            ))
+        elif glob.has_magic(spec):
+            paths.extend(sorted(glob.glob(spec, recursive=True)))
+        else:
+            paths.append(spec)
+
+    if manifest is not None:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, 'r') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    paths.append(line if os.path.isabs(line) else os.path.join(base, line))
+
+    return list(dict.fromkeys(paths))
+
+def _init_worker(use_cache: bool, quiet: bool):
+    global _orchestrator
+    if quiet:
+        # Agent loggers write to stdout, which may be carrying the NDJSON stream;
+        # errors are reported in each file's record instead
+        logging.disable(logging.ERROR)
+    # Imported here so the parent process does not pay for pandas and the agents
+    from agents.orchestrator import OrchestratorAgent
+    _orchestrator = OrchestratorAgent(use_cache=use_cache)
+
+def _process_one(path: str) -> Dict[str, Any]:
+    """
+    Runs one statement through the worker's orchestrator. Never raises: failures
+    come back as an error record so the rest of the batch carries on.
+    """
+    started = time.perf_counter()
+    try:
+        result = _orchestrator.process(path)
+        record = {"file": path, "status": result["status"], "result": result}
+    except Exception as e:
+        record = {
+            "file": path,
+            "status": "error",
+            "error": f"{type(e).__name__}: {e}",
+            "traceback": traceback.format_exc(limit=5)
+        }
+    record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return record
+
+def _chunksize(count: int, workers: int) -> int:
+    # Several chunks per worker keeps the pool balanced when file sizes differ
+    return max(1, min(64, count // (workers * 8)))
+
+def iter_batch(paths: List[str], workers: Optional[int] = None, use_cache: bool = True,
+               quiet: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Processes statement files on a pool of worker processes, each holding a warm
+    OrchestratorAgent, and yields one record per file in completion order.
+    workers=1 runs in the calling process.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) <= 1:
+        _init_worker(use_cache, quiet)
+        try:
+            for path in paths:
+                yield _process_one(path)
+        finally:
+            if quiet:
+                logging.disable(logging.NOTSET)
+        return
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(use_cache, quiet)) as pool:
+        yield from pool.imap_unordered(_process_one, paths, chunksize=_chunksize(len(paths), workers))
+
+def run_batch(paths: List[str], output: TextIO, workers: Optional[int] = None, use_cache: bool = True,
+              quiet: bool = True, report: Optional[TextIO] = None) -> Dict[str, Any]:
+    """
+    Streams one NDJSON line per file to output and writes a throughput/failure
+    summary to report (default: stderr). Returns the summary.
+    """
+    report = report or sys.stderr
+    started = time.perf_counter()
+    counts = {"success": 0, "no_data": 0, "error": 0}
+    failures: List[Dict[str, str]] = []
+    rows = 0
+
+    for record in iter_batch(paths, workers, use_cache, quiet):
+        output.write(json.dumps(record) + "\n")
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+        if record["status"] == "error":
+            failures.append({"file": record["file"], "error": record["error"]})
+        else:
+            rows += record["result"]["data"].get("transactions_count", 0)
+    output.flush()
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "files": len(paths),
+        "succeeded": counts["success"],
+        "no_data": counts["no_data"],
+        "failed": counts["error"],
+        "transactions": rows,
+        "elapsed_seconds": round(elapsed, 3),
+        "files_per_second": round(len(paths) / elapsed, 2) if elapsed > 0 else 0.0,
+        "transactions_per_second": round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+        "failures": failures
+    }
+
+    report.write(
+        f"[BATCH] {summary['files']} files in {summary['elapsed_seconds']:.2f}s "
+        f"({summary['files_per_second']:.1f} files/s, {summary['transactions_per_second']:,.0f} transactions/s): "
+        f"{summary['succeeded']} succeeded, {summary['no_data']} without data, {summary['failed']} failed\n"
+    )
+    for failure in failures[:20]:
+        report.write(f"  [FAILED] {failure['file']}: {failure['error']}\n")
+    if len(failures) > 20:
+        report.write(f"  ... and {len(failures) - 20} more\n")
+    return summary
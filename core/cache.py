@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from core.utils import setup_logger
+
+logger = setup_logger("result_cache")
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "FINANCE_COACH_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "finance_coach")
+)
+
+def hash_file(path: str, version: str = "", suffix: Optional[str] = None) -> str:
+    """
+    Content-addressed key for a file: SHA-256 over a version string, the file suffix and its bytes.
+    suffix overrides the file's own extension when the format is declared separately.
+    """
+    digest = _content_digest(version, os.path.splitext(path)[1] if suffix is None else suffix)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def hash_bytes(data: bytes, suffix: str, version: str = "") -> str:
+    """
+    Same key as hash_file would give for a file with this suffix (".csv", ".json") and content.
+    """
+    digest = _content_digest(version, suffix)
+    digest.update(data)
+    return digest.hexdigest()
+
+def _content_digest(version: str, suffix: str):
+    digest = hashlib.sha256()
+    digest.update(version.encode())
+    digest.update(suffix.lower().encode())
+    return digest
+
+class ResultCache:
+    """
+    On-disk cache of JSON-serializable results, one file per key.
+
+    Entries older than ttl_seconds are treated as misses and removed.
+    When the directory grows past max_bytes, least recently used entries
+    (by file modification time, refreshed on every hit) are evicted.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = 256 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = 7 * 24 * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._stats_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the stored value for key, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count(misses=1)
+            return None
+
+        if self.ttl_seconds is not None and time.time() - entry.get("created", 0) > self.ttl_seconds:
+            self._count(expired=1, misses=1)
+            self._remove(path)
+            return None
+
+        self._count(hits=1)
+        # Refresh recency for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["value"]
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """
+        Stores value under key, then evicts old entries if the size limit is exceeded.
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({"created": time.time(), "value": value}, f)
+            # Atomic rename so concurrent readers never see a partial entry
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not write cache entry {key[:12]}: {e}")
+            self._remove(tmp_path)
+            return
+        self._evict()
+
+    def _count(self, hits: int = 0, misses: int = 0, expired: int = 0, evictions: int = 0):
+        with self._stats_lock:
+            self._hits += hits
+            self._misses += misses
+            self._expired += expired
+            self._evictions += evictions
+
+    def _evict(self):
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".json") and entry.is_file():
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        # Removed by a concurrent eviction
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            self._count(evictions=1)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        """
+        Removes every entry.
+        """
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    self._remove(entry.path)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns hit/miss counters for this instance plus the current on-disk footprint.
+        """
+        entries = 0
+        size = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".json") and entry.is_file():
+                    try:
+                        size += entry.stat().st_size
+                    except OSError:
+                        continue
+                    entries += 1
+        lookups = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+            "expired": self._expired,
+            "evictions": self._evictions,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes
+        }
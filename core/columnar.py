@@ -0,0 +1,176 @@
+import os
+from datetime import timedelta
+from typing import Any, Iterator, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from core.frame import COLUMNS, ACCOUNT_COLUMN
+
+PARQUET_SUFFIXES = ('.parquet', '.pq')
+ARROW_SUFFIXES = ('.arrow', '.feather', '.ipc')
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+# Hive partition key of exported datasets: <root>/month=YYYY-MM/part-0.parquet
+PARTITION_COLUMN = 'month'
+
+# Everything ingestion can use, in either naming; other columns of a file are never read
+INGEST_COLUMNS = ('id', 'date', 'txn_date', 'amount', 'type', 'txn_type', 'merchant', 'description',
+                  'category', 'is_fixed', 'confidence_score', ACCOUNT_COLUMN)
+
+def _arrow():
+    """
+    pyarrow and pyarrow.dataset, imported on first use: pyarrow is an optional
+    dependency and slow to import, and only columnar sources need it.
+    """
+    try:
+        import pyarrow
+        import pyarrow.dataset
+    except ImportError as e:
+        raise ImportError("Parquet and Arrow support needs pyarrow (pip install pyarrow)") from e
+    return pyarrow, pyarrow.dataset
+
+def columnar_format(path: str) -> Optional[str]:
+    """
+    "parquet" or "arrow" for columnar files, by extension; directories are taken to be
+    Parquet datasets (as written by export_parquet). None for anything else.
+    """
+    lowered = path.lower()
+    if lowered.endswith(PARQUET_SUFFIXES) or os.path.isdir(path):
+        return 'parquet'
+    if lowered.endswith(ARROW_SUFFIXES):
+        return 'arrow'
+    return None
+
+def _open(source: Any, file_format: str):
+    """
+    A scannable dataset or fragment and its schema. Paths (files or partitioned
+    directories) become datasets; bytes and file objects become a single fragment.
+    """
+    pa, ds = _arrow()
+    file_format = file_format.lower().lstrip('.')
+    if file_format not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unsupported columnar format: {file_format}")
+    if isinstance(source, (str, os.PathLike)):
+        dataset = ds.dataset(os.fspath(source), format='parquet' if file_format == 'parquet' else 'ipc',
+                             partitioning='hive')
+        return dataset, dataset.schema
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = pa.BufferReader(source)
+    fragment = (ds.ParquetFileFormat() if file_format == 'parquet' else ds.IpcFileFormat()).make_fragment(source)
+    return fragment, fragment.physical_schema
+
+def read_columnar(source: Any, file_format: str = 'parquet', columns: Optional[Sequence[str]] = INGEST_COLUMNS,
+                  start=None, end=None) -> pd.DataFrame:
+    """
+    Reads a Parquet or Arrow IPC source into a DataFrame with lower-cased column names.
+
+    Only the requested columns are read (matched case-insensitively, missing ones
+    ignored; None reads all). start/end restrict the rows to an inclusive date range
+    on the date (or txn_date) column. For typed date columns the range is pushed down
+    to the scan: partitions of other months and row groups whose date statistics fall
+    outside the range are skipped without being decoded. Text dates are filtered after
+    reading.
+    """
+    pa, ds = _arrow()
+    scannable, schema = _open(source, file_format)
+    by_lower = {name.lower().strip(): name for name in schema.names}
+    if columns is None:
+        projection = [name for lower, name in by_lower.items() if lower != PARTITION_COLUMN]
+    else:
+        projection = [by_lower[c] for c in columns if c in by_lower]
+
+    date_name = by_lower.get('date', by_lower.get('txn_date'))
+    has_range = start is not None or end is not None
+    pushdown = None
+    if has_range and date_name is not None:
+        date_type = schema.field(date_name).type
+        if pa.types.is_date(date_type) or pa.types.is_timestamp(date_type):
+            pushdown = _date_filter(ds, date_name, start, end, PARTITION_COLUMN in schema.names)
+
+    table = scannable.to_table(columns=projection, filter=pushdown)
+    df = table.to_pandas(date_as_object=False)
+    df.columns = [str(c).lower().strip() for c in df.columns]
+
+    if has_range and pushdown is None and date_name is not None:
+        dates = pd.to_datetime(df[date_name.lower().strip()], errors='coerce')
+        keep = dates.notna().to_numpy()
+        if start is not None:
+            keep = keep & (dates >= pd.Timestamp(start).normalize()).to_numpy()
+        if end is not None:
+            keep = keep & (dates < pd.Timestamp(end).normalize() + timedelta(days=1)).to_numpy()
+        df = df[keep].reset_index(drop=True)
+    return df
+
+def iter_columnar(source: Any, file_format: str = 'parquet', batch_size: int = 50_000,
+                  columns: Optional[Sequence[str]] = INGEST_COLUMNS) -> Iterator[pd.DataFrame]:
+    """
+    Streams a Parquet or Arrow IPC source as DataFrames of at most batch_size rows,
+    reading only the requested columns (see read_columnar).
+    """
+    scannable, schema = _open(source, file_format)
+    by_lower = {name.lower().strip(): name for name in schema.names}
+    projection = [by_lower[c] for c in columns if c in by_lower]
+    for batch in scannable.to_batches(columns=projection, batch_size=batch_size):
+        if batch.num_rows:
+            df = batch.to_pandas(date_as_object=False)
+            df.columns = [str(c).lower().strip() for c in df.columns]
+            yield df
+
+def _date_filter(ds, date_name: str, start, end, partitioned: bool):
+    """
+    Inclusive [start, end] on the date column, plus the matching month partitions.
+    """
+    conditions = []
+    if start is not None:
+        start = pd.Timestamp(start).normalize()
+        conditions.append(ds.field(date_name) >= start.date())
+        if partitioned:
+            conditions.append(ds.field(PARTITION_COLUMN) >= start.strftime('%Y-%m'))
+    if end is not None:
+        end = pd.Timestamp(end).normalize()
+        # Half-open bound, so timestamps later on the end day are kept
+        conditions.append(ds.field(date_name) < (end + timedelta(days=1)).date())
+        if partitioned:
+            conditions.append(ds.field(PARTITION_COLUMN) <= end.strftime('%Y-%m'))
+    expression = conditions[0]
+    for condition in conditions[1:]:
+        expression = expression & condition
+    return expression
+
+def export_parquet(df: pd.DataFrame, root: str) -> List[str]:
+    """
+    Writes transactions to a Hive-partitioned Parquet dataset, one directory per month
+    (root/month=YYYY-MM/). Columns are stored typed (date32 dates, float amounts, boolean
+    is_fixed), so readers memory-map them instead of re-parsing text. Rows are sorted by
+    date, which keeps each row group's date statistics tight for read_columnar's range
+    pushdown. Months in df replace the same months from an earlier export; other months
+    are left in place. Returns the months written.
+    """
+    pa, ds = _arrow()
+    if len(df) == 0:
+        return []
+    columns = COLUMNS + ([ACCOUNT_COLUMN] if ACCOUNT_COLUMN in df.columns else [])
+    df = df[columns].sort_values('date', kind='stable')
+
+    fields = [
+        ('id', pa.string()), ('date', pa.date32()), ('amount', pa.float64()), ('type', pa.string()),
+        ('merchant', pa.string()), ('description', pa.string()), ('category', pa.string()),
+        ('is_fixed', pa.bool_()), ('confidence_score', pa.float64()),
+    ]
+    if ACCOUNT_COLUMN in columns:
+        fields.append((ACCOUNT_COLUMN, pa.string()))
+    table = pa.Table.from_pandas(df, schema=pa.schema(fields), preserve_index=False)
+
+    # Month labels built once per distinct month rather than formatted per row
+    dates = df['date']
+    ordinals = ((dates.dt.year - 1970) * 12 + dates.dt.month - 1).to_numpy()
+    codes, months = pd.factorize(ordinals)
+    labels = np.array([f"{1970 + m // 12:04d}-{m % 12 + 1:02d}" for m in months.tolist()], dtype=object)
+    table = table.append_column(PARTITION_COLUMN, pa.array(labels[codes], type=pa.string()))
+
+    ds.write_dataset(
+        table, root, format='parquet',
+        partitioning=ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor='hive'),
+        existing_data_behavior='delete_matching',
+        basename_template='part-{i}.parquet'
+    )
+    return sorted(labels.tolist())
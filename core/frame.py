@@ -0,0 +1,218 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterator, List, Optional, Union
+from core.schemas import Transaction
+
+# Column layout shared by every agent. Names follow the analytics frame.
+COLUMNS = ['id', 'date', 'amount', 'type', 'merchant', 'description', 'category', 'is_fixed', 'confidence_score']
+TXN_TYPES = ('income', 'expense')
+# Optional column naming the account (statement) a row came from when several are merged
+ACCOUNT_COLUMN = 'account'
+# Category of rows paired as transfers between the user's own accounts
+TRANSFER_CATEGORY = 'Transfer'
+
+def _values(column):
+    # Drops any pandas index so columns from different sources line up positionally
+    if isinstance(column, (pd.Series, pd.Index)):
+        return column.to_numpy()
+    return np.asarray(column, dtype=object) if isinstance(column, list) else column
+
+def day_numbers(dates: pd.Series) -> np.ndarray:
+    """
+    Days since 1970-01-01 as int64, for date arithmetic and sorting on plain integers.
+    """
+    return dates.to_numpy().astype('datetime64[D]').astype(np.int64)
+
+def _is_instance_mask(col: pd.Series, types, allow_missing: bool = False) -> np.ndarray:
+    values = col.to_numpy(dtype=object)
+    ok = np.fromiter((isinstance(v, types) for v in values), dtype=bool, count=len(values))
+    if allow_missing:
+        ok |= pd.isna(col).to_numpy()
+    return ok
+
+def validate_columns(df: pd.DataFrame):
+    """
+    Checks every column against the Transaction schema in one pass per column,
+    instead of validating row objects one at a time.
+    Raises ValueError naming each bad column, its bad-value count and the first offender.
+    """
+    checks = {
+        'id': _is_instance_mask(df['id'], str),
+        'date': df['date'].notna().to_numpy(),
+        'amount': np.isfinite(df['amount'].to_numpy(dtype=float)),
+        'type': df['type'].isin(TXN_TYPES).to_numpy(),
+        'merchant': _is_instance_mask(df['merchant'], str),
+        'description': _is_instance_mask(df['description'], str),
+        'category': _is_instance_mask(df['category'], str, allow_missing=True),
+        'is_fixed': _is_instance_mask(df['is_fixed'], (bool, np.bool_), allow_missing=True),
+        'confidence_score': np.isfinite(df['confidence_score'].to_numpy(dtype=float)),
+    }
+    problems = []
+    for column, ok in checks.items():
+        if not ok.all():
+            bad = np.flatnonzero(~ok)
+            first = df[column].iloc[[bad[0]]].tolist()[0]
+            problems.append(f"column '{column}' has {len(bad)} invalid values (first at row {bad[0]}: {first!r})")
+    if problems:
+        raise ValueError("Invalid transactions: " + "; ".join(problems))
+
+# Two SipHash keys give 128-bit IDs; changing them changes every content ID
+_ID_HASH_KEYS = ("finance-coach-id", "transaction-hash")
+
+def content_ids(df: pd.DataFrame, occurrences: Optional[Dict[int, int]] = None) -> np.ndarray:
+    """
+    Deterministic IDs from the normalized (date, amount, type, merchant, description)
+    of each row plus its occurrence index among identical rows, so repeated identical
+    transactions in one statement stay distinct while re-ingesting the statement
+    reproduces the same IDs. Hashing is vectorized per column (pandas SipHash).
+    
+    occurrences carries the per-content counts across calls, for chunked ingestion;
+    it is updated in place.
+    """
+    if len(df) == 0:
+        return np.array([], dtype=object)
+    parts = pd.DataFrame({
+        'day': day_numbers(df['date']),
+        # Rounded to cents; adding 0.0 folds -0.0 into 0.0 so both hash alike
+        'amount': np.round(df['amount'].to_numpy(dtype=float), 2) + 0.0,
+        'type': df['type'].to_numpy(dtype=object),
+        'merchant': df['merchant'].to_numpy(dtype=object),
+        'description': df['description'].to_numpy(dtype=object),
+    })
+    base = pd.util.hash_pandas_object(parts, index=False).to_numpy()
+    occurrence = pd.Series(base).groupby(base, sort=False).cumcount().to_numpy()
+    if occurrences is not None:
+        uniques, inverse, counts = np.unique(base, return_inverse=True, return_counts=True)
+        seen = np.array([occurrences.get(int(key), 0) for key in uniques], dtype=np.int64)
+        occurrence = occurrence + seen[inverse]
+        occurrences.update(zip(uniques.tolist(), (seen + counts).tolist()))
+    parts['occurrence'] = occurrence
+    high, low = (pd.util.hash_pandas_object(parts, index=False, hash_key=key).to_numpy() for key in _ID_HASH_KEYS)
+    return np.array([f"{h:016x}{l:016x}" for h, l in zip(high.tolist(), low.tolist())], dtype=object)
+
+class TransactionFrame:
+    """
+    Columnar container for transactions, backed by a pandas DataFrame.
+    Ingestion creates it once and every agent reads the columns directly.
+    Transaction objects are only built on demand (indexing, iteration, to_transactions).
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        missing = [c for c in COLUMNS if c not in df.columns]
+        if missing:
+            raise ValueError(f"TransactionFrame is missing columns: {missing}")
+        self.df = df
+
+    @classmethod
+    def from_columns(cls, ids, dates, amounts, types, merchants, descriptions,
+                     categories=None, is_fixed=None, confidence_scores=None,
+                     validate: bool = False) -> "TransactionFrame":
+        """
+        Builds a frame from already-normalized column arrays.
+        validate=True checks the result with validate_columns.
+        """
+        n = len(ids)
+        df = pd.DataFrame({
+            'id': pd.Series(_values(ids), dtype=object),
+            'date': pd.Series(pd.to_datetime(_values(dates))).dt.normalize(),
+            'amount': pd.Series(_values(amounts), dtype=float),
+            'type': pd.Series(_values(types), dtype=object),
+            'merchant': pd.Series(_values(merchants), dtype=object),
+            'description': pd.Series(_values(descriptions), dtype=object),
+            'category': pd.Series(_values(categories) if categories is not None else [None] * n, dtype=object),
+            'is_fixed': pd.Series(_values(is_fixed) if is_fixed is not None else [None] * n, dtype=object),
+            'confidence_score': pd.Series(_values(confidence_scores) if confidence_scores is not None else np.zeros(n), dtype=float),
+        })
+        if validate:
+            validate_columns(df)
+        return cls(df)
+
+    @classmethod
+    def from_transactions(cls, transactions: List[Transaction]) -> "TransactionFrame":
+        """
+        Converts Transaction objects into a frame (used for list inputs at the API edge).
+        """
+        return cls.from_columns(
+            ids=[t.id for t in transactions],
+            dates=[t.txn_date for t in transactions],
+            amounts=[t.amount for t in transactions],
+            types=[t.txn_type for t in transactions],
+            merchants=[t.merchant for t in transactions],
+            descriptions=[t.description for t in transactions],
+            categories=[t.category for t in transactions],
+            is_fixed=[t.is_fixed for t in transactions],
+            confidence_scores=[t.confidence_score for t in transactions],
+        )
+
+    @classmethod
+    def empty(cls) -> "TransactionFrame":
+        return cls.from_columns([], [], [], [], [], [])
+
+    @classmethod
+    def concat(cls, frames: List["TransactionFrame"]) -> "TransactionFrame":
+        frames = [f for f in frames if len(f)]
+        if not frames:
+            return cls.empty()
+        return cls(pd.concat([f.df for f in frames], ignore_index=True))
+
+    def analysis_view(self) -> pd.DataFrame:
+        """
+        Returns the frame with uncategorized rows filled in the way analytics expects.
+        Transfers between the user's own accounts are left out: they are neither income nor spending.
+        """
+        df = self.df
+        is_transfer = (df['category'] == TRANSFER_CATEGORY).to_numpy()
+        if is_transfer.any():
+            df = df[~is_transfer].reset_index(drop=True)
+        if df['category'].isna().any() or df['is_fixed'].isna().any():
+            df = df.assign(
+                category=df['category'].fillna('Uncategorized'),
+                is_fixed=df['is_fixed'].fillna(False).astype(bool)
+            )
+        return df
+
+    def to_transactions(self) -> List[Transaction]:
+        """
+        Materializes pydantic Transaction objects for every row.
+        """
+        return list(self)
+
+    def _optional(self, column: str) -> list:
+        col = self.df[column]
+        return col.astype(object).where(col.notna(), None).tolist()
+
+    def _build(self) -> Iterator[Transaction]:
+        df = self.df
+        for txn_id, txn_date, amount, txn_type, merchant, description, category, is_fixed, confidence in zip(
+            df['id'].tolist(), df['date'].dt.date.tolist(), df['amount'].tolist(),
+            df['type'].tolist(), df['merchant'].tolist(), df['description'].tolist(),
+            self._optional('category'), self._optional('is_fixed'), df['confidence_score'].tolist()
+        ):
+            yield Transaction(
+                id=txn_id,
+                txn_date=txn_date,
+                amount=amount,
+                txn_type=txn_type,
+                merchant=merchant,
+                description=description,
+                category=category,
+                is_fixed=is_fixed,
+                confidence_score=confidence
+            )
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def __bool__(self) -> bool:
+        return len(self.df) > 0
+
+    def __iter__(self) -> Iterator[Transaction]:
+        return self._build()
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Transaction, "TransactionFrame"]:
+        if isinstance(key, slice):
+            return TransactionFrame(self.df.iloc[key].reset_index(drop=True))
+        return next(TransactionFrame(self.df.iloc[[key]])._build())
+
+    def __repr__(self) -> str:
+        return f"TransactionFrame({len(self)} transactions)"
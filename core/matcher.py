@@ -0,0 +1,92 @@
+from collections import deque
+from typing import Dict, List, Literal, Optional, Tuple
+
+MatchPriority = Literal["earliest", "longest"]
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a keyword -> value mapping.
+    Finds the winning keyword in a single linear scan of the text,
+    regardless of how many keywords are registered.
+
+    Priority:
+        "earliest" - match starting first in the text wins, ties go to the longer keyword
+        "longest"  - longest keyword wins, ties go to the one starting first
+    """
+
+    def __init__(self, keywords: Dict[str, str], priority: MatchPriority = "earliest"):
+        if priority not in ("earliest", "longest"):
+            raise ValueError(f"Unknown match priority: {priority}")
+        self.priority = priority
+        self.keywords = dict(keywords)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per state: (keyword length, keyword) for every keyword ending here, longest first
+        self._out: List[List[Tuple[int, str]]] = [[]]
+        self._max_len = max((len(k) for k in self.keywords), default=0)
+        self._build()
+
+    def _build(self):
+        for keyword in self.keywords:
+            if not keyword:
+                continue
+            state = 0
+            for char in keyword:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append((len(keyword), keyword))
+
+        # Breadth-first pass to wire failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+            self._out[state].sort(reverse=True)
+
+    def find_match(self, text: str) -> Optional[Tuple[int, str]]:
+        """
+        Returns (start index, keyword) of the winning match, or None.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        best: Optional[Tuple[int, str]] = None
+        earliest = self.priority == "earliest"
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not out[state]:
+                continue
+            # Outputs are sorted longest first, so the first one starts earliest at this position
+            length, keyword = out[state][0]
+            start = i - length + 1
+            if best is None:
+                best = (start, keyword)
+            elif earliest:
+                if start < best[0] or (start == best[0] and length > len(best[1])):
+                    best = (start, keyword)
+            elif length > len(best[1]):
+                best = (start, keyword)
+            if earliest and i - self._max_len + 1 > best[0]:
+                # No later match can start before the current best
+                break
+        return best
+
+    def find(self, text: str) -> Optional[str]:
+        """
+        Returns the value mapped to the winning keyword, or None.
+        """
+        match = self.find_match(text)
+        return self.keywords[match[1]] if match else None
@@ -1,3 +1,4 @@
+import threading
 from typing import List, Optional, Literal
 from pydantic import BaseModel, Field
 from datetime import date, datetime
@@ -24,6 +25,18 @@ class Category(BaseModel):
     cat_type: Literal["fixed", "variable", "income"]
     keywords: List[str] = []
 
+class InsightMetrics(BaseModel):
+    """
+    Numbers behind an insight, for consumers that need values rather than text.
+    """
+    amount: Optional[float] = Field(None, description="Total amount the insight is about (last month for trends)")
+    count: Optional[int] = Field(None, description="Number of transactions involved")
+    merchant: Optional[str] = Field(None, description="Merchant the insight is about")
+    category: Optional[str] = Field(None, description="Category the insight is about")
+    average: Optional[float] = Field(None, description="Typical amount: per transaction, per recurring charge or per weekend day")
+    baseline_average: Optional[float] = Field(None, description="Average compared against (per weekday)")
+    previous_amount: Optional[float] = Field(None, description="Earlier amount compared against (first month for trends)")
+
 class Insight(BaseModel):
     """
     Represents a behavioral insight derived from analysis.
@@ -32,6 +45,7 @@ class Insight(BaseModel):
     description: str = Field(..., description="Human-readable description of the insight")
     severity: Literal["low", "medium", "high"] = Field("medium", description="Importance of the insight")
     related_transaction_ids: List[str] = Field(default_factory=list, description="IDs of transactions related to this insight")
+    metrics: InsightMetrics = Field(default_factory=InsightMetrics, description="Structured values behind the description")
 
 class Recommendation(BaseModel):
     """
@@ -51,6 +65,55 @@ class AgentLog(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.now)
     action: str
     details: str
+    # Stage metrics, set on "Completed"/"Failed" entries of timed stages
+    duration_ms: Optional[float] = None
+    cpu_ms: Optional[float] = None
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    memory_peak_delta_kb: Optional[float] = None
+    # Thread that ran the stage, so concurrent runs land on separate trace tracks
+    thread_id: Optional[int] = Field(default_factory=threading.get_ident)
+
+class IncomeProfile(BaseModel):
+    """
+    Regularity of a user's income over the statement period.
+    """
+    income_type: Literal["fixed", "variable", "unknown"] = Field("unknown", description="Salaried (fixed) or freelance/business (variable) income")
+    monthly_income: dict[str, float] = Field(default_factory=dict, description="Income per month (YYYY-MM), zero for months without income")
+    average_monthly_income: float = Field(0.0, description="Mean of monthly_income")
+    volatility: float = Field(0.0, description="Coefficient of variation of monthly_income")
+    worst_month: Optional[str] = Field(None, description="Lowest-earning month (YYYY-MM)")
+    worst_month_income: Optional[float] = Field(None, description="Income in the worst month")
+
+class DedupReport(BaseModel):
+    """
+    What the Deduplication Agent dropped. Dropped rows are listed column-wise:
+    dropped_ids[i] repeats the kept transaction duplicate_of[i], for reasons[i].
+    "seen" marks a transaction whose key is in the history of an incremental run (see SeenKeys).
+    """
+    input_rows: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+    seen_duplicates: int = Field(0, description="Transactions dropped because the incremental history holds them")
+    unchecked_rows: int = Field(0, description="Transactions dated before the history's key window, kept without a check against it")
+    dropped_ids: List[str] = Field(default_factory=list, description="IDs of dropped transactions")
+    duplicate_of: List[str] = Field(default_factory=list, description="ID of the kept transaction each dropped one repeats")
+    reasons: List[Literal["exact", "near", "seen"]] = Field(default_factory=list, description="Why each transaction was dropped")
+
+    @property
+    def output_rows(self) -> int:
+        return self.input_rows - self.exact_duplicates - self.near_duplicates - self.seen_duplicates
+
+class TransferReport(BaseModel):
+    """
+    Transfers between the user's own accounts found by the Transfer Agent, listed
+    column-wise: outgoing_ids[i] (expense) moved amounts[i] to incoming_ids[i] (income).
+    """
+    matched_pairs: int = 0
+    total_amount: float = 0.0
+    outgoing_ids: List[str] = Field(default_factory=list, description="IDs of the expense side of each transfer")
+    incoming_ids: List[str] = Field(default_factory=list, description="IDs of the income side of each transfer")
+    amounts: List[float] = Field(default_factory=list, description="Amount moved by each transfer")
 
 class AnalysisResult(BaseModel):
     """
@@ -62,3 +125,53 @@ class AnalysisResult(BaseModel):
     variable_expenses_total: float
     total_income: float
     total_expense: float
+    income_profile: IncomeProfile = Field(default_factory=IncomeProfile)
+
+class MerchantAggregate(BaseModel):
+    """
+    Running expense aggregates for one merchant. Only the latest IDs are kept
+    (MAX_STATE_IDS in agents.analytics), so the state does not grow with the history.
+    """
+    count: int = 0
+    total: float = 0.0
+    min: Optional[float] = None
+    max: Optional[float] = None
+    first: Optional[float] = None
+    missing: int = 0
+    transaction_ids: List[str] = Field(default_factory=list, description="IDs of the latest expenses")
+    small_count: int = 0
+    small_total: float = 0.0
+    small_transaction_ids: List[str] = Field(default_factory=list, description="IDs of the latest expenses under 500")
+
+class SeenKeys(BaseModel):
+    """
+    Exact-duplicate keys of the latest transactions of a history, per day, so new rows can
+    be checked against it without keeping its rows. Days before since are forgotten.
+    """
+    keys: dict[date, List[int]] = Field(default_factory=dict, description="Keys of the transactions of each day, from since on")
+    since: Optional[date] = Field(None, description="First day the keys cover; earlier transactions cannot be checked")
+
+class AnalyticsState(BaseModel):
+    """
+    Serializable running aggregates for incremental analytics.
+    """
+    transactions_count: int = 0
+    total_income: float = 0.0
+    total_expense: float = 0.0
+    fixed_expenses_total: float = 0.0
+    variable_expenses_total: float = 0.0
+    category_totals: dict[str, float] = Field(default_factory=dict)
+    category_counts: dict[str, int] = Field(default_factory=dict)
+    merchants: dict[str, MerchantAggregate] = Field(default_factory=dict)
+    daily_totals: dict[date, float] = Field(default_factory=dict, description="Expense sum per calendar day")
+    weekday_totals: dict[int, float] = Field(default_factory=dict, description="Expense sum per weekday (Monday=0)")
+    monthly_totals: dict[str, float] = Field(default_factory=dict, description="Expense sum per month (YYYY-MM)")
+    income_count: int = 0
+    income_amounts: List[float] = Field(default_factory=list, description="Distinct income amounts, at most three kept")
+    income_min: Optional[float] = None
+    income_max: Optional[float] = None
+    income_monthly_totals: dict[str, float] = Field(default_factory=dict, description="Income sum per month (YYYY-MM)")
+    income_monthly_counts: dict[str, int] = Field(default_factory=dict, description="Income transactions per month (YYYY-MM)")
+    first_month: Optional[str] = Field(None, description="Earliest month with any transaction (YYYY-MM)")
+    last_month: Optional[str] = Field(None, description="Latest month with any transaction (YYYY-MM)")
+    seen: SeenKeys = Field(default_factory=SeenKeys, description="Keys of the latest transactions, to skip ones already counted")
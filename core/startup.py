@@ -0,0 +1,102 @@
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, NamedTuple, Sequence
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time allowed for the orchestrator module (pydantic schemas included)
+IMPORT_BUDGET_MS = 300
+# Wall time allowed for `main.py --help`, interpreter start-up included
+HELP_BUDGET_MS = 150
+# Must not be imported until a statement is actually processed
+DEFERRED_MODULES = ("pandas", "numpy", "plotly")
+
+class ImportRecord(NamedTuple):
+    module: str
+    self_ms: float
+    cumulative_ms: float
+    depth: int
+
+def import_times(args: Sequence[str]) -> List[ImportRecord]:
+    """
+    Runs `python -X importtime <args>` from the repository root and parses the
+    per-module report it writes to stderr.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    records = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nested imports are indented two spaces per level after the separator space
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        records.append(ImportRecord(name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, depth))
+    return records
+
+def module_import_ms(module: str, repeat: int = 3) -> float:
+    """
+    Best-of-repeat cumulative import time of one module in a fresh interpreter.
+    """
+    return min(
+        next(r.cumulative_ms for r in import_times(["-c", f"import {module}"]) if r.module == module)
+        for _ in range(repeat)
+    )
+
+def wall_ms(args: Sequence[str], repeat: int = 5) -> float:
+    """
+    Best-of-repeat wall time of `python <args>`, output discarded.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best
+
+def format_report(records: List[ImportRecord], top: int = 15) -> str:
+    """
+    The slowest imports by cumulative time, indented by nesting depth.
+    """
+    lines = [f"{'cumulative ms':>14} {'self ms':>9}  module"]
+    for r in sorted(records, key=lambda r: r.cumulative_ms, reverse=True)[:top]:
+        lines.append(f"{r.cumulative_ms:14.1f} {r.self_ms:9.1f}  {'  ' * r.depth}{r.module}")
+    return "\n".join(lines)
+
+def check_budget() -> Dict[str, object]:
+    """
+    Measures the start-up paths against the budgets above.
+    """
+    help_records = import_times(["main.py", "--help"])
+    orchestrator_records = import_times(["-c", "import agents.orchestrator"])
+    loaded = {r.module for r in help_records + orchestrator_records}
+    import_ms = module_import_ms("agents.orchestrator")
+    help_ms = wall_ms(["main.py", "--help"])
+    deferred = sorted(m for m in DEFERRED_MODULES if m in loaded)
+    return {
+        "orchestrator_import_ms": import_ms,
+        "help_wall_ms": help_ms,
+        "eagerly_imported": deferred,
+        "within_budget": import_ms <= IMPORT_BUDGET_MS and help_ms <= HELP_BUDGET_MS and not deferred,
+        "report": format_report(orchestrator_records)
+    }
+
+def main():
+    result = check_budget()
+    print("Import time of agents.orchestrator (python -X importtime):")
+    print(result["report"])
+    print()
+    print(f"agents.orchestrator import: {result['orchestrator_import_ms']:.1f} ms (budget {IMPORT_BUDGET_MS} ms)")
+    print(f"main.py --help wall time:   {result['help_wall_ms']:.1f} ms (budget {HELP_BUDGET_MS} ms)")
+    if result["eagerly_imported"]:
+        print(f"Imported too early: {', '.join(result['eagerly_imported'])}")
+    print("OK" if result["within_budget"] else "OVER BUDGET")
+    return 0 if result["within_budget"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
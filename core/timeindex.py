@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from datetime import date
+from typing import Optional, Union
+
+DateLike = Union[date, np.datetime64, pd.Timestamp, str]
+
+def _day_ordinal(value: DateLike) -> int:
+    return int(np.datetime64(pd.Timestamp(value).date(), 'D').astype(np.int64))
+
+class DateIndex:
+    """
+    Day-sorted view of a transaction DataFrame for windowed queries.
+    Dates are converted to integer day ordinals once and sorted; each window
+    lookup is two binary searches plus a gather of the k matching rows.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        days = df['date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+        self._order = np.argsort(days, kind='stable')
+        self._days = days[self._order]
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+    @property
+    def last_day(self) -> Optional[pd.Timestamp]:
+        """
+        Latest transaction date, or None for an empty index.
+        """
+        if not len(self._days):
+            return None
+        return pd.Timestamp(np.datetime64(int(self._days[-1]), 'D'))
+
+    def positions(self, start: DateLike, end: DateLike) -> np.ndarray:
+        """
+        Row positions with start <= date <= end, in original row order.
+        """
+        lo = np.searchsorted(self._days, _day_ordinal(start), side='left')
+        hi = np.searchsorted(self._days, _day_ordinal(end), side='right')
+        return np.sort(self._order[lo:hi])
+
+    def between(self, start: DateLike, end: DateLike) -> pd.DataFrame:
+        """
+        Rows dated between start and end, both inclusive.
+        """
+        return self.df.iloc[self.positions(start, end)]
+
+    def trailing(self, days: int, end: Optional[DateLike] = None, txn_type: Optional[str] = None) -> pd.DataFrame:
+        """
+        Rows from the last `days` days up to and including `end` (default: last transaction date).
+        """
+        if end is None:
+            end = self.last_day
+            if end is None:
+                return self.df.iloc[:0]
+        end = pd.Timestamp(end)
+        window = self.between(end - pd.Timedelta(days=days - 1), end)
+        if txn_type is not None:
+            window = window[(window['type'] == txn_type).to_numpy()]
+        return window
+
+    def spend_by_category(self, days: int, end: Optional[DateLike] = None) -> pd.Series:
+        """
+        Expense totals per category over the trailing window, in order of first appearance.
+        """
+        expenses = self.trailing(days, end, txn_type="expense")
+        return expenses.groupby('category', sort=False, dropna=False)['amount'].sum()
@@ -0,0 +1,142 @@
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Union
+from core.schemas import AgentLog
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def _peak_rss_kb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1024 if sys.platform == "darwin" else float(peak)
+
+class _TraceSession:
+    """
+    tracemalloc is process-wide, so spans share it: it is started by the first span that
+    asks for it and stopped when the last span measuring with it ends, and the peak is only
+    reset when no other span is measuring.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.spans = 0
+        self.owned = False
+
+_trace_session = _TraceSession()
+
+class StageSpan:
+    """
+    Measures one pipeline stage: wall time, CPU time, rows in/out and peak memory delta.
+
+    Memory is the traced-allocation peak above the starting level when tracemalloc is
+    running (trace_memory=True starts it for the span). Otherwise it is the growth of the
+    process peak RSS during the stage, which is free to read but only moves when the
+    stage sets a new high-water mark.
+
+    Spans may trace memory concurrently, but the traced peak is process-wide: while
+    spans overlap, each one reports the peak since the earliest of them started, an
+    upper bound on its own.
+    """
+
+    def __init__(self, rows_in: Optional[int] = None, trace_memory: bool = False):
+        self.rows_in = rows_in
+        self.rows_out: Optional[int] = None
+        self.details = ""
+        self.trace_memory = trace_memory
+        self.wall_ms: Optional[float] = None
+        self.cpu_ms: Optional[float] = None
+        self.memory_peak_delta_kb: Optional[float] = None
+
+    def complete(self, details: str, rows_out: Optional[int] = None):
+        """
+        Sets the completion message and output row count.
+        """
+        self.details = details
+        self.rows_out = rows_out
+
+    def __enter__(self) -> "StageSpan":
+        session = _trace_session
+        with session.lock:
+            if self.trace_memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                session.owned = True
+            self._tracing = tracemalloc.is_tracing()
+            if self._tracing:
+                if session.spans == 0:
+                    tracemalloc.reset_peak()
+                session.spans += 1
+                self._mem_start = tracemalloc.get_traced_memory()[0]
+        if not self._tracing:
+            self._mem_start = _peak_rss_kb()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cpu_ms = (time.thread_time() - self._cpu_start) * 1000
+        self.wall_ms = (time.perf_counter() - self._wall_start) * 1000
+        if self._tracing:
+            session = _trace_session
+            with session.lock:
+                self.memory_peak_delta_kb = max(tracemalloc.get_traced_memory()[1] - self._mem_start, 0) / 1024
+                session.spans -= 1
+                if session.spans == 0 and session.owned:
+                    tracemalloc.stop()
+                    session.owned = False
+        elif self._mem_start is not None:
+            self.memory_peak_delta_kb = _peak_rss_kb() - self._mem_start
+        return False
+
+def _field(entry: Union[AgentLog, Dict[str, Any]], name: str, alias: Optional[str] = None):
+    if isinstance(entry, dict):
+        return entry.get(alias or name)
+    return getattr(entry, name, None)
+
+def export_chrome_trace(logs: Iterable[Union[AgentLog, Dict[str, Any]]], path: str, pid: Optional[int] = None):
+    """
+    Writes timed log entries as Chrome trace-event JSON (chrome://tracing, Perfetto).
+    Accepts AgentLog objects or the log dicts of an orchestrator response; entries
+    without a duration become instant events. Each thread that wrote entries gets its
+    own track, so stages of concurrent runs do not overlap on one row.
+    """
+    pid = os.getpid() if pid is None else pid
+    events = []
+    # Thread idents are large and opaque; tracks are numbered in order of appearance
+    tids: Dict[Any, int] = {}
+    for entry in logs:
+        thread_id = _field(entry, "thread_id")
+        if thread_id not in tids:
+            tids[thread_id] = len(tids)
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tids[thread_id],
+                           "args": {"name": f"thread {thread_id}" if thread_id is not None else "unknown"}})
+        timestamp = _field(entry, "timestamp")
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        duration_ms = _field(entry, "duration_ms")
+        name = _field(entry, "agent_name", "agent")
+        args = {
+            key: _field(entry, key)
+            for key in ("details", "cpu_ms", "rows_in", "rows_out", "memory_peak_delta_kb")
+            if _field(entry, key) is not None
+        }
+        event = {"name": name, "cat": _field(entry, "action"), "pid": pid, "tid": tids[thread_id], "args": args}
+        if duration_ms is None:
+            event.update(ph="i", s="t", ts=timestamp.timestamp() * 1e6)
+        else:
+            # Entries are stamped when the stage completes
+            start = timestamp - timedelta(milliseconds=duration_ms)
+            event.update(ph="X", ts=start.timestamp() * 1e6, dur=duration_ms * 1000)
+        events.append(event)
+
+    with open(path, 'w') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
@@ -1,24 +1,76 @@
+import sys
 import json
 import argparse
-from agents.orchestrator import OrchestratorAgent
+
+def batch_main(argv):
+    """
+    Batch mode: processes many statement files on a worker pool and writes one
+    NDJSON record per file.
+    """
+    from core.batch import collect_inputs, run_batch
+    
+    parser = argparse.ArgumentParser(prog="main.py batch", description="Process many statement files in parallel")
+    parser.add_argument("inputs", nargs="*", help="Directories, glob patterns or statement files")
+    parser.add_argument("--manifest", help="File listing one statement path per line", default=None)
+    parser.add_argument("--output", help="Path to write NDJSON results (default: stdout)", default=None)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: number of cores)")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute instead of reusing cached results")
+    parser.add_argument("--verbose", action="store_true", help="Keep per-agent logging from the workers (use with --output)")
+    
+    args = parser.parse_args(argv)
+    paths = collect_inputs(args.inputs, args.manifest)
+    if not paths:
+        parser.error("no statement files found")
+    
+    if args.output:
+        with open(args.output, 'w') as output:
+            summary = run_batch(paths, output, args.workers, use_cache=not args.no_cache, quiet=not args.verbose)
+    else:
+        summary = run_batch(paths, sys.stdout, args.workers, use_cache=not args.no_cache, quiet=not args.verbose)
+    
+    return 1 if summary["failed"] else 0
 
 def main():
     """
     Main entry point for the Agentic AI Personal Finance Coach.
     """
-    parser = argparse.ArgumentParser(description="Agentic AI Personal Finance Coach")
-    parser.add_argument("file", help="Path to transaction data file (CSV or JSON)")
+    # "batch" is a subcommand, but the default command takes bare file paths, which
+    # argparse subparsers cannot share a position with; the epilog points to it instead
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        sys.exit(batch_main(sys.argv[2:]))
+    
+    parser = argparse.ArgumentParser(
+        description="Agentic AI Personal Finance Coach",
+        epilog="To process many statement files in parallel, one NDJSON record per file, "
+               "use batch mode: main.py batch --help"
+    )
+    parser.add_argument("files", nargs="+", metavar="file", help="Path to transaction data file (CSV, JSON, Parquet or Arrow); several overlapping statements are merged and deduplicated")
+    parser.add_argument("--accounts", nargs="+", metavar="ACCOUNT", default=None, help="Account of each file, in order; transfers are matched between different accounts (default: one account per file)")
     parser.add_argument("--output", help="Path to save output JSON", default=None)
     parser.add_argument("--pretty", action="store_true", help="Pretty print output")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute instead of reusing a cached result for an identical file")
+    parser.add_argument("--export-parquet", metavar="DIR", default=None, help="Also write the categorized transactions to a month-partitioned Parquet dataset (needs pyarrow)")
+    parser.add_argument("--trace", help="Path to save a Chrome trace-event JSON of the pipeline stages", default=None)
+    parser.add_argument("--trace-memory", action="store_true", help="Measure per-stage allocation peaks with tracemalloc (slower)")
     
     args = parser.parse_args()
+    if args.accounts is not None and len(args.accounts) != len(args.files):
+        parser.error(f"--accounts needs one account per file ({len(args.files)})")
     
-    # Initialize orchestrator
-    orchestrator = OrchestratorAgent()
+    # Initialize orchestrator (imported after argument parsing so --help stays fast)
+    from agents.orchestrator import OrchestratorAgent
+    orchestrator = OrchestratorAgent(use_cache=not args.no_cache, trace_memory=args.trace_memory)
     
     # Process transactions
-    print(f"\n[*] Processing transactions from: {args.file}\n")
-    result = orchestrator.process(args.file)
+    print(f"\n[*] Processing transactions from: {', '.join(args.files)}\n")
+    if len(args.files) == 1:
+        result = orchestrator.process_source(args.files[0], export_dir=args.export_parquet)
+    else:
+        result = orchestrator.process_sources(args.files, accounts=args.accounts, export_dir=args.export_parquet)
+    
+    if args.trace:
+        orchestrator.export_trace(args.trace)
+        print(f"[SAVED] Stage trace saved to: {args.trace}")
     
     # Display summary
     # Display summary
@@ -1,6 +1,8 @@
 import pytest
-from agents.analytics import AnalyticsAgent
-from core.schemas import Transaction
+import pandas as pd
+from agents.analytics import AnalyticsAgent, MAX_STATE_IDS
+from core.schemas import Transaction, AnalyticsState
+from core.frame import TransactionFrame
 from datetime import date
 
 @pytest.fixture
@@ -47,3 +49,122 @@ def test_empty_transactions(analytics_agent):
     assert result.total_income == 0.0
     assert result.total_expense == 0.0
     assert len(result.insights) == 0
+
+def test_income_only_transactions(analytics_agent):
+    result = analytics_agent.analyze([
+        Transaction(id="i1", txn_date=date(2023, 10, 1), amount=50000.0, txn_type="income", merchant="Employer", description="Salary", category="Salary", is_fixed=False),
+        Transaction(id="i2", txn_date=date(2023, 11, 1), amount=50000.0, txn_type="income", merchant="Employer", description="Salary", category="Salary", is_fixed=False),
+    ])
+
+    assert result.total_income == 100000.0
+    assert result.total_expense == 0.0
+    assert result.spending_by_category == {}
+    assert result.insights == []
+
+def test_leak_and_subscription_related_ids(analytics_agent):
+    txns = [
+        Transaction(id=f"c{i}", txn_date=date(2023, 10, 1 + i), amount=400.0, txn_type="expense", merchant="Cafe", description="Coffee", category="Dining Out", is_fixed=False)
+        for i in range(3)
+    ] + [
+        Transaction(id="n1", txn_date=date(2023, 10, 2), amount=649.0, txn_type="expense", merchant="Netflix", description="Plan", category="Entertainment", is_fixed=False),
+        Transaction(id="x1", txn_date=date(2023, 10, 3), amount=20.0, txn_type="expense", merchant="Kiosk", description="Snack", category="Dining Out", is_fixed=False),
+        Transaction(id="n2", txn_date=date(2023, 11, 2), amount=649.0, txn_type="expense", merchant="Netflix", description="Plan", category="Entertainment", is_fixed=False),
+    ]
+    result = analytics_agent.analyze(txns)
+    by_type = {}
+    for insight in result.insights:
+        by_type.setdefault(insight.insight_type, []).append(insight)
+
+    leak, = by_type["spend_leak"]
+    assert leak.related_transaction_ids == ["c0", "c1", "c2"]
+    assert "Rs.1200.00 (3 transactions)" in leak.description
+
+    subscriptions = {i.description: i.related_transaction_ids for i in by_type["subscription"]}
+    assert subscriptions["Recurring payment to Netflix: Rs.649.00 x 2 = Rs.1298.00"] == ["n1", "n2"]
+    assert subscriptions["Recurring payment to Cafe: Rs.400.00 x 3 = Rs.1200.00"] == ["c0", "c1", "c2"]
+
+def test_incremental_matches_full_analysis(analytics_agent, sample_transactions):
+    full = analytics_agent.analyze(sample_transactions)
+
+    state = AnalyticsState()
+    analytics_agent.analyze_incremental(state, sample_transactions[:2])
+    result = analytics_agent.analyze_incremental(state, sample_transactions[2:])
+
+    assert state.transactions_count == len(sample_transactions)
+    assert result == full
+
+def test_state_keeps_latest_ids(analytics_agent):
+    state = AnalyticsState()
+    for batch in range(3):
+        analytics_agent.update_state(state, [
+            Transaction(id=f"s{batch}-{i}", txn_date=date(2023, 10, 1 + batch), amount=99.0, txn_type="expense",
+                        merchant="Spotify", description="Music", category="Entertainment", is_fixed=False)
+            for i in range(MAX_STATE_IDS // 2)
+        ])
+
+    merchant = state.merchants["Spotify"]
+    assert merchant.count == 3 * (MAX_STATE_IDS // 2)
+    assert len(merchant.transaction_ids) == len(merchant.small_transaction_ids) == MAX_STATE_IDS
+    assert merchant.transaction_ids[-1] == f"s2-{MAX_STATE_IDS // 2 - 1}"
+
+def test_state_round_trip(analytics_agent, sample_transactions, tmp_path):
+    state = AnalyticsState()
+    analytics_agent.update_state(state, sample_transactions)
+    path = tmp_path / "state.json"
+
+    analytics_agent.save_state(state, str(path))
+    loaded = analytics_agent.load_state(str(path))
+
+    assert loaded == state
+    assert analytics_agent.analyze_state(loaded) == analytics_agent.analyze(sample_transactions)
+
+def test_analyze_batch_matches_per_user(analytics_agent, sample_transactions):
+    other = [
+        Transaction(id=f"o{i}", txn_date=date(2023, 9 + i, 6), amount=649.0, txn_type="expense", merchant="Netflix", description="Plan", category="Entertainment", is_fixed=False)
+        for i in range(3)
+    ] + [
+        Transaction(id="o9", txn_date=date(2023, 11, 1), amount=30000.0, txn_type="income", merchant="Employer", description="Salary", category="Salary", is_fixed=False),
+    ]
+    df = pd.concat([
+        TransactionFrame.from_transactions(sample_transactions).df.assign(user_id="a"),
+        TransactionFrame.from_transactions(other).df.assign(user_id="b"),
+    ], ignore_index=True).sort_values("date", kind="stable")
+
+    results = analytics_agent.analyze_batch(df)
+
+    assert set(results) == {"a", "b"}
+    assert results["a"] == analytics_agent.analyze(sample_transactions)
+    assert results["b"] == analytics_agent.analyze(other)
+
+def test_analyze_batch_requires_user_column(analytics_agent, sample_transactions):
+    with pytest.raises(ValueError):
+        analytics_agent.analyze_batch(TransactionFrame.from_transactions(sample_transactions))
+
+def test_income_profile(analytics_agent):
+    txns = [
+        Transaction(id="p1", txn_date=date(2023, 8, 3), amount=40000.0, txn_type="income", merchant="Client A", description="Invoice", category="Salary", is_fixed=False),
+        Transaction(id="p2", txn_date=date(2023, 8, 20), amount=15000.0, txn_type="income", merchant="Client B", description="Invoice", category="Salary", is_fixed=False),
+        Transaction(id="p3", txn_date=date(2023, 8, 28), amount=5000.0, txn_type="income", merchant="Client C", description="Invoice", category="Salary", is_fixed=False),
+        Transaction(id="e1", txn_date=date(2023, 9, 12), amount=900.0, txn_type="expense", merchant="Cafe", description="Coffee", category="Dining Out", is_fixed=False),
+        Transaction(id="p4", txn_date=date(2023, 10, 9), amount=30000.0, txn_type="income", merchant="Client A", description="Invoice", category="Salary", is_fixed=False),
+    ]
+    profile = analytics_agent.analyze(txns).income_profile
+
+    assert profile.income_type == "variable"
+    # September had no income and still counts as a month
+    assert profile.monthly_income == {"2023-08": 60000.0, "2023-09": 0.0, "2023-10": 30000.0}
+    assert profile.worst_month == "2023-09"
+    assert profile.worst_month_income == 0.0
+    assert profile.average_monthly_income == 30000.0
+    assert profile.volatility == pytest.approx(0.8165, abs=1e-4)
+
+    state = AnalyticsState()
+    analytics_agent.analyze_incremental(state, txns[:3])
+    assert analytics_agent.analyze_incremental(state, txns[3:]).income_profile == profile
+
+def test_income_profile_fixed(analytics_agent, sample_transactions):
+    profile = analytics_agent.analyze(sample_transactions).income_profile
+
+    # A single salary credit is not enough to call the income regular
+    assert profile.income_type == "unknown"
+    assert profile.monthly_income == {"2023-10": 50000.0}
@@ -0,0 +1,55 @@
+import io
+import json
+import subprocess
+import sys
+import pytest
+from core.batch import collect_inputs, run_batch
+from core.startup import ROOT
+
+CSV = (
+    "id,date,amount,type,merchant,description\n"
+    "t1,2023-10-01,50000,income,Employer,Salary\n"
+    "t2,2023-10-02,450,expense,Starbucks,Coffee\n"
+)
+
+@pytest.fixture
+def statements(tmp_path):
+    (tmp_path / "a.csv").write_text(CSV)
+    (tmp_path / "b.csv").write_text(CSV)
+    (tmp_path / "broken.json").write_text('{"transactions": ')
+    (tmp_path / "notes.txt").write_text("not a statement")
+    return tmp_path
+
+def test_collect_inputs(statements):
+    manifest = statements / "manifest.txt"
+    manifest.write_text("# nightly\nb.csv\nmissing.csv  # reported as a failure\n")
+
+    assert collect_inputs([str(statements)]) == [
+        str(statements / "a.csv"), str(statements / "b.csv"), str(statements / "broken.json")
+    ]
+    assert collect_inputs([str(statements / "*.csv")], str(manifest)) == [
+        str(statements / "a.csv"), str(statements / "b.csv"), str(statements / "missing.csv")
+    ]
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_batch_survives_bad_files(statements, workers):
+    paths = collect_inputs([str(statements)]) + [str(statements / "missing.csv")]
+    output, report = io.StringIO(), io.StringIO()
+
+    summary = run_batch(paths, output, workers=workers, use_cache=False, report=report)
+
+    records = {json.loads(line)["file"]: json.loads(line) for line in output.getvalue().splitlines()}
+    assert set(records) == set(paths)
+    assert records[str(statements / "a.csv")]["result"]["data"]["transactions_count"] == 2
+    assert records[str(statements / "broken.json")]["status"] == "error"
+    assert records[str(statements / "missing.csv")]["error"].startswith("FileNotFoundError")
+    assert (summary["succeeded"], summary["failed"], summary["transactions"]) == (2, 2, 4)
+    assert "2 succeeded" in report.getvalue()
+
+def test_cli_help_points_to_batch_mode():
+    def help_text(*args):
+        return subprocess.run([sys.executable, "main.py", *args, "--help"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout
+
+    assert "main.py batch --help" in help_text()
+    assert help_text("batch").startswith("usage: main.py batch")
@@ -0,0 +1,139 @@
+import os
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from core.cache import ResultCache, hash_file
+from agents.deduplication import DeduplicationAgent
+from agents.orchestrator import OrchestratorAgent
+from agents.transfers import TransferAgent
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / "cache"), max_bytes=10_000, ttl_seconds=60)
+
+@pytest.fixture
+def statement(tmp_path):
+    path = tmp_path / "statement.csv"
+    path.write_text(
+        "date,amount,type,merchant,description\n"
+        "2023-10-01,50000,income,Employer,Salary\n"
+        "2023-10-02,450,expense,Starbucks,Coffee\n"
+        "2023-10-07,15000,expense,Landlord,Rent\n"
+    )
+    return str(path)
+
+def test_get_put_and_stats(cache):
+    assert cache.get("k1") is None
+    cache.put("k1", {"status": "success", "value": 1.5})
+
+    assert cache.get("k1") == {"status": "success", "value": 1.5}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+def test_ttl_expires_entries(cache):
+    cache.put("k1", {"v": 1})
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+
+    assert cache.get("k1") is None
+    assert cache.stats()["expired"] == 1
+    assert cache.stats()["entries"] == 0
+
+def test_size_eviction_drops_least_recently_used(cache):
+    payload = {"blob": "x" * 3000}
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, payload)
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+    # Touching "a" makes "b" the oldest
+    cache.get("a")
+    cache.put("d", payload)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+def test_concurrent_puts_and_gets(cache):
+    cache.max_bytes = 10_000_000
+
+    def run(worker):
+        # Every worker writes the same keys, so the writes race on one entry each
+        for i in range(50):
+            cache.put(f"k{i % 20}", {"worker": worker, "i": i % 20, "rows": list(range(500))})
+            assert cache.get(f"k{i % 20}")["i"] == i % 20
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(run, range(8)))
+
+    stats = cache.stats()
+    assert stats["hits"] == 400 and stats["misses"] == 0
+    assert stats["entries"] == 20
+    assert not [name for name in os.listdir(cache.directory) if name.endswith(".tmp")]
+
+def test_hash_file_depends_on_content_and_version(tmp_path, statement):
+    copy = tmp_path / "copy.csv"
+    copy.write_bytes(open(statement, 'rb').read())
+
+    assert hash_file(statement, "v1") == hash_file(str(copy), "v1")
+    assert hash_file(statement, "v1") != hash_file(statement, "v2")
+
+def test_orchestrator_reuses_cached_result(tmp_path, statement):
+    orchestrator = OrchestratorAgent(cache_dir=str(tmp_path / "cache"))
+    first = orchestrator.process(statement)
+    second = orchestrator.process(statement)
+
+    assert orchestrator.cache_stats()["hits"] == 1
+    assert {k: v for k, v in second.items() if k != "logs"} == {k: v for k, v in first.items() if k != "logs"}
+    assert second["logs"][-1]["action"] == "Cache hit"
+
+def test_rule_change_invalidates_cache(tmp_path, statement):
+    orchestrator = OrchestratorAgent(cache_dir=str(tmp_path / "cache"))
+    orchestrator.process(statement)
+    orchestrator.categorization_agent.rules = {**orchestrator.categorization_agent.rules, "starbucks": "Groceries"}
+    result = orchestrator.process(statement)
+
+    assert orchestrator.cache_stats()["hits"] == 0
+    assert "Groceries" in result["data"]["spending_by_category"]
+
+@pytest.mark.parametrize("name, setting, value", [
+    ("deduplication_agent", "seen_window_days", 30),
+    ("transfer_agent", "date_tolerance_days", 0),
+    ("ingestion_agent", "vectorized", False),
+])
+def test_agent_setting_change_invalidates_cache(tmp_path, statement, name, setting, value):
+    orchestrator = OrchestratorAgent(cache_dir=str(tmp_path / "cache"))
+    orchestrator.process(statement)
+    setattr(getattr(orchestrator, name), setting, value)
+    orchestrator.process(statement)
+
+    assert orchestrator.cache_stats()["hits"] == 0
+
+def test_replaced_agent_invalidates_cache(tmp_path, statement):
+    class StrictTransfers(TransferAgent):
+        pass
+
+    orchestrator = OrchestratorAgent(cache_dir=str(tmp_path / "cache"))
+    orchestrator.process(statement)
+    orchestrator.transfer_agent = StrictTransfers()
+    orchestrator.process(statement)
+    # Another instance with the default settings is the same pipeline
+    orchestrator.deduplication_agent = DeduplicationAgent()
+    orchestrator.transfer_agent = TransferAgent()
+    orchestrator.process(statement)
+
+    assert orchestrator.cache_stats()["hits"] == 1
+
+def test_cache_opt_out(tmp_path, statement):
+    orchestrator = OrchestratorAgent(use_cache=False, cache_dir=str(tmp_path / "cache"))
+    orchestrator.process(statement)
+
+    assert orchestrator.cache is None
+    assert orchestrator.cache_stats() == {}
+    assert not (tmp_path / "cache").exists()
+
+def test_process_bytes_shares_cache_with_process(tmp_path, statement):
+    orchestrator = OrchestratorAgent(cache_dir=str(tmp_path / "cache"))
+    from_file = orchestrator.process(statement)
+    from_bytes = orchestrator.process_bytes(open(statement, 'rb').read(), "csv")
+
+    assert orchestrator.cache_stats()["hits"] == 1
+    assert from_bytes["data"] == from_file["data"]
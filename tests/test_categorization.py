@@ -1,7 +1,8 @@
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from agents.categorization import CategorizationAgent
 from agents.ingestion import IngestionAgent
-from core.schemas import Transaction
+from core.schemas import Transaction, Category
 from datetime import date
 
 @pytest.fixture
@@ -73,3 +74,106 @@ def test_categorize_uncategorized(categorization_agent):
     categorization_agent._categorize_single(txn)
     assert txn.category == "Uncategorized"
     assert txn.confidence_score == 0.0
+
+def test_earliest_keyword_wins(categorization_agent):
+    txn = Transaction(
+        id="t6",
+        txn_date=date(2023, 10, 11),
+        amount=450.0,
+        txn_type="expense",
+        merchant="Swiggy",
+        description="Food delivery"
+    )
+    categorization_agent._categorize_single(txn)
+    assert txn.category == "Dining Out"
+
+def test_keyword_inside_word_does_not_override_merchant(categorization_agent):
+    assert categorization_agent._match_category("flipkart smart watch") == "Shopping"
+
+def test_longest_match_priority():
+    agent = CategorizationAgent(match_priority="longest")
+    # "mobile bill" (Utilities) is longer than "amazon" (Shopping)
+    assert agent._match_category("amazon mobile bill") == "Utilities"
+    assert CategorizationAgent()._match_category("amazon mobile bill") == "Shopping"
+
+def test_memo_cache_hits_and_eviction():
+    agent = CategorizationAgent(cache_size=2)
+    txns = [
+        Transaction(id=f"m{i}", txn_date=date(2023, 10, 1), amount=10.0, txn_type="expense", merchant=merchant, description="Order")
+        for i, merchant in enumerate(["Uber", "Uber", "Zomato", "Uber", "Netflix", "Zomato"])
+    ]
+    agent.categorize(txns)
+
+    info = agent.cache_info()
+    assert info["hits"] == 2
+    assert info["misses"] == 4
+    assert info["size"] == 2
+    assert [t.category for t in txns] == ["Transport", "Transport", "Dining Out", "Transport", "Entertainment", "Dining Out"]
+
+def test_memo_shared_across_threads():
+    agent = CategorizationAgent(cache_size=2)
+    merchants = ["Uber", "Zomato", "Netflix", "Swiggy"] * 50
+
+    def run(offset):
+        txns = [
+            Transaction(id=f"t{offset}-{i}", txn_date=date(2023, 10, 1), amount=10.0, txn_type="expense", merchant=merchant, description="Order")
+            for i, merchant in enumerate(merchants[offset:] + merchants[:offset])
+        ]
+        agent.categorize(txns)
+        return txns
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(run, range(4)))
+
+    info = agent.cache_info()
+    assert info["hits"] + info["misses"] == 4 * len(merchants)
+    assert info["size"] <= 2
+    assert all(t.category == {"Uber": "Transport", "Zomato": "Dining Out", "Netflix": "Entertainment", "Swiggy": "Dining Out"}[t.merchant]
+               for txns in results for t in txns)
+
+def test_memo_invalidated_on_rule_change(categorization_agent):
+    txn = Transaction(id="m1", txn_date=date(2023, 10, 1), amount=10.0, txn_type="expense", merchant="Chai Point", description="Tea")
+    categorization_agent.categorize([txn])
+    assert txn.category == "Uncategorized"
+
+    # In-place edits are picked up at the next categorize() call
+    categorization_agent.rules["chai"] = "Dining Out"
+    categorization_agent.categorize([txn])
+    assert txn.category == "Dining Out"
+    assert categorization_agent.cache_info()["size"] == 1
+
+def test_rule_and_category_edits_invalidate(categorization_agent):
+    merchants, descriptions = ["Chai Point", "Uber"], ["Tea", "Ride"]
+
+    categorization_agent.rules.update({"chai": "Dining Out"})
+    assert categorization_agent.categorize_columns(merchants, descriptions)["category"].tolist() == ["Dining Out", "Transport"]
+
+    del categorization_agent.rules["uber"]
+    categorization_agent.categories["Dining Out"] = Category(name="Dining Out", cat_type="fixed", keywords=["chai"])
+    result = categorization_agent.categorize_columns(merchants, descriptions)
+    assert result["category"].tolist() == ["Dining Out", "Uncategorized"]
+    assert result["is_fixed"].tolist() == [True, False]
+    assert not categorization_agent.has_default_rules()
+
+def test_categorize_columns_batch(categorization_agent):
+    merchants = ["Uber", "Employer", "Swiggy", "Unknown Shop", "Uber"]
+    descriptions = ["Ride", "Salary", "Food delivery", "Misc", "Ride"]
+    result = categorization_agent.categorize_columns(merchants, descriptions)
+
+    assert result["category"].tolist() == ["Transport", "Salary", "Dining Out", "Uncategorized", "Transport"]
+    assert result["is_fixed"].tolist() == [False, False, False, False, False]
+    assert result["confidence_score"].tolist() == [0.9, 0.9, 0.9, 0.0, 0.9]
+    assert result["is_income"].tolist() == [False, True, False, False, False]
+
+def test_categorize_columns_matches_single():
+    for priority in ["earliest", "longest"]:
+        agent = CategorizationAgent(match_priority=priority)
+        merchants = ["Amazon", "Big Mart", "Landlord", "Spotify"]
+        descriptions = ["Mobile bill", "Smart TV", "Rent", "Premium"]
+        result = agent.categorize_columns(merchants, descriptions)
+        for i, (merchant, description) in enumerate(zip(merchants, descriptions)):
+            txn = Transaction(id=f"b{i}", txn_date=date(2023, 10, 1), amount=1.0, txn_type="expense",
+                              merchant=merchant, description=description)
+            agent._categorize_single(txn)
+            assert result["category"][i] == txn.category
+            assert result["is_fixed"][i] == txn.is_fixed
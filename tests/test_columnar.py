@@ -0,0 +1,132 @@
+import pytest
+import io
+import os
+import pandas as pd
+from agents.ingestion import IngestionAgent
+from agents.categorization import CategorizationAgent
+from agents.orchestrator import OrchestratorAgent
+from core.columnar import export_parquet, read_columnar
+from core.frame import ACCOUNT_COLUMN
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+feather = pytest.importorskip("pyarrow.feather")
+
+@pytest.fixture
+def ingestion_agent():
+    return IngestionAgent()
+
+@pytest.fixture
+def statement():
+    return pd.DataFrame({
+        "id": ["t1", "t2", "t3", "t4"],
+        "date": pd.to_datetime(["2023-09-28", "2023-10-01", "2023-10-15", "2023-11-02"]),
+        "amount": [120.0, 50000.0, 850.0, 499.0],
+        "type": ["expense", "income", "expense", "expense"],
+        "merchant": ["Starbucks", "Employer", "Uber", "Netflix"],
+        "description": ["Coffee", "Salary", "Ride", "Subscription"],
+        # Bank exports carry many columns ingestion never needs
+        "branch_code": ["X1", "X2", "X3", "X4"],
+    })
+
+def test_projection_reads_only_transaction_columns(statement, tmp_path):
+    path = tmp_path / "statement.parquet"
+    pq.write_table(pa.Table.from_pandas(statement, preserve_index=False), path)
+
+    df = read_columnar(str(path))
+
+    assert "branch_code" not in df.columns
+    assert list(df.columns) == ["id", "date", "amount", "type", "merchant", "description"]
+
+def test_ingest_parquet_matches_csv(ingestion_agent, statement, tmp_path):
+    statement.to_csv(tmp_path / "statement.csv", index=False)
+    pq.write_table(pa.Table.from_pandas(statement, preserve_index=False), tmp_path / "statement.parquet")
+
+    from_csv = ingestion_agent.ingest(str(tmp_path / "statement.csv"))
+    from_parquet = ingestion_agent.ingest(str(tmp_path / "statement.parquet"))
+
+    assert from_parquet.to_transactions() == from_csv.to_transactions()
+
+def test_ingest_arrow_bytes(ingestion_agent, statement):
+    buffer = io.BytesIO()
+    feather.write_feather(pa.Table.from_pandas(statement, preserve_index=False), buffer)
+
+    frame = ingestion_agent.ingest_source(buffer.getvalue(), "arrow")
+
+    assert [t.id for t in frame] == ["t1", "t2", "t3", "t4"]
+
+def test_export_is_month_partitioned_and_round_trips(ingestion_agent, statement, tmp_path):
+    frame = CategorizationAgent().categorize(ingestion_agent.ingest_source(statement))
+    root = str(tmp_path / "export")
+
+    months = export_parquet(frame.df, root)
+    reloaded = ingestion_agent.ingest(root, trusted=True)
+
+    assert months == ["2023-09", "2023-10", "2023-11"]
+    assert sorted(os.listdir(root)) == ["month=2023-09", "month=2023-10", "month=2023-11"]
+    assert pq.read_schema(os.path.join(root, "month=2023-10", "part-0.parquet")).field("date").type == pa.date32()
+    assert reloaded.to_transactions() == frame.to_transactions()
+
+def test_reexport_replaces_only_its_months(ingestion_agent, statement, tmp_path):
+    root = str(tmp_path / "export")
+    export_parquet(ingestion_agent.ingest_source(statement).df, root)
+
+    october = statement[statement["date"].dt.month == 10].assign(amount=1.0)
+    export_parquet(ingestion_agent.ingest_source(october).df, root)
+
+    df = read_columnar(root).sort_values("id")
+    assert df["amount"].tolist() == [120.0, 1.0, 1.0, 499.0]
+
+def test_date_range_pushdown(ingestion_agent, statement, tmp_path):
+    root = str(tmp_path / "export")
+    export_parquet(ingestion_agent.ingest_source(statement).df, root)
+
+    frame = ingestion_agent.ingest_columnar(root, start="2023-10-01", end="2023-10-31", trusted=True)
+
+    assert [t.id for t in frame] == ["t2", "t3"]
+
+def test_date_range_on_text_dates(ingestion_agent, statement, tmp_path):
+    path = tmp_path / "statement.parquet"
+    text_dates = statement.assign(date=statement["date"].dt.strftime("%Y-%m-%d"))
+    pq.write_table(pa.Table.from_pandas(text_dates, preserve_index=False), path)
+
+    frame = ingestion_agent.ingest_columnar(str(path), start="2023-10-01", end="2023-10-15")
+
+    assert [t.id for t in frame] == ["t2", "t3"]
+
+def test_orchestrator_export(statement, tmp_path):
+    source = tmp_path / "statement.csv"
+    statement.to_csv(source, index=False)
+    root = str(tmp_path / "export")
+    orchestrator = OrchestratorAgent(use_cache=False)
+
+    first = orchestrator.process_source(str(source), export_dir=root)
+    # Exported datasets are read trusted, so their categories are kept
+    again = orchestrator.process_source(root)
+
+    assert "ParquetExport" in [log["agent"] for log in first["logs"]]
+    categorization = next(log for log in again["logs"] if log["agent"] == "CategorizationAgent" and log["action"] == "Completed")
+    assert categorization["details"].startswith("Kept the categories")
+    assert again["data"]["total_income"] == first["data"]["total_income"]
+    assert again["data"]["spending_by_category"] == first["data"]["spending_by_category"]
+    assert again["confidence_score"] == first["confidence_score"]
+
+def test_export_is_not_recategorized(ingestion_agent, statement, tmp_path):
+    frame = CategorizationAgent().categorize(ingestion_agent.ingest_source(statement))
+    frame.df["category"] = "Shopping"
+    root = str(tmp_path / "export")
+    export_parquet(frame.df, root)
+
+    data = OrchestratorAgent(use_cache=False).process_source(root)["data"]
+
+    assert list(data["spending_by_category"]) == ["Shopping"]
+
+def test_export_keeps_accounts(ingestion_agent, statement, tmp_path):
+    frame = ingestion_agent.ingest_source(statement)
+    frame.df[ACCOUNT_COLUMN] = ["savings", "checking", "checking", "savings"]
+    root = str(tmp_path / "export")
+    export_parquet(frame.df, root)
+
+    reloaded = ingestion_agent.ingest(root, trusted=True).df.sort_values("id")
+
+    assert reloaded[ACCOUNT_COLUMN].tolist() == ["savings", "checking", "checking", "savings"]
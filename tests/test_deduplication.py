@@ -0,0 +1,178 @@
+import pytest
+from datetime import date
+from agents.deduplication import DeduplicationAgent
+from agents.orchestrator import OrchestratorAgent
+from core.frame import TransactionFrame
+from core.schemas import SeenKeys, Transaction
+
+def txn(id, day, amount=120.0, merchant="Starbucks", txn_type="expense", description="Coffee"):
+    return Transaction(id=id, txn_date=date(2023, 10, day), amount=amount, txn_type=txn_type,
+                       merchant=merchant, description=description)
+
+def frame(*transactions):
+    return TransactionFrame.from_transactions(list(transactions))
+
+@pytest.fixture
+def agent():
+    return DeduplicationAgent()
+
+def test_exact_duplicates_across_statements(agent):
+    september = frame(txn("a", 1), txn("b", 2, amount=80.0))
+    october = frame(txn("b", 2, amount=80.0), txn("c", 5, amount=300.0))
+
+    merged, report = agent.deduplicate([september, october])
+
+    assert [t.id for t in merged] == ["a", "b", "c"]
+    assert report.input_rows == 4 and report.output_rows == 3
+    assert report.exact_duplicates == 1 and report.near_duplicates == 0
+    assert report.dropped_ids == ["b"] and report.reasons == ["exact"]
+
+def test_near_duplicates_within_window(agent):
+    # Same purchase exported by another bank feed: new id, posting date a day later
+    first = frame(txn("a", 1), txn("b", 10, merchant="Uber", amount=250.0))
+    second = frame(txn("x", 2, merchant="STARBUCKS"), txn("y", 12, merchant="Uber", amount=250.0))
+
+    merged, report = agent.deduplicate([first, second])
+
+    assert [t.id for t in merged] == ["a", "b", "y"]
+    assert report.near_duplicates == 1
+    assert report.dropped_ids == ["x"]
+    assert report.duplicate_of == ["a"]
+    assert report.reasons == ["near"]
+
+def test_repeated_purchases_in_one_statement_are_kept(agent):
+    statement = frame(txn("a", 1), txn("b", 1), txn("c", 2))
+
+    merged, report = agent.deduplicate([statement])
+
+    assert len(merged) == 3
+    assert report.dropped_ids == []
+
+def test_near_matching_is_one_to_one(agent):
+    # Two real coffees on consecutive days appear once in the other statement
+    first = frame(txn("a", 1), txn("b", 2))
+    second = frame(txn("x", 2))
+
+    merged, report = agent.deduplicate([first, second])
+
+    assert [t.id for t in merged] == ["a", "b"]
+    assert report.dropped_ids == ["x"]
+
+def test_different_amount_or_type_is_not_a_duplicate(agent):
+    first = frame(txn("a", 1))
+    second = frame(txn("x", 1, amount=121.0), txn("y", 1, txn_type="income"))
+
+    merged, report = agent.deduplicate([first, second])
+
+    assert len(merged) == 3
+    assert report.exact_duplicates == report.near_duplicates == 0
+
+def test_exact_copy_of_near_duplicate_points_at_kept_row(agent):
+    first = frame(txn("a", 1))
+    second = frame(txn("x", 2))
+    third = frame(txn("x", 2))
+
+    merged, report = agent.deduplicate([first, second, third])
+
+    assert [t.id for t in merged] == ["a"]
+    assert sorted(zip(report.dropped_ids, report.duplicate_of, report.reasons)) == [
+        ("x", "a", "exact"), ("x", "a", "near")
+    ]
+
+def test_empty_statements(agent):
+    merged, report = agent.deduplicate([TransactionFrame.empty(), TransactionFrame.empty()])
+    assert len(merged) == 0 and report.input_rows == 0
+
+def test_orchestrator_process_sources(tmp_path):
+    header = "id,date,amount,type,merchant,description\n"
+    (tmp_path / "september.csv").write_text(header + "t1,2023-09-30,120,expense,Starbucks,Coffee\n"
+                                            "t2,2023-10-01,5000,income,Employer,Salary\n")
+    (tmp_path / "october.csv").write_text(header + "t2,2023-10-01,5000,income,Employer,Salary\n"
+                                          "t9,2023-10-01,120,expense,Starbucks,Coffee\n"
+                                          "t3,2023-10-03,40,expense,Uber,Ride\n")
+    orchestrator = OrchestratorAgent(use_cache=False)
+
+    result = orchestrator.process_sources([str(tmp_path / "september.csv"), str(tmp_path / "october.csv")])
+
+    dedup = result["data"]["deduplication"]
+    assert result["data"]["transactions_count"] == 3
+    assert dedup["exact_duplicates"] == 1 and dedup["near_duplicates"] == 1
+    assert sorted(dedup["dropped"], key=lambda d: d["id"]) == [
+        {"id": "t2", "duplicate_of": "t2", "reason": "exact"},
+        {"id": "t9", "duplicate_of": "t1", "reason": "near"},
+    ]
+
+def test_history_drops_rows_already_counted(agent):
+    seen = SeenKeys()
+    agent.deduplicate_history(frame(txn("a", 1), txn("b", 20, amount=80.0)), seen)
+
+    # Overlaps the previous statement by one row and repeats one of its own
+    merged, report = agent.deduplicate_history(frame(txn("b", 20, amount=80.0), txn("c", 25), txn("c", 25)), seen)
+
+    assert [t.id for t in merged] == ["c"]
+    assert report.dropped_ids == ["b", "c"] and report.reasons == ["seen", "exact"]
+    assert report.seen_duplicates == 1 and report.exact_duplicates == 1
+    assert report.output_rows == 1
+
+def test_history_keys_are_bounded_by_window():
+    agent = DeduplicationAgent(seen_window_days=5)
+    seen = SeenKeys()
+    agent.deduplicate_history(frame(txn("a", 1), txn("b", 10), txn("c", 20)), seen)
+
+    # "a" is older than the window: it is kept unchecked, not assumed to be a duplicate
+    merged, report = agent.deduplicate_history(frame(txn("a", 1), txn("y", 18)), seen)
+
+    assert seen.since == date(2023, 10, 16)
+    assert sorted(seen.keys) == [date(2023, 10, 18), date(2023, 10, 20)]
+    assert [t.id for t in merged] == ["a", "y"]
+    assert report.unchecked_rows == 1 and report.dropped_ids == []
+
+def test_batch_keys_are_bounded_by_window():
+    agent = DeduplicationAgent(seen_window_days=5)
+    seen = SeenKeys()
+    agent.deduplicate_batch(frame(txn("a", 1), txn("b", 10)), seen)
+
+    # Repeats across batches are exact duplicates of the one statement being streamed
+    merged, report = agent.deduplicate_batch(frame(txn("b", 10), txn("c", 20), txn("c", 20)), seen)
+
+    assert [t.id for t in merged] == ["c"]
+    assert report.exact_duplicates == 2 and report.reasons == ["exact", "exact"]
+    assert sorted(seen.keys) == [date(2023, 10, 20)]
+
+    merged, report = agent.deduplicate_batch(frame(txn("a", 1)), seen)
+
+    assert [t.id for t in merged] == ["a"]
+    assert report.unchecked_rows == 1
+
+def test_orchestrator_incremental_reupload(tmp_path):
+    header = "id,date,amount,type,merchant,description\n"
+    (tmp_path / "october.csv").write_text(header + "t1,2023-10-01,50000,income,Employer,Salary\n"
+                                          "t2,2023-10-03,40,expense,Uber,Ride\n")
+    state_path = str(tmp_path / "state.json")
+    orchestrator = OrchestratorAgent(use_cache=False)
+
+    first = orchestrator.process_incremental(str(tmp_path / "october.csv"), state_path)["data"]
+    again = orchestrator.process_incremental(str(tmp_path / "october.csv"), state_path)["data"]
+
+    assert again["transactions_count"] == first["transactions_count"] == 2
+    assert again["total_income"] == 50000.0 and again["total_expense"] == 40.0
+    assert again["deduplication"]["seen_duplicates"] == 2
+    assert again["deduplication"]["exact_duplicates"] == 0
+
+def test_orchestrator_incremental_older_statement(tmp_path):
+    header = "id,date,amount,type,merchant,description\n"
+    (tmp_path / "june.csv").write_text(header + "j1,2024-06-01,50000,income,Employer,Salary\n"
+                                       "j2,2024-06-03,40,expense,Uber,Ride\n")
+    # Backfilled afterwards, months before the history's key window
+    (tmp_path / "january.csv").write_text(header + "a1,2024-01-01,50000,income,Employer,Salary\n"
+                                          "a2,2024-01-03,300,expense,Uber,Ride\n")
+    state_path = str(tmp_path / "state.json")
+    orchestrator = OrchestratorAgent(use_cache=False)
+
+    orchestrator.process_incremental(str(tmp_path / "june.csv"), state_path)
+    data = orchestrator.process_incremental(str(tmp_path / "january.csv"), state_path)["data"]
+
+    assert data["transactions_count"] == 4
+    assert data["total_income"] == 100000.0 and data["total_expense"] == 340.0
+    assert data["deduplication"]["unchecked_rows"] == 2
+    assert data["deduplication"]["dropped"] == []
@@ -0,0 +1,57 @@
+import pytest
+import os
+from agents.ingestion import IngestionAgent
+from agents.categorization import CategorizationAgent
+from core.frame import TransactionFrame, validate_columns
+from core.schemas import Transaction
+from datetime import date
+
+@pytest.fixture
+def sample_transactions():
+    return [
+        Transaction(id="t1", txn_date=date(2023, 10, 1), amount=50.0, txn_type="expense", merchant="Uber", description="Ride"),
+        Transaction(id="t2", txn_date=date(2023, 10, 5), amount=50000.0, txn_type="expense", merchant="Employer", description="Salary"),
+        Transaction(id="t3", txn_date=date(2023, 10, 7), amount=99.0, txn_type="expense", merchant="Corner Shop", description="Misc"),
+    ]
+
+def test_round_trip(sample_transactions):
+    frame = TransactionFrame.from_transactions(sample_transactions)
+
+    assert len(frame) == 3
+    assert frame.to_transactions() == sample_transactions
+    assert frame[1] == sample_transactions[1]
+    assert len(frame[1:]) == 2
+
+def test_empty_frame_is_falsy():
+    assert not TransactionFrame.empty()
+    assert len(TransactionFrame.concat([])) == 0
+
+def test_frame_categorization_matches_single(sample_transactions):
+    agent = CategorizationAgent()
+    frame = agent.categorize(TransactionFrame.from_transactions(sample_transactions))
+    for txn in sample_transactions:
+        agent._categorize_single(txn)
+
+    assert frame.to_transactions() == sample_transactions
+    assert frame.df['type'].tolist() == ["expense", "income", "expense"]
+
+def test_ingest_returns_frame():
+    file_path = os.path.join("data", "sample_transactions.csv")
+    if not os.path.exists(file_path):
+        pytest.skip("Sample CSV not found")
+
+    frame = IngestionAgent().ingest(file_path)
+    assert isinstance(frame, TransactionFrame)
+    assert frame.df['category'].isna().all()
+    assert isinstance(frame[0].txn_date, date)
+
+def test_validate_columns(sample_transactions):
+    frame = TransactionFrame.from_transactions(sample_transactions)
+    validate_columns(frame.df)
+
+    df = frame.df.assign(type=["expense", "Expense", "refund"], amount=[1.0, float("nan"), 2.0])
+    with pytest.raises(ValueError) as excinfo:
+        validate_columns(df)
+    message = str(excinfo.value)
+    assert "column 'amount' has 1 invalid values (first at row 1: nan)" in message
+    assert "column 'type' has 2 invalid values (first at row 1: 'Expense')" in message
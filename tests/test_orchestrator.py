@@ -0,0 +1,149 @@
+import json
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import pytest
+from agents.orchestrator import OrchestratorAgent
+from core.tracing import StageSpan
+
+@pytest.fixture
+def orchestrator():
+    return OrchestratorAgent(use_cache=False)
+
+@pytest.fixture
+def csv_bytes():
+    return (
+        b"id,date,amount,type,merchant,description\n"
+        b"t1,2023-10-01,50000,income,Employer,Salary\n"
+        b"t2,2023-10-02,450,expense,Starbucks,Coffee\n"
+        b"t3,2023-10-07,15000,expense,Landlord,Rent\n"
+        b"t4,2023-10-08,2200,expense,Amazon,Shoes\n"
+    )
+
+def strip_logs(result):
+    return {k: v for k, v in result.items() if k != "logs"}
+
+def test_process_source_inputs_agree(orchestrator, csv_bytes, tmp_path):
+    path = tmp_path / "statement.csv"
+    path.write_bytes(csv_bytes)
+    df = pd.read_csv(path)
+
+    expected = strip_logs(orchestrator.process(str(path)))
+    assert expected["status"] == "success"
+    assert strip_logs(orchestrator.process_source(csv_bytes, "csv")) == expected
+    assert strip_logs(orchestrator.process_source(path)) == expected
+    assert strip_logs(orchestrator.process_source(df)) == expected
+    assert strip_logs(orchestrator.process_source(df.to_dict("records"))) == expected
+
+def test_process_source_empty_records(orchestrator):
+    assert orchestrator.process_source([])["status"] == "no_data"
+
+def test_stage_logs_carry_metrics(orchestrator, csv_bytes):
+    logs = orchestrator.process_source(csv_bytes, "csv")["logs"]
+    completed = {log["agent"]: log for log in logs if log["action"] == "Completed"}
+
+    assert set(completed) == {"IngestionAgent", "DeduplicationAgent", "CategorizationAgent", "TransferAgent", "AnalyticsAgent", "RecommendationAgent"}
+    for log in completed.values():
+        assert log["duration_ms"] >= 0
+        assert log["cpu_ms"] >= 0
+    assert completed["IngestionAgent"]["rows_out"] == 4
+    assert completed["CategorizationAgent"]["rows_in"] == 4
+    assert "duration_ms" not in next(log for log in logs if log["action"] == "Starting")
+
+def test_export_trace(orchestrator, csv_bytes, tmp_path):
+    orchestrator.process_source(csv_bytes, "csv")
+    path = tmp_path / "trace.json"
+    orchestrator.export_trace(str(path))
+
+    events = json.loads(path.read_text())["traceEvents"]
+    spans = [e for e in events if e["ph"] == "X"]
+    assert [e["name"] for e in spans] == ["IngestionAgent", "DeduplicationAgent", "CategorizationAgent", "TransferAgent", "AnalyticsAgent", "RecommendationAgent"]
+    assert all(e["dur"] >= 0 for e in spans)
+    assert spans[0]["args"]["rows_out"] == 4
+    # Stages run back to back
+    assert all(a["ts"] <= b["ts"] for a, b in zip(spans, spans[1:]))
+
+def test_export_trace_separates_threads(csv_bytes, tmp_path):
+    orchestrator = OrchestratorAgent(use_cache=False)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        runs = list(pool.map(lambda _: orchestrator.process_source(csv_bytes, "csv")["logs"], range(2)))
+    path = tmp_path / "trace.json"
+    orchestrator.export_trace(str(path), logs=runs[0] + runs[1])
+
+    events = json.loads(path.read_text())["traceEvents"]
+    tracks = {log["thread_id"] for run in runs for log in run}
+    assert len({e["tid"] for e in events if e["ph"] == "X"}) == len(tracks)
+    assert sum(e["ph"] == "M" for e in events) == len(tracks)
+
+def test_failed_stage_is_logged(orchestrator):
+    with pytest.raises(Exception):
+        orchestrator.process_source(b"not,a\nstatement", "xml")
+    failed = [log for log in orchestrator.logs if log.action == "Failed"]
+    assert failed and failed[0].agent_name == "IngestionAgent"
+    assert failed[0].duration_ms is not None
+
+def test_runs_have_their_own_logs(csv_bytes):
+    orchestrator = OrchestratorAgent(use_cache=False, log_history=12)
+    first = orchestrator.process_source(csv_bytes, "csv")["logs"]
+    second = orchestrator.process_source(csv_bytes, "csv")["logs"]
+
+    assert len(first) == len(second) == 12
+    assert len(orchestrator.logs) == 12
+    assert orchestrator.log_history()[-1].timestamp.isoformat() == second[-1]["timestamp"]
+
+def test_concurrent_process(csv_bytes):
+    orchestrator = OrchestratorAgent(use_cache=False)
+    expected = strip_logs(orchestrator.process_source(csv_bytes, "csv"))
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: orchestrator.process_source(csv_bytes, "csv"), range(16)))
+
+    for result in results:
+        assert strip_logs(result) == expected
+        assert [log["action"] for log in result["logs"]] == ["Starting", "Completed"] * 6
+
+def test_concurrent_memory_tracing(csv_bytes):
+    orchestrator = OrchestratorAgent(use_cache=False, trace_memory=True)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: orchestrator.process_source(csv_bytes, "csv"), range(8)))
+
+    completed = [log for result in results for log in result["logs"] if log["action"] == "Completed"]
+    assert all(log["memory_peak_delta_kb"] >= 0 for log in completed)
+    assert not tracemalloc.is_tracing()
+
+def test_overlapping_spans_share_tracemalloc():
+    first = StageSpan(trace_memory=True).__enter__()
+    second = StageSpan(trace_memory=True).__enter__()
+    first.__exit__(None, None, None)
+
+    # The first span started tracing, but the second still measures with it
+    assert tracemalloc.is_tracing()
+    block = bytearray(2_000_000)
+    second.__exit__(None, None, None)
+
+    assert second.memory_peak_delta_kb >= 1900
+    assert not tracemalloc.is_tracing()
+    del block
+
+def test_agents_built_on_first_use(csv_bytes):
+    orchestrator = OrchestratorAgent(use_cache=False)
+    assert "categorization_agent" not in vars(orchestrator)
+
+    orchestrator.process_source(csv_bytes, "csv")
+    assert orchestrator.categorization_agent is vars(orchestrator)["categorization_agent"]
+    with pytest.raises(AttributeError):
+        orchestrator.missing_agent
+
+def test_trusted_source_matches_normal(orchestrator, csv_bytes):
+    assert strip_logs(orchestrator.process_source(csv_bytes, "csv", trusted=True)) == strip_logs(orchestrator.process_source(csv_bytes, "csv"))
+
+def test_stream_matches_process(orchestrator, csv_bytes, tmp_path):
+    # A repeated row in a later batch is still dropped
+    path = tmp_path / "statement.csv"
+    path.write_bytes(csv_bytes + b"t2,2023-10-02,450,expense,Starbucks,Coffee\n")
+
+    streamed = strip_logs(orchestrator.process_stream(str(path), chunk_size=2))
+
+    assert streamed == strip_logs(orchestrator.process(str(path)))
+    assert streamed["data"]["deduplication"]["exact_duplicates"] == 1
@@ -0,0 +1,71 @@
+import pytest
+from agents.analytics import AnalyticsAgent
+from agents.recommendation import RecommendationAgent
+from core.schemas import Transaction
+from datetime import date
+
+@pytest.fixture
+def recommendation_agent():
+    return RecommendationAgent()
+
+@pytest.fixture
+def analysis():
+    txns = [
+        Transaction(id=f"d{i}", txn_date=date(2023, 10, 2 + i), amount=1500.0, txn_type="expense", merchant="Swiggy", description="Dinner", category="Dining Out", is_fixed=False)
+        for i in range(4)
+    ] + [
+        Transaction(id=f"n{i}", txn_date=date(2023, 8 + i, 5), amount=649.0, txn_type="expense", merchant="Netflix", description="Plan", category="Entertainment", is_fixed=False)
+        for i in range(3)
+    ] + [
+        Transaction(id="s1", txn_date=date(2023, 10, 1), amount=80000.0, txn_type="income", merchant="Employer", description="Salary", category="Salary", is_fixed=False),
+    ]
+    return AnalyticsAgent().analyze(txns)
+
+def test_insight_metrics(analysis):
+    by_type = {i.insight_type: i for i in analysis.insights}
+
+    spike = by_type["category_spike"].metrics
+    assert (spike.category, spike.amount, spike.count, spike.average) == ("Dining Out", 6000.0, 4, 1500.0)
+
+    subscription, = [i.metrics for i in analysis.insights if i.insight_type == "subscription" and i.metrics.merchant == "Netflix"]
+    assert (subscription.merchant, subscription.amount, subscription.count, subscription.average) == ("Netflix", 1947.0, 3, 649.0)
+
+def test_recommendations_read_metrics(recommendation_agent, analysis):
+    titles = {rec.title: rec for rec in recommendation_agent.generate_recommendations(analysis)}
+
+    spike = titles["Whoa - Rs.6,000 on Dining Out?!"]
+    assert spike.estimated_savings == pytest.approx(1200.0)
+
+    subscription = titles["Quick Question: Still Using Netflix?"]
+    assert subscription.estimated_savings == 649.0
+    assert "paid this 3 times" in subscription.description
+
+def test_freelancer_worst_month_is_quoted(recommendation_agent):
+    txns = [
+        Transaction(id=f"p{i}", txn_date=date(2023, 8 + i // 3, 1 + 9 * (i % 3)), amount=amount, txn_type="income", merchant="Client", description="Invoice", category="Salary", is_fixed=False)
+        for i, amount in enumerate([30000.0, 25000.0, 20000.0, 8000.0, 7000.0, 6000.0])
+    ] + [
+        Transaction(id="r1", txn_date=date(2023, 9, 25), amount=90000.0, txn_type="expense", merchant="Landlord", description="Rent", category="Rent", is_fixed=True),
+    ]
+    analysis = AnalyticsAgent().analyze(txns)
+    assert analysis.income_profile.income_type == "variable"
+
+    recs = recommendation_agent.generate_recommendations(analysis)
+    safety_net, = [r for r in recs if r.title.startswith("Building Your Safety Net")]
+    assert any("2023-09 at Rs.21,000" in step for step in safety_net.actionable_steps)
+
+def test_salaried_savings_steps_quote_income(recommendation_agent):
+    txns = [
+        Transaction(id=f"s{i}", txn_date=date(2023, 8 + i, 1), amount=50000.0, txn_type="income", merchant="Employer", description="Salary", category="Salary", is_fixed=False)
+        for i in range(3)
+    ] + [
+        Transaction(id=f"r{i}", txn_date=date(2023, 8 + i, 3), amount=45000.0, txn_type="expense", merchant="Landlord", description="Rent", category="Rent", is_fixed=True)
+        for i in range(3)
+    ]
+    analysis = AnalyticsAgent().analyze(txns)
+    assert analysis.income_profile.income_type == "fixed"
+
+    recs = recommendation_agent.generate_recommendations(analysis)
+    savings, = [r for r in recs if r.title.startswith("Let's Build Your Savings Together")]
+    # 2% of the income the statement covers
+    assert any(step.startswith("MONTH 2: Increase auto-transfer by 2% (Rs.3,000)") for step in savings.actionable_steps)
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+import pytest
+from core.startup import DEFERRED_MODULES, IMPORT_BUDGET_MS, ROOT, import_times, module_import_ms
+
+def loaded_modules(args):
+    return {record.module for record in import_times(args)}
+
+def test_help_does_not_import_heavy_modules():
+    loaded = loaded_modules(["main.py", "--help"])
+    assert "argparse" in loaded
+    assert not loaded & set(DEFERRED_MODULES)
+    assert "agents.orchestrator" not in loaded
+
+def test_orchestrator_import_is_lazy():
+    loaded = loaded_modules(["-c", "import agents.orchestrator; agents.orchestrator.OrchestratorAgent(use_cache=False)"])
+    assert not loaded & set(DEFERRED_MODULES)
+    assert "agents.ingestion" not in loaded
+
+def test_orchestrator_import_leaves_heavy_modules_unloaded():
+    # A fresh interpreter: this test process has pandas loaded already
+    code = "import sys, agents.orchestrator; print(' '.join(m for m in ('pandas', 'plotly') if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert proc.stdout.split() == []
+
+# Wall-clock budgets depend on the machine; run with FINANCE_COACH_BENCHMARKS=1
+@pytest.mark.skipif(not os.environ.get("FINANCE_COACH_BENCHMARKS"), reason="set FINANCE_COACH_BENCHMARKS=1 to check timing budgets")
+def test_orchestrator_import_budget():
+    assert module_import_ms("agents.orchestrator") <= IMPORT_BUDGET_MS
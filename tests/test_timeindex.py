@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+from core.timeindex import DateIndex
+from datetime import date
+
+@pytest.fixture
+def df():
+    # Deliberately out of date order
+    return pd.DataFrame({
+        'id': ["a", "b", "c", "d", "e", "f"],
+        'date': pd.to_datetime(["2023-10-05", "2023-10-01", "2023-10-04", "2023-10-03", "2023-10-05", "2023-10-02"]),
+        'amount': [100.0, 50.0, 200.0, 300.0, 25.0, 75.0],
+        'type': ["expense", "expense", "income", "expense", "expense", "expense"],
+        'category': ["Shopping", "Groceries", "Salary", "Groceries", "Groceries", "Shopping"],
+    })
+
+def test_last_day_and_between(df):
+    index = DateIndex(df)
+
+    assert index.last_day == pd.Timestamp("2023-10-05")
+    # Original row order is kept
+    assert index.between(date(2023, 10, 2), date(2023, 10, 4))['id'].tolist() == ["c", "d", "f"]
+
+def test_trailing_window_matches_filter(df):
+    index = DateIndex(df)
+    window = index.trailing(3, txn_type="expense")
+
+    expected = df[(df['date'] > pd.Timestamp("2023-10-02")) & (df['type'] == "expense")]
+    assert window['id'].tolist() == expected['id'].tolist() == ["a", "d", "e"]
+
+def test_spend_by_category(df):
+    totals = DateIndex(df).spend_by_category(3)
+
+    assert totals.to_dict() == {"Shopping": 100.0, "Groceries": 325.0}
+    assert totals.index.tolist() == ["Shopping", "Groceries"]
+
+def test_empty_index():
+    index = DateIndex(pd.DataFrame({'date': pd.to_datetime([]), 'type': [], 'category': [], 'amount': []}))
+
+    assert index.last_day is None
+    assert index.trailing(3).empty
@@ -0,0 +1,135 @@
+import pytest
+from datetime import date
+from agents.transfers import TransferAgent
+from agents.analytics import AnalyticsAgent
+from agents.orchestrator import OrchestratorAgent
+from core.frame import TransactionFrame, ACCOUNT_COLUMN, TRANSFER_CATEGORY
+from core.schemas import Transaction
+
+def txn(id, day, amount, txn_type, merchant="Own Account", description="Transfer", category=None):
+    return Transaction(id=id, txn_date=date(2023, 10, day), amount=amount, txn_type=txn_type,
+                       merchant=merchant, description=description, category=category)
+
+def accounts_frame(*accounts):
+    """
+    One merged frame from (account, [transactions]) pairs.
+    """
+    frames = []
+    for account, transactions in accounts:
+        frame = TransactionFrame.from_transactions(transactions)
+        frame.df[ACCOUNT_COLUMN] = account
+        frames.append(frame)
+    return TransactionFrame.concat(frames)
+
+@pytest.fixture
+def agent():
+    return TransferAgent()
+
+def test_pairs_opposite_legs_across_accounts(agent):
+    frame = accounts_frame(
+        ("savings", [txn("s1", 5, 10000.0, "expense"), txn("s2", 9, 42.0, "expense", "Bank", "Fee")]),
+        ("checking", [txn("c1", 6, 10000.0, "income"), txn("c2", 20, 42.0, "income", "Shop", "Refund")]),
+    )
+
+    tagged, report = agent.match(frame)
+
+    assert report.matched_pairs == 1
+    assert report.outgoing_ids == ["s1"] and report.incoming_ids == ["c1"]
+    assert report.total_amount == 10000.0
+    categories = dict(zip(tagged.df['id'], tagged.df['category']))
+    assert categories["s1"] == categories["c1"] == TRANSFER_CATEGORY
+    assert categories["s2"] != TRANSFER_CATEGORY and categories["c2"] != TRANSFER_CATEGORY
+
+def test_same_account_is_never_a_transfer(agent):
+    # A refund of the same amount in the same account
+    frame = accounts_frame(("checking", [txn("a", 5, 500.0, "expense"), txn("b", 5, 500.0, "income")]))
+
+    _, report = agent.match(frame)
+
+    assert report.matched_pairs == 0
+
+def test_without_accounts_nothing_is_matched(agent):
+    frame = TransactionFrame.from_transactions([txn("a", 5, 500.0, "expense"), txn("b", 5, 500.0, "income")])
+
+    _, report = agent.match(frame)
+
+    assert report.matched_pairs == 0
+
+def test_date_tolerance(agent):
+    frame = accounts_frame(
+        ("savings", [txn("s1", 1, 700.0, "expense"), txn("s2", 10, 900.0, "expense")]),
+        ("checking", [txn("c1", 3, 700.0, "income"), txn("c2", 13, 900.0, "income")]),
+    )
+
+    _, report = agent.match(frame)
+
+    assert report.outgoing_ids == ["s1"]
+
+def test_each_leg_pairs_once_and_closest_date_wins(agent):
+    frame = accounts_frame(
+        ("savings", [txn("s1", 10, 2000.0, "expense")]),
+        ("checking", [txn("c1", 8, 2000.0, "income"), txn("c2", 10, 2000.0, "income"),
+                      txn("c3", 11, 2000.0, "income")]),
+    )
+
+    _, report = agent.match(frame)
+
+    assert list(zip(report.outgoing_ids, report.incoming_ids)) == [("s1", "c2")]
+
+def test_equal_amount_alone_is_not_a_transfer(agent):
+    # Salary lands in checking, the same amount goes out of savings as rent a day later
+    frame = accounts_frame(
+        ("checking", [txn("c1", 1, 25000.0, "income", "Employer", "Salary", category="Salary")]),
+        ("savings", [txn("s1", 2, 25000.0, "expense", "Landlord", "Rent", category="Rent"),
+                     txn("s2", 3, 25000.0, "expense", "HDFC Bank", "NEFT to checking", category="Bills")]),
+    )
+
+    _, report = agent.match(frame)
+
+    # Only the leg whose narration says it is a transfer pairs with the salary
+    assert list(zip(report.outgoing_ids, report.incoming_ids)) == [("s2", "c1")]
+
+def test_same_counterparty_pairs_when_categorized(agent):
+    frame = accounts_frame(
+        ("card", [txn("k1", 4, 3200.0, "income", "HDFC Card", "Payment received", category="Bills")]),
+        ("checking", [txn("c1", 3, 3200.0, "expense", "HDFC Card", "Card bill", category="Bills")]),
+    )
+
+    _, report = agent.match(frame)
+
+    assert report.outgoing_ids == ["c1"] and report.incoming_ids == ["k1"]
+
+def test_analytics_excludes_transfers(agent):
+    frame = accounts_frame(
+        ("savings", [txn("s1", 5, 10000.0, "expense")]),
+        ("checking", [txn("c1", 5, 10000.0, "income"), txn("c2", 6, 300.0, "expense", "Starbucks", "Coffee")]),
+    )
+    tagged, _ = agent.match(frame)
+
+    analysis = AnalyticsAgent().analyze(tagged)
+
+    assert analysis.total_income == 0.0
+    assert analysis.total_expense == 300.0
+    assert TRANSFER_CATEGORY not in analysis.spending_by_category
+
+def test_orchestrator_process_sources_reports_transfers(tmp_path):
+    header = "id,date,amount,type,merchant,description\n"
+    (tmp_path / "savings.csv").write_text(header + "s1,2023-10-05,10000,expense,Own Account,Transfer to checking\n")
+    (tmp_path / "checking.csv").write_text(header + "c0,2023-10-01,50000,income,Employer,Salary\n"
+                                           "c1,2023-10-06,10000,income,Own Account,Transfer from savings\n"
+                                           "c2,2023-10-07,300,expense,Starbucks,Coffee\n")
+    sources = [str(tmp_path / "savings.csv"), str(tmp_path / "checking.csv")]
+    orchestrator = OrchestratorAgent(use_cache=False)
+
+    data = orchestrator.process_sources(sources)["data"]
+    same_account = orchestrator.process_sources(sources, accounts=["joint", "joint"])["data"]
+
+    assert data["transfers"]["pairs"] == [{"outgoing_id": "s1", "incoming_id": "c1", "amount": 10000.0}]
+    assert data["total_income"] == 50000.0
+    assert data["total_expense"] == 300.0
+    assert same_account["transfers"]["matched_pairs"] == 0
+    assert same_account["total_income"] == 60000.0
+
+def test_process_sources_rejects_mismatched_accounts():
+    with pytest.raises(ValueError):
+        OrchestratorAgent(use_cache=False).process_sources(["a.csv", "b.csv"], accounts=["only-one"])